@@ -0,0 +1,90 @@
+"""Mergeable click, impression, CTR and position aggregates.
+
+CTR and average position are ratios, so averaging them across days,
+months, countries or domains gives wrong answers whenever the rows carry
+different numbers of impressions. Every aggregate here is instead kept as
+three sums that simply add up:
+
+- ``Clicks``
+- ``Impressions``
+- ``PositionWeight``: position x impressions
+
+These sums can be combined across rows, chunks of a file, months, domains
+or the whole portfolio in any order. CTR (clicks / impressions x 100) and
+the impression-weighted average position (position weight / impressions,
+the way Search Console averages position) are derived from them only at
+the end, with ``finalize``.
+
+Ungrouped totals are plain dicts; grouped aggregates are DataFrames
+indexed by the group keys, produced by a single ``groupby().sum()``.
+"""
+import numpy as np
+import pandas as pd
+
+SUM_COLUMNS = ('Clicks', 'Impressions', 'PositionWeight')
+
+
+def _sum_frame(df):
+    impressions = df['Impressions'].fillna(0).to_numpy(dtype=np.int64)
+    return pd.DataFrame({
+        'Clicks': df['Clicks'].fillna(0).to_numpy(dtype=np.int64),
+        'Impressions': impressions,
+        'PositionWeight': df['Position'].to_numpy(dtype=np.float64) * impressions,
+    }, index=df.index)
+
+
+def sums(df, by=None):
+    """Pre-summed aggregates of ``df`` (Clicks, Impressions and Position columns).
+
+    ``by`` is a column name, a list of column names or anything else
+    ``groupby`` accepts; without it the totals are returned as a dict.
+    """
+    frame = _sum_frame(df)
+    if by is None:
+        return {'Clicks': int(frame['Clicks'].sum()), 'Impressions': int(frame['Impressions'].sum()),
+                'PositionWeight': float(frame['PositionWeight'].sum())}
+    if isinstance(by, str):
+        by = df[by]
+    elif isinstance(by, list):
+        by = [df[column] if isinstance(column, str) else column for column in by]
+    return frame.groupby(by, observed=True, sort=True).sum()
+
+
+def merge(parts):
+    """Combine aggregates from ``sums`` (all dicts or all grouped frames); None entries are skipped."""
+    parts = [part for part in parts if part is not None]
+    if not parts:
+        return None
+    if isinstance(parts[0], dict):
+        return {column: sum(part[column] for part in parts) for column in SUM_COLUMNS}
+    combined = pd.concat(parts)
+    return combined.groupby(level=list(range(combined.index.nlevels)), observed=True, sort=True).sum()
+
+
+def finalize(aggregated):
+    """Derive CTR (%) and impression-weighted Position from summed aggregates.
+
+    Returns a dict for totals and a DataFrame (Clicks, Impressions, CTR,
+    Position) for grouped aggregates; both are NaN where there were no
+    impressions.
+    """
+    if aggregated is None:
+        return None
+    if isinstance(aggregated, dict):
+        impressions = aggregated['Impressions']
+        return {
+            'Clicks': aggregated['Clicks'],
+            'Impressions': impressions,
+            'CTR': aggregated['Clicks'] / impressions * 100 if impressions else np.nan,
+            'Position': aggregated['PositionWeight'] / impressions if impressions else np.nan,
+        }
+    impressions = aggregated['Impressions'].where(aggregated['Impressions'] > 0)
+    result = aggregated[['Clicks', 'Impressions']].copy()
+    result['CTR'] = aggregated['Clicks'] / impressions * 100
+    result['Position'] = aggregated['PositionWeight'] / impressions
+    return result
+
+
+def aggregate(df, by=None):
+    """``finalize(sums(df, by))``: clicks, impressions, CTR and weighted position in one pass."""
+    return finalize(sums(df, by))
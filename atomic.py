@@ -0,0 +1,48 @@
+"""Atomic file writes for the caches, indexes and reports.
+
+Every file another run may read at the same time (cache entries, persisted
+results, charts, the search index and the reports) is written to a
+temporary file next to its destination and moved into place with
+``os.replace``, so a crashed or parallel run never leaves a torn file.
+Files several processes update (the results manifest) are rewritten under
+``file_lock`` as read, merge, write.
+"""
+import contextlib
+import os
+
+
+@contextlib.contextmanager
+def atomic_write(path, mode='wb', encoding=None):
+    """Open a temporary file for writing and move it to ``path`` when the block completes.
+
+    The temporary file is removed instead if the block raises.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, mode, encoding=encoding) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """Hold an exclusive lock on ``path`` (created if missing) while the block runs.
+
+    Uses ``fcntl.flock``; where that is not available (Windows) the block
+    runs unlocked.
+    """
+    try:
+        import fcntl
+    except ImportError:  # not on POSIX
+        yield
+        return
+    with open(path, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
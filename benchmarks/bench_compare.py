@@ -0,0 +1,75 @@
+"""Time compare.diff_tables against a plain pandas outer merge on the label column.
+
+Both exports share most of their labels; a fraction is dropped from the
+older one (new in the newer) and another from the newer one (lost).
+
+Usage: python benchmarks/bench_compare.py [--rows 100000 500000] [--churn 0.1] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import compare  # noqa: E402
+
+LABEL = "Top queries"
+
+
+def make_export(labels, seed):
+    rng = np.random.default_rng(seed)
+    impressions = rng.integers(1, 3000, len(labels))
+    return pd.DataFrame({
+        LABEL: labels,
+        'Clicks': rng.integers(0, 300, len(labels)) % (impressions // 10 + 1),
+        'Impressions': impressions,
+        'Position': rng.uniform(1, 60, len(labels)).round(2),
+    })
+
+
+def make_pair(rows, churn, seed=0):
+    labels = np.array([f"query {i} example" for i in range(int(rows * (1 + churn)))], dtype=object)
+    dropped = int(rows * churn)
+    return make_export(labels[dropped:], seed), make_export(labels[:rows], seed + 1)
+
+
+def merge_diff(before, after):
+    """The straightforward version: outer merge on the label strings."""
+    merged = before.merge(after, on=LABEL, how='outer', suffixes=('_before', '_after'), indicator=True)
+    for metric in ('Clicks', 'Impressions'):
+        merged[f'{metric}_delta'] = merged[f'{metric}_after'].fillna(0) - merged[f'{metric}_before'].fillna(0)
+    merged['CTR_delta'] = (merged['Clicks_after'] / merged['Impressions_after']
+                           - merged['Clicks_before'] / merged['Impressions_before']) * 100
+    merged['Position_delta'] = merged['Position_after'] - merged['Position_before']
+    return merged
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 500_000])
+    parser.add_argument("--churn", type=float, default=0.1, help="Share of labels new and lost")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'merge ms':>9} {'compare ms':>11} {'speedup':>8} {'new':>7} {'lost':>7}")
+    for rows in args.rows:
+        before, after = make_pair(rows, args.churn)
+        diff = compare.diff_tables(before, after, LABEL)
+        reference = merge_diff(before, after).set_index(LABEL).loc[diff[LABEL]]
+        np.testing.assert_array_equal(diff['clicks_delta'], reference['Clicks_delta'])
+        np.testing.assert_allclose(diff['position_delta'], reference['Position_delta'], atol=1e-9)
+        np.testing.assert_allclose(diff['ctr_delta'], reference['CTR_delta'], atol=1e-9)
+        summary = compare.summarize(diff)
+
+        merge = min(timeit.repeat(lambda: merge_diff(before, after), number=1, repeat=args.repeat))
+        new = min(timeit.repeat(lambda: compare.diff_tables(before, after, LABEL), number=1, repeat=args.repeat))
+        print(f"{rows:>8} {merge * 1000:>9.1f} {new * 1000:>11.1f} {merge / new:>7.1f}x "
+              f"{summary['new']:>7} {summary['lost']:>7}")
+
+
+if __name__ == "__main__":
+    main()
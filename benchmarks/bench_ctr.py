@@ -0,0 +1,53 @@
+"""Compare CTR cleanup: chained str.replace vs normalize.parse_numbers.
+
+Usage: python benchmarks/bench_ctr.py [--rows 50000 200000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import normalize  # noqa: E402
+
+
+def legacy_clean(series):
+    """The per-frame cleanup analyze_domain used to run on every CTR column."""
+    return series.astype(str).str.replace('%', '').str.replace(',', '.').astype(float)
+
+
+def make_ctr_column(rows, decimal_comma=False, seed=0):
+    rng = np.random.default_rng(seed)
+    clicks = rng.integers(0, 50, rows)
+    impressions = rng.integers(1, 2000, rows)
+    ctr = [f"{c / i * 100:.2f}%" for c, i in zip(clicks, impressions)]
+    if decimal_comma:
+        ctr = [value.replace('.', ',') for value in ctr]
+    return pd.Series(ctr, dtype=object)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[50_000, 200_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'format':>8} {'legacy ms':>10} {'normalize ms':>13} {'speedup':>8}")
+    for rows in args.rows:
+        for decimal_comma in (False, True):
+            series = make_ctr_column(rows, decimal_comma)
+            expected = legacy_clean(series).to_numpy()
+            np.testing.assert_allclose(normalize.parse_numbers(series), expected)
+
+            legacy = min(timeit.repeat(lambda: legacy_clean(series), number=1, repeat=args.repeat))
+            new = min(timeit.repeat(lambda: normalize.parse_numbers(series), number=1, repeat=args.repeat))
+            label = "1,23%" if decimal_comma else "1.23%"
+            print(f"{rows:>8} {label:>8} {legacy * 1000:>10.1f} {new * 1000:>13.1f} {legacy / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
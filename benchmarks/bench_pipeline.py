@@ -0,0 +1,153 @@
+"""Time each stage of the pipeline on synthetic exports and track results over time.
+
+Stages: ``load`` (read_csv of every export), ``ctr_cleanup`` (metric
+normalization and downcasting of the loaded frames), ``analysis``
+(analyze_domain per domain), ``aggregation`` (summary frame and
+statistics) and ``html`` (writing the report). The export cache is
+disabled so every run parses from scratch.
+
+Each run is appended to a JSON-lines history file. A stage is flagged as a
+regression when it is slower than ``--threshold`` times the median of the
+last ``--baseline-runs`` runs recorded with the same configuration.
+
+Usage: python benchmarks/bench_pipeline.py [--domains 50] [--queries 5000] [--pages 500]
+                                           [--days 480] [--locale de] [--fail-on-regression]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import cache  # noqa: E402
+import schema  # noqa: E402
+from loader import EXPORT_FILES  # noqa: E402
+from main import analyze_domain  # noqa: E402
+from report import write_html_report  # noqa: E402
+from stats import describe_metrics  # noqa: E402
+from synthetic import LOCALES, generate_tree  # noqa: E402
+
+STAGES = ("load", "ctr_cleanup", "analysis", "aggregation", "html")
+DEFAULT_HISTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "history.jsonl")
+
+
+def run_stages(folders, out_dir):
+    """Run every stage once and return a dict of stage -> seconds."""
+    timings = {}
+
+    start = time.perf_counter()
+    raw = [pd.read_csv(os.path.join(folder, filename), **schema.read_csv_kwargs(filename))
+           for folder in folders for filename in EXPORT_FILES]
+    timings["load"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for df in raw:
+        schema.apply_metric_dtypes(df)
+    timings["ctr_cleanup"] = time.perf_counter() - start
+    del raw
+
+    start = time.perf_counter()
+    summaries, details = [], {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for folder in folders:
+            summary, domain_details = analyze_domain(folder)
+            summaries.append(summary)
+            details[os.path.basename(folder)] = domain_details
+    timings["analysis"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    metric_stats = describe_metrics(pd.DataFrame(summaries))
+    timings["aggregation"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    write_html_report(os.path.join(out_dir, "report.html"), summaries, details, metric_stats)
+    timings["html"] = time.perf_counter() - start
+    return timings
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def find_regressions(history, config, timings, threshold, baseline_runs):
+    """Return {stage: (seconds, baseline)} for stages slower than threshold x baseline."""
+    previous = [run for run in history if run["config"] == config][-baseline_runs:]
+    if not previous:
+        return {}
+    regressions = {}
+    for stage, seconds in timings.items():
+        baseline = statistics.median(run["stages"][stage] for run in previous)
+        if baseline > 0 and seconds > baseline * threshold:
+            regressions[stage] = (seconds, baseline)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--domains", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--days", type=int, default=480)
+    parser.add_argument("--locale", choices=LOCALES, default="de")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage; the fastest is recorded")
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help="JSON-lines file results are appended to")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    parser.add_argument("--baseline-runs", type=int, default=5)
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    config = {"domains": args.domains, "queries": args.queries, "pages": args.pages,
+              "days": args.days, "locale": args.locale}
+    cache.configure(enabled=False)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        data_dir = os.path.join(work_dir, "data")
+        print(f"Generating {args.domains} synthetic domains ...")
+        folders = generate_tree(data_dir, domains=args.domains, days=args.days, queries=args.queries,
+                                pages=args.pages, locale=args.locale)
+        runs = [run_stages(folders, work_dir) for _ in range(args.repeat)]
+    timings = {stage: min(run[stage] for run in runs) for stage in STAGES}
+
+    history = load_history(args.history)
+    regressions = find_regressions(history, config, timings, args.threshold, args.baseline_runs)
+
+    print(f"\n{'stage':<12} {'seconds':>9}")
+    for stage in STAGES:
+        flag = ""
+        if stage in regressions:
+            flag = f"  REGRESSION (baseline {regressions[stage][1]:.3f}s)"
+        print(f"{stage:<12} {timings[stage]:>9.3f}{flag}")
+
+    with open(args.history, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"timestamp": datetime.now().isoformat(timespec="seconds"), "commit": git_commit(),
+                            "config": config, "stages": timings}) + "\n")
+    print(f"\nResults appended to {args.history}")
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
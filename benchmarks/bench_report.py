@@ -0,0 +1,89 @@
+"""Time and peak memory of HTML report generation for 10, 100 and 1000 domains.
+
+Times are measured with tracemalloc active, which slows allocation-heavy
+code down, so compare them with each other rather than with real runs.
+The split report (``--split``) is timed for a first write of every page and
+for a rerun in which no domain changed, with the size of its index page.
+
+Usage: python benchmarks/bench_report.py [--domains 10 100 1000] [--workers 1]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from report import generate_html_report, write_html_report, write_split_report  # noqa: E402
+
+
+def make_report_input(domains, seed=0):
+    """Build summaries and report details shaped like analyze_domain's output."""
+    rng = np.random.default_rng(seed)
+    summaries, details = [], {}
+    for i in range(domains):
+        name = f"client{i:04d}.example-Performance-on-Search-2025-03-02"
+        clicks = int(rng.integers(100, 100_000))
+        impressions = clicks * int(rng.integers(10, 50))
+        summaries.append({'domain': name, 'total_clicks': clicks, 'total_impressions': impressions,
+                          'avg_ctr': clicks / impressions * 100, 'avg_position': float(rng.uniform(1, 50))})
+
+        devices = pd.DataFrame({'Device': ["Mobile", "Desktop", "Tablet"],
+                                'Clicks': rng.integers(0, clicks, 3)})
+        devices['Click %'] = devices['Clicks'] / devices['Clicks'].sum() * 100
+        top = pd.DataFrame({'Clicks': np.sort(rng.integers(0, 1000, 10))[::-1],
+                            'Impressions': rng.integers(1000, 10_000, 10),
+                            'CTR': rng.uniform(0, 20, 10), 'Position': rng.uniform(1, 30, 10)})
+        details[name] = {
+            'devices': devices,
+            'queries': pd.concat([pd.DataFrame({'Top queries': [f"query {j}" for j in range(10)]}), top], axis=1),
+            'pages': pd.concat([pd.DataFrame({'Top pages': [f"https://{name}/page-{j}/" for j in range(10)]}), top],
+                               axis=1),
+        }
+    return summaries, details
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--domains", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--workers", type=int, default=1, help="Processes writing split report pages")
+    args = parser.parse_args()
+
+    print(f"{'domains':>8} {'size MB':>8} {'stream s':>9} {'stream peak MB':>15} {'string s':>9} {'string peak MB':>15} "
+          f"{'split s':>8} {'rerun s':>8} {'index KB':>9}")
+    with tempfile.TemporaryDirectory() as out_dir:
+        path = os.path.join(out_dir, "report.html")
+        for domains in args.domains:
+            summaries, details = make_report_input(domains)
+            stream_s, stream_mb = measure(lambda: write_html_report(path, summaries, details))
+            string_s, string_mb = measure(lambda: generate_html_report(summaries, details))
+            size_mb = os.path.getsize(path) / 1024 / 1024
+
+            split_dir = os.path.join(out_dir, f"split-{domains}")
+            page_keys = {name: "unchanged" for name in details}
+            split_s, _ = measure(lambda: write_split_report(split_dir, summaries, details, page_keys=page_keys,
+                                                            workers=args.workers))
+            rerun_s, _ = measure(lambda: write_split_report(split_dir, summaries, details, page_keys=page_keys,
+                                                            workers=args.workers))
+            index_kb = os.path.getsize(os.path.join(split_dir, "index.html")) / 1024
+            print(f"{domains:>8} {size_mb:>8.1f} {stream_s:>9.2f} {stream_mb:>15.1f} {string_s:>9.2f} {string_mb:>15.1f} "
+                  f"{split_s:>8.2f} {rerun_s:>8.2f} {index_kb:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
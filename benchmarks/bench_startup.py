@@ -0,0 +1,76 @@
+"""Measure CLI startup time and check that heavy modules are not imported eagerly.
+
+Runs ``python -X importtime main.py --help`` in fresh subprocesses and
+reports the fastest wall-clock time, the total import time and the slowest
+top-level imports. Fails when one of ``--forbid`` is imported or when the
+startup takes longer than ``--max-ms``.
+
+Usage: python benchmarks/bench_startup.py [--repeat 5] [--max-ms 250] [--top 10]
+                                          [--forbid matplotlib pandas numpy pyarrow]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+MAIN = os.path.join(ROOT, "main.py")
+HEAVY_MODULES = ("matplotlib", "pandas", "numpy", "pyarrow")
+
+
+def parse_importtime(stderr):
+    """Return [(module, self_us, cumulative_us, depth)] from ``-X importtime`` output."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # Names follow one space and are indented by two more per nesting level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return imports
+
+
+def run_once(args):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", MAIN] + args, cwd=ROOT,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    return time.perf_counter() - start, parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Runs; the fastest is reported")
+    parser.add_argument("--max-ms", type=float, default=250, help="Fail when startup takes longer than this")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest top-level imports to list")
+    parser.add_argument("--forbid", nargs="*", default=list(HEAVY_MODULES),
+                        help="Top-level packages that must not be imported by --help")
+    args = parser.parse_args()
+
+    runs = [run_once(["--help"]) for _ in range(args.repeat)]
+    seconds, imports = min(runs, key=lambda run: run[0])
+
+    top_level = [imp for imp in imports if imp[3] == 0]
+    total_us = sum(cumulative for _, _, cumulative, _ in top_level)
+    print(f"main.py --help: {seconds * 1000:.1f} ms wall, {total_us / 1000:.1f} ms importing "
+          f"({len(imports)} modules, fastest of {args.repeat})")
+    print(f"\n{'module':<40} {'cumulative ms':>14}")
+    for name, _, cumulative, _ in sorted(top_level, key=lambda imp: -imp[2])[:args.top]:
+        print(f"{name:<40} {cumulative / 1000:>14.1f}")
+
+    failed = False
+    loaded = {name.split(".")[0] for name, _, _, _ in imports}
+    eager = sorted(loaded.intersection(args.forbid))
+    if eager:
+        print(f"\nFAIL: imported at startup: {', '.join(eager)}")
+        failed = True
+    if seconds * 1000 > args.max_ms:
+        print(f"\nFAIL: startup took {seconds * 1000:.1f} ms (limit {args.max_ms:.0f} ms)")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Peak memory of loading Queries.csv in full vs streaming it in chunks.
+
+Each measurement runs in a fresh subprocess so peak RSS is not shared.
+The streamed top rows and totals are checked against the full load.
+
+Usage: python benchmarks/bench_streaming.py [--rows 200000 1000000]
+"""
+import argparse
+import json
+import math
+import os
+import pickle
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+
+def write_queries(path, rows, seed=0):
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("Top queries,Clicks,Impressions,CTR,Position\n")
+        for i in range(rows):
+            impressions = rng.randint(1, 5000)
+            clicks = rng.randint(0, impressions // 20)
+            f.write(f"query number {i} {rng.random():.6f},{clicks},{impressions},"
+                    f"{clicks / impressions * 100:.2f}%,{rng.uniform(1, 80):.1f}\n")
+
+
+def child(mode, folder, out_path):
+    """Load Queries.csv in ``mode`` and dump the result for comparison."""
+    import cache
+    import loader
+    import streaming
+
+    cache.configure(enabled=False)
+    streaming.configure(threshold_mb=0 if mode == "stream" else float("inf"))
+    start = time.perf_counter()
+    rows, totals = loader.load_ranked_data(folder, "Queries.csv")
+    elapsed = time.perf_counter() - start
+    with open(out_path, "wb") as f:
+        pickle.dump((rows.head(10), totals), f)
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"seconds": elapsed, "peak_mb": peak_kb / 1024}))
+
+
+def run_child(mode, folder, out_path):
+    output = subprocess.check_output([sys.executable, __file__, "--child", mode, folder, out_path])
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[200_000, 1_000_000])
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    print(f"{'rows':>9} {'file MB':>8} {'full MB':>8} {'stream MB':>10} {'full s':>7} {'stream s':>9} identical")
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as folder:
+            write_queries(os.path.join(folder, "Queries.csv"), rows)
+            file_mb = os.path.getsize(os.path.join(folder, "Queries.csv")) / 1024 / 1024
+            results = {}
+            for mode in ("full", "stream"):
+                out_path = os.path.join(folder, f"{mode}.pkl")
+                results[mode] = run_child(mode, folder, out_path)
+                with open(out_path, "rb") as f:
+                    results[mode]["tables"] = pickle.load(f)
+
+            full_top, full_totals = results["full"]["tables"]
+            stream_top, stream_totals = results["stream"]["tables"]
+            # Position weights are float sums, so chunking may change the last bits
+            identical = full_top.equals(stream_top) and full_totals.keys() == stream_totals.keys() and all(
+                math.isclose(full_totals[key], stream_totals[key]) for key in full_totals)
+            print(f"{rows:>9} {file_mb:>8.1f} {results['full']['peak_mb']:>8.1f} "
+                  f"{results['stream']['peak_mb']:>10.1f} {results['full']['seconds']:>7.2f} "
+                  f"{results['stream']['seconds']:>9.2f} {identical}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Measure how per-domain analysis scales with --workers on a synthetic tree.
+
+The export cache is turned off, so every worker count parses the CSV files
+itself instead of reading what the previous one cached.
+
+Usage: python benchmarks/bench_workers.py [--domains 500] [--workers 1 2 4 8]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import cache  # noqa: E402
+from main import analyze_domains  # noqa: E402
+from synthetic import generate_tree  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--domains", type=int, default=500)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    cache.configure(enabled=False)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        print(f"Generating {args.domains} synthetic domains in {data_dir} ({os.cpu_count()} CPUs) ...")
+        folders = generate_tree(data_dir, domains=args.domains)
+
+        baseline = None
+        print(f"\n{'workers':>8} {'seconds':>10} {'speedup':>8}")
+        for workers in args.workers:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                results = list(analyze_domains(folders, workers=workers))
+            elapsed = time.perf_counter() - start
+            failed = sum(1 for *_, error in results if error is not None)
+            baseline = baseline or elapsed
+            print(f"{workers:>8} {elapsed:>10.2f} {baseline / elapsed:>7.2f}x"
+                  + (f"  ({failed} failed)" if failed else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Generate synthetic Google Search Console export folders for benchmarking.
+
+The folders follow the naming and CSV layouts ``load_csv_data`` expects
+(``<domain>-Performance-on-Search-YYYY-MM-DD/Countries.csv`` and so on), with
+numbers formatted like the Search Console UI writes them for the chosen
+locale: ``3.45%`` and ``12.5`` for English; ``3,45 %``, ``12,5`` and
+thousands separators in clicks and impressions (``1.234``) for German.
+
+Usage: python benchmarks/synthetic.py OUT_DIR [--domains 50] [--queries 500] [--pages 100]
+                                      [--days 90] [--end 2025-03-02] [--locale de]
+"""
+import argparse
+import os
+import random
+from datetime import date, timedelta
+
+COUNTRIES = ["Germany", "Austria", "Switzerland", "United States", "United Kingdom",
+             "France", "Italy", "Netherlands", "Poland", "Spain", "Slovenia", "Croatia"]
+DEVICES = ["Mobile", "Desktop", "Tablet"]
+SEARCH_APPEARANCES = ["Videos", "Product snippets", "Review snippet", "FAQ rich results"]
+WORDS = ["glas", "reinigung", "fenster", "service", "preis", "angebot", "wien", "berlin",
+         "shop", "kaufen", "beste", "test", "online", "hilfe", "kontakt", "blog",
+         "anleitung", "vergleich", "günstig", "profi"]
+LOCALES = ("en", "de")
+
+
+def _ctr(clicks, impressions, locale="en"):
+    """Format a CTR the way Search Console exports it, e.g. '3.45%' or '3,45 %'."""
+    if impressions == 0:
+        return "0%" if locale == "en" else "0 %"
+    value = f"{clicks / impressions * 100:.2f}"
+    return f"{value}%" if locale == "en" else f"{value.replace('.', ',')} %"
+
+
+def _count(value, locale="en"):
+    """Format clicks or impressions, e.g. '1234' or '1.234'."""
+    return str(value) if locale == "en" else f"{value:,}".replace(",", ".")
+
+
+def _decimal(value, locale="en"):
+    """Format a position, e.g. '12.5' or '12,5'."""
+    return str(value) if locale == "en" else str(value).replace(".", ",")
+
+
+def _metric_rows(rng, labels, scale, locale):
+    rows = []
+    for label in labels:
+        impressions = rng.randint(1, scale)
+        clicks = rng.randint(0, max(1, impressions // 10))
+        position = round(rng.uniform(1, 60), 2)
+        rows.append((label, _count(clicks, locale), _count(impressions, locale), _ctr(clicks, impressions, locale),
+                     _decimal(position, locale)))
+    return rows
+
+
+def _write_csv(path, header, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(",".join(header) + "\n")
+        for row in rows:
+            f.write(",".join(f'"{v}"' if isinstance(v, str) and "," in v else str(v) for v in row) + "\n")
+
+
+def write_domain(folder, rng, days=90, queries=500, pages=100, end=date(2025, 3, 2), locale="en"):
+    """Write one export folder with all seven CSV files."""
+    os.makedirs(folder, exist_ok=True)
+
+    dates = [(end - timedelta(days=i)).isoformat() for i in range(days)]
+    _write_csv(os.path.join(folder, "Dates.csv"), ["Date", "Clicks", "Impressions", "CTR", "Position"],
+               _metric_rows(rng, dates, 2000, locale))
+    _write_csv(os.path.join(folder, "Countries.csv"), ["Country", "Clicks", "Impressions", "CTR", "Position"],
+               _metric_rows(rng, COUNTRIES, 20000, locale))
+    _write_csv(os.path.join(folder, "Devices.csv"), ["Device", "Clicks", "Impressions", "CTR", "Position"],
+               _metric_rows(rng, DEVICES, 50000, locale))
+    _write_csv(os.path.join(folder, "Search appearance.csv"),
+               ["Search Appearance", "Clicks", "Impressions", "CTR", "Position"],
+               _metric_rows(rng, SEARCH_APPEARANCES, 500, locale))
+    _write_csv(os.path.join(folder, "Filters.csv"), ["Filter", "Value"],
+               [("Search type", "Web"), ("Date", f"Last {days} days")])
+
+    domain = os.path.basename(folder).split("-Performance-on-Search-")[0]
+    page_labels = [f"https://{domain}/{'/'.join(rng.sample(WORDS, 2))}-{i}/" for i in range(pages)]
+    _write_csv(os.path.join(folder, "Pages.csv"), ["Top pages", "Clicks", "Impressions", "CTR", "Position"],
+               _metric_rows(rng, page_labels, 5000, locale))
+    query_labels = [" ".join(rng.sample(WORDS, rng.randint(1, 4))) + f" {i}" for i in range(queries)]
+    _write_csv(os.path.join(folder, "Queries.csv"), ["Top queries", "Clicks", "Impressions", "CTR", "Position"],
+               _metric_rows(rng, query_labels, 3000, locale))
+
+
+def generate_tree(data_dir, domains=500, seed=0, end=date(2025, 3, 2), **kwargs):
+    """Write ``domains`` export folders under ``data_dir`` and return their paths.
+
+    Extra keyword arguments (``days``, ``queries``, ``pages``, ``locale``) are
+    passed to ``write_domain``.
+    """
+    rng = random.Random(seed)
+    folders = []
+    for i in range(domains):
+        folder = os.path.join(data_dir, f"client{i:04d}.example-Performance-on-Search-{end.isoformat()}")
+        write_domain(folder, rng, end=end, **kwargs)
+        folders.append(folder)
+    return folders
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("out_dir")
+    parser.add_argument("--domains", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=500, help="Rows in each Queries.csv")
+    parser.add_argument("--pages", type=int, default=100, help="Rows in each Pages.csv")
+    parser.add_argument("--days", type=int, default=90, help="Rows in each Dates.csv, ending at --end")
+    parser.add_argument("--end", type=date.fromisoformat, default=date(2025, 3, 2), help="Export date")
+    parser.add_argument("--locale", choices=LOCALES, default="en", help="Number format of clicks, impressions, CTR and position")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    folders = generate_tree(args.out_dir, domains=args.domains, seed=args.seed, end=args.end,
+                            days=args.days, queries=args.queries, pages=args.pages, locale=args.locale)
+    print(f"Wrote {len(folders)} export folders to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""On-disk cache of parsed Search Console CSV exports.
+
+Each cleaned DataFrame is stored in a columnar binary file keyed by a
+fingerprint of the source CSV (absolute path, size and modification time),
+so later runs can load it without parsing the CSV again. Feather files are
+written uncompressed and read through a memory map when pyarrow is
+installed; otherwise the cache falls back to pickle files.
+"""
+import functools
+import hashlib
+import os
+import pickle
+
+from atomic import atomic_write
+
+# Bump when the cleaning applied before caching changes, so stale entries are ignored
+CACHE_VERSION = 4
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "exports")
+DEFAULT_MAX_MB = 512
+
+_settings = {
+    'enabled': True,
+    'rebuild': False,
+    'cache_dir': DEFAULT_CACHE_DIR,
+    'max_mb': DEFAULT_MAX_MB,
+}
+
+
+def configure(enabled=True, rebuild=False, cache_dir=DEFAULT_CACHE_DIR, max_mb=DEFAULT_MAX_MB):
+    """Set the cache options for this process."""
+    _settings.update(enabled=enabled, rebuild=rebuild, cache_dir=cache_dir, max_mb=max_mb)
+
+
+def settings():
+    """Return a copy of the current cache options (e.g. to configure worker processes)."""
+    return dict(_settings)
+
+
+@functools.lru_cache(maxsize=None)
+def feather_module():
+    """Return ``pyarrow.feather``, or None without pyarrow; imported on first use as it is slow to load."""
+    try:
+        import pyarrow.feather as feather
+    except ImportError:  # pyarrow is optional
+        return None
+    return feather
+
+
+def _extension():
+    return '.feather' if feather_module() is not None else '.pkl'
+
+
+def fingerprint(file_path):
+    """Return a cache key for ``file_path`` based on its path, size and mtime."""
+    stat = os.stat(file_path)
+    raw = f"{CACHE_VERSION}|{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def _entry_path(key):
+    return os.path.join(_settings['cache_dir'], key + _extension())
+
+
+def _read_entry(path):
+    feather = feather_module()
+    if feather is not None:
+        return feather.read_table(path, memory_map=True).to_pandas()
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def _write_entry(path, df):
+    feather = feather_module()
+    with atomic_write(path) as f:
+        if feather is not None:
+            feather.write_feather(df.reset_index(drop=True), f, compression='uncompressed')
+        else:
+            pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def cached_read(file_path, parse):
+    """Return ``parse(file_path)``, served from the cache when the file is unchanged."""
+    if not _settings['enabled']:
+        return parse(file_path)
+
+    key = fingerprint(file_path)
+    path = _entry_path(key)
+
+    if not _settings['rebuild'] and os.path.exists(path):
+        try:
+            df = _read_entry(path)
+            os.utime(path)  # mark as recently used for eviction
+            return df
+        except Exception as e:
+            print(f"Ignoring unreadable cache entry for {file_path}: {e}")
+
+    df = parse(file_path)
+    try:
+        os.makedirs(_settings['cache_dir'], exist_ok=True)
+        _write_entry(path, df)
+    except Exception as e:
+        print(f"Could not cache {file_path}: {e}")
+    return df
+
+
+def evict(max_mb=None):
+    """Delete least recently used entries until the cache fits in ``max_mb`` megabytes.
+
+    Returns the number of entries removed.
+    """
+    cache_dir = _settings['cache_dir']
+    max_bytes = (max_mb if max_mb is not None else _settings['max_mb']) * 1024 * 1024
+    if not os.path.isdir(cache_dir):
+        return 0
+
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.is_file():
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
@@ -0,0 +1,206 @@
+"""Per-domain clicks and impressions charts for the report.
+
+Charts are rendered from the daily series kept in each domain's report
+fragment, with matplotlib's non-interactive Agg backend, in a process pool
+when more than one worker is requested. Each image is cached under a hash
+of the series it was drawn from, both as PNG and as base64 text, so
+unchanged domains reuse their chart without rendering or re-encoding it.
+
+The report either embeds the cached base64 text as a data URI or links to
+a copy of the PNG placed next to the report. Copies the report no longer
+links to are deleted, and the cache is kept within a size limit by evicting
+the least recently used charts.
+"""
+import base64
+import hashlib
+import os
+import shutil
+
+from atomic import atomic_write
+
+# Bump when the chart layout changes, so cached images are redrawn
+CHART_VERSION = 1
+
+DEFAULT_CHARTS_DIR = os.path.join(".cache", "charts")
+DEFAULT_MAX_MB = 64
+CHART_MODES = ('embed', 'link', 'off')
+
+# Figure size in inches and resolution of the rendered PNG
+FIGSIZE = (8, 3)
+DPI = 100
+
+
+def series_key(daily):
+    """Return a hash of the dates, clicks and impressions in ``daily``."""
+    import numpy as np
+
+    digest = hashlib.sha1(f"{CHART_VERSION}|{FIGSIZE}|{DPI}".encode('utf-8'))
+    for column in ('Date', 'Clicks', 'Impressions'):
+        values = np.ascontiguousarray(daily[column].to_numpy())
+        digest.update(values.dtype.str.encode('utf-8'))
+        digest.update(values.tobytes())
+    return digest.hexdigest()
+
+
+def render_chart(dates, clicks, impressions):
+    """Draw clicks and impressions over time; returns the PNG bytes."""
+    import matplotlib
+    matplotlib.use('Agg')
+    from io import BytesIO
+    from matplotlib.figure import Figure
+
+    # Figure objects are not tracked by pyplot, so nothing needs closing
+    fig = Figure(figsize=FIGSIZE, dpi=DPI)
+    ax = fig.add_subplot()
+    ax.plot(dates, clicks, color='#2563eb', linewidth=1.2, label='Clicks')
+    ax.set_ylabel('Clicks', color='#2563eb')
+    ax2 = ax.twinx()
+    ax2.plot(dates, impressions, color='#16a34a', linewidth=1.2, label='Impressions')
+    ax2.set_ylabel('Impressions', color='#16a34a')
+    ax.grid(True, alpha=0.3)
+    fig.autofmt_xdate()
+    fig.tight_layout()
+
+    buffer = BytesIO()
+    fig.savefig(buffer, format='png')
+    return buffer.getvalue()
+
+
+def _render_to_cache(job):
+    """Render one chart into ``charts_dir`` as ``<key>.png`` and ``<key>.b64``."""
+    key, charts_dir, dates, clicks, impressions = job
+    png = render_chart(dates, clicks, impressions)
+    with atomic_write(os.path.join(charts_dir, key + '.png')) as f:
+        f.write(png)
+    with atomic_write(os.path.join(charts_dir, key + '.b64')) as f:
+        f.write(base64.b64encode(png))
+    return key
+
+
+def render_charts(domain_details, charts_dir=DEFAULT_CHARTS_DIR, workers=1):
+    """Make sure a cached chart exists for every domain with a daily series.
+
+    Returns a dict mapping domain name to its chart key; only charts missing
+    from ``charts_dir`` are rendered.
+    """
+    os.makedirs(charts_dir, exist_ok=True)
+    keys, jobs = {}, {}
+    for domain_name, details in domain_details.items():
+        daily = details.get('daily')
+        if daily is None or daily.empty:
+            continue
+        key = series_key(daily)
+        keys[domain_name] = key
+        if key in jobs:
+            continue
+        try:
+            # Mark as recently used for eviction
+            for extension in ('.png', '.b64'):
+                os.utime(os.path.join(charts_dir, key + extension))
+        except FileNotFoundError:
+            jobs[key] = (key, charts_dir, daily['Date'].to_numpy(), daily['Clicks'].to_numpy(),
+                         daily['Impressions'].to_numpy())
+
+    if jobs:
+        print(f"Rendering {len(jobs)} charts ({len(keys) - len(jobs)} cached)")
+        if workers > 1 and len(jobs) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(_render_to_cache, jobs.values(), chunksize=8))
+        else:
+            for job in jobs.values():
+                _render_to_cache(job)
+    return keys
+
+
+def chart_sources(chart_keys, mode='embed', charts_dir=DEFAULT_CHARTS_DIR, report_dir='.'):
+    """Return a dict mapping domain name to an ``<img src>`` value.
+
+    ``embed`` reads the cached base64 text into a data URI; ``link`` copies
+    the PNG to ``<report_dir>/charts/`` (once per key), deletes the copies
+    of other charts there and returns a path relative to the report.
+    """
+    sources = {}
+    if mode == 'off':
+        return sources
+    if mode == 'link':
+        os.makedirs(os.path.join(report_dir, 'charts'), exist_ok=True)
+
+    for domain_name, key in chart_keys.items():
+        if mode == 'embed':
+            with open(os.path.join(charts_dir, key + '.b64'), encoding='ascii') as f:
+                sources[domain_name] = 'data:image/png;base64,' + f.read()
+        else:
+            target = os.path.join(report_dir, 'charts', key + '.png')
+            if not os.path.exists(target):
+                shutil.copyfile(os.path.join(charts_dir, key + '.png'), target)
+            sources[domain_name] = f"charts/{key}.png"
+    if mode == 'link':
+        prune_linked(report_dir, chart_keys.values())
+    return sources
+
+
+def prune_linked(report_dir, keys=()):
+    """Delete the PNG copies in ``<report_dir>/charts/`` of charts other than ``keys``.
+
+    Returns the number of files removed; the directory itself is removed
+    once it is empty.
+    """
+    linked_dir = os.path.join(report_dir, 'charts')
+    if not os.path.isdir(linked_dir):
+        return 0
+    keep = {key + '.png' for key in keys}
+    removed = 0
+    for entry in os.scandir(linked_dir):
+        if entry.is_file() and entry.name not in keep:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                continue
+            removed += 1
+    if not keep:
+        try:
+            os.rmdir(linked_dir)
+        except OSError:
+            pass
+    return removed
+
+
+def evict(charts_dir=DEFAULT_CHARTS_DIR, max_mb=DEFAULT_MAX_MB, keep=()):
+    """Delete least recently used charts until ``charts_dir`` fits in ``max_mb`` megabytes.
+
+    Charts whose key is in ``keep`` (those of the current report) are never
+    removed. Returns the number of charts removed.
+    """
+    if not os.path.isdir(charts_dir):
+        return 0
+    keep = set(keep)
+    max_bytes = max_mb * 1024 * 1024
+
+    # A chart is its PNG and base64 files (plus any leftover temporary file), removed together
+    total = 0
+    entries = {}
+    for entry in os.scandir(charts_dir):
+        if not entry.is_file():
+            continue
+        stat = entry.stat()
+        total += stat.st_size
+        key = entry.name.split('.', 1)[0]
+        if key in keep:
+            continue
+        mtime, size, paths = entries.get(key, (0, 0, []))
+        entries[key] = (max(mtime, stat.st_mtime), size + stat.st_size, paths + [entry.path])
+
+    removed = 0
+    for _, size, paths in sorted(entries.values()):
+        if total <= max_bytes:
+            break
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+        total -= size
+        removed += 1
+    return removed
@@ -0,0 +1,147 @@
+"""Period-over-period comparison of successive exports of the same domain.
+
+Two exports of one domain are joined on ``Top queries`` / ``Top pages``
+without a string merge: the labels of both tables are factorized together
+once (a single hash pass), which gives every distinct label an integer
+code shared by both exports. Metrics are then summed per code with
+``np.bincount`` into dense arrays indexed by code, so the join, the
+deltas and the new/lost flags are plain array arithmetic. CTR and position
+are derived from summed clicks, impressions and position x impressions,
+as in ``aggregate``.
+
+``compare_portfolio`` pairs the exports of every domain found by
+``discovery`` (by default the latest export against the one before it)
+and returns one summary row per pair.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+import discovery
+from loader import load_csv_data
+
+# Comparable exports: name -> (file, label column)
+TABLES = {
+    'queries': ("Queries.csv", "Top queries"),
+    'pages': ("Pages.csv", "Top pages"),
+}
+STATUSES = ('kept', 'new', 'lost')
+
+
+def _sums(codes, df, size):
+    """Clicks, impressions and position weights per code."""
+    impressions = df['Impressions'].fillna(0).to_numpy(dtype=np.float64)
+    return (np.bincount(codes, weights=df['Clicks'].fillna(0).to_numpy(dtype=np.float64), minlength=size),
+            np.bincount(codes, weights=impressions, minlength=size),
+            np.bincount(codes, weights=np.nan_to_num(df['Position'].to_numpy(dtype=np.float64) * impressions),
+                        minlength=size),
+            np.bincount(codes, minlength=size) > 0)
+
+
+def diff_tables(before, after, label_column):
+    """Join two exports on ``label_column``; returns one row per label seen in either.
+
+    Columns: the label, clicks/impressions/CTR/position before and after,
+    their deltas (CTR in percentage points, position in ranks, negative is
+    better) and ``status``: ``new`` (only after), ``lost`` (only before) or
+    ``kept``.
+    """
+    labels = np.concatenate([before[label_column].astype(str).to_numpy(dtype=object),
+                             after[label_column].astype(str).to_numpy(dtype=object)])
+    codes, uniques = pd.factorize(labels)
+    size = len(uniques)
+    clicks_b, impressions_b, weights_b, in_before = _sums(codes[:len(before)], before, size)
+    clicks_a, impressions_a, weights_a, in_after = _sums(codes[len(before):], after, size)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ctr_b = np.where(impressions_b > 0, clicks_b / impressions_b * 100, np.nan)
+        ctr_a = np.where(impressions_a > 0, clicks_a / impressions_a * 100, np.nan)
+        position_b = np.where(impressions_b > 0, weights_b / impressions_b, np.nan)
+        position_a = np.where(impressions_a > 0, weights_a / impressions_a, np.nan)
+
+    status = np.where(in_before & in_after, 0, np.where(in_after, 1, 2)).astype(np.int8)
+    return pd.DataFrame({
+        label_column: uniques,
+        'status': pd.Categorical.from_codes(status, categories=STATUSES),
+        'clicks_before': clicks_b.astype(np.int64),
+        'clicks_after': clicks_a.astype(np.int64),
+        'clicks_delta': (clicks_a - clicks_b).astype(np.int64),
+        'impressions_before': impressions_b.astype(np.int64),
+        'impressions_after': impressions_a.astype(np.int64),
+        'impressions_delta': (impressions_a - impressions_b).astype(np.int64),
+        'ctr_before': ctr_b,
+        'ctr_after': ctr_a,
+        'ctr_delta': ctr_a - ctr_b,
+        'position_before': position_b,
+        'position_after': position_a,
+        'position_delta': position_a - position_b,
+    })
+
+
+def compare_exports(before_folder, after_folder, tables=TABLES):
+    """Diff the Queries.csv and Pages.csv of two export folders; returns a dict of table name -> diff."""
+    diffs = {}
+    for table, (filename, label_column) in tables.items():
+        before = load_csv_data(before_folder, filename)
+        after = load_csv_data(after_folder, filename)
+        if before is None or after is None:
+            continue
+        diffs[table] = diff_tables(before, after, label_column)
+    return diffs
+
+
+def summarize(diff):
+    """Headline figures of one diff: counts and clicks of new, lost and kept labels."""
+    status = diff['status']
+    return {
+        'kept': int((status == 'kept').sum()),
+        'new': int((status == 'new').sum()),
+        'lost': int((status == 'lost').sum()),
+        'clicks_before': int(diff['clicks_before'].sum()),
+        'clicks_after': int(diff['clicks_after'].sum()),
+        'clicks_new': int(diff.loc[status == 'new', 'clicks_after'].sum()),
+        'clicks_lost': int(diff.loc[status == 'lost', 'clicks_before'].sum()),
+    }
+
+
+def movers(diff, top_n=10):
+    """The ``top_n`` biggest click gains and losses, largest changes first."""
+    order = diff.sort_values('clicks_delta', ascending=False, kind='mergesort')
+    return order.head(top_n), order.tail(top_n).iloc[::-1]
+
+
+def export_pairs(exports, all_pairs=False):
+    """Pair successive exports of each domain (oldest first); only the latest pair unless ``all_pairs``.
+
+    Exports without a date in their folder name are skipped.
+    """
+    by_domain = {}
+    for export in exports:
+        if export.export_date is not None:
+            by_domain.setdefault(export.domain, []).append(export)
+    pairs = []
+    for domain in sorted(by_domain):
+        history = sorted(by_domain[domain], key=lambda export: (export.export_date, export.name))
+        domain_pairs = list(zip(history, history[1:]))
+        pairs.extend(domain_pairs if all_pairs else domain_pairs[-1:])
+    return pairs
+
+
+def compare_portfolio(data_dir, domains=None, all_pairs=False, out_dir=None, tables=TABLES):
+    """Compare successive exports of every domain in ``data_dir``; returns one summary row per pair and table.
+
+    With ``out_dir`` every diff is also written there as
+    ``<domain>_<before date>_<after date>_<table>.csv``.
+    """
+    exports = discovery.select(discovery.scan(data_dir), domains=domains, latest_only=False)
+    rows = []
+    for before, after in export_pairs(exports, all_pairs):
+        for table, diff in compare_exports(before.path, after.path, tables).items():
+            rows.append(dict(domain=before.domain, before=before.export_date, after=after.export_date,
+                             table=table, **summarize(diff)))
+            if out_dir is not None:
+                os.makedirs(out_dir, exist_ok=True)
+                name = f"{before.domain}_{before.export_date}_{after.export_date}_{table}.csv"
+                diff.to_csv(os.path.join(out_dir, name), index=False)
+    return pd.DataFrame(rows)
@@ -0,0 +1,105 @@
+"""Portfolio-wide long-format tables built from every domain's exports.
+
+``consolidate`` stacks each domain's Dates/Countries/Devices/Pages/Queries
+frames into one table per export with a categorical ``domain`` column and
+the compact dtypes frames are loaded with (see ``schema``), with every
+label column categorical. Cross-domain questions then become single groupbys,
+e.g. ``queries.groupby('Top queries', observed=True)['domain'].nunique()``.
+
+Tables can be written to a directory as Feather files (pickle when pyarrow
+is not installed) and loaded back with ``load_consolidated``.
+"""
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+import aggregate
+from cache import feather_module
+from loader import load_csv_data
+from schema import METRIC_DTYPES
+
+# Table name -> (export file, label column)
+TABLES = {
+    'dates': ("Dates.csv", "Date"),
+    'countries': ("Countries.csv", "Country"),
+    'devices': ("Devices.csv", "Device"),
+    'pages': ("Pages.csv", "Top pages"),
+    'queries': ("Queries.csv", "Top queries"),
+}
+
+def _compact(df, label_column):
+    """Return the label and metric columns of ``df`` (already loaded with compact dtypes)."""
+    return df[[label_column] + [c for c in METRIC_DTYPES if c in df.columns]]
+
+
+def consolidate(domain_folders, tables=TABLES):
+    """Load every domain's exports and return a dict of table name -> long-format DataFrame."""
+    domain_names = [os.path.basename(folder) for folder in domain_folders]
+    consolidated = {}
+    for table, (filename, label_column) in tables.items():
+        frames, frame_codes, frame_rows = [], [], []
+        for code, folder in enumerate(domain_folders):
+            df = load_csv_data(folder, filename)
+            if df is None or label_column not in df.columns:
+                continue
+            frames.append(_compact(df, label_column))
+            frame_codes.append(code)
+            frame_rows.append(len(df))
+        if not frames:
+            continue
+
+        combined = pd.concat(frames, ignore_index=True)
+        # Build the domain column from codes instead of repeating the name per row
+        codes = np.repeat(np.array(frame_codes, dtype=np.int32), frame_rows)
+        combined.insert(0, 'domain', pd.Categorical.from_codes(codes, categories=domain_names))
+        if label_column != "Date":
+            combined[label_column] = combined[label_column].astype('category')
+        consolidated[table] = combined
+    return consolidated
+
+
+def write_consolidated(consolidated, out_dir):
+    """Write each table to ``out_dir`` and return the written paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    feather = feather_module()
+    paths = []
+    for table, df in consolidated.items():
+        if feather is not None:
+            path = os.path.join(out_dir, f"{table}.feather")
+            feather.write_feather(df, path)
+        else:
+            path = os.path.join(out_dir, f"{table}.pkl")
+            df.to_pickle(path)
+        paths.append(path)
+    return paths
+
+
+def load_consolidated(out_dir):
+    """Load tables written by ``write_consolidated``."""
+    feather = feather_module()
+    consolidated = {}
+    for entry in sorted(os.scandir(out_dir), key=lambda e: e.name):
+        table, ext = os.path.splitext(entry.name)
+        if ext == '.feather' and feather is not None:
+            consolidated[table] = feather.read_table(entry.path, memory_map=True).to_pandas()
+        elif ext == '.pkl':
+            with open(entry.path, 'rb') as f:
+                consolidated[table] = pickle.load(f)
+    return consolidated
+
+
+def query_reach(queries, top_n=10):
+    """Queries ranking for the most domains, with their portfolio clicks and impressions."""
+    grouped = queries.groupby('Top queries', observed=True).agg(
+        domains=('domain', 'nunique'), Clicks=('Clicks', 'sum'), Impressions=('Impressions', 'sum'))
+    return grouped.sort_values(['domains', 'Clicks'], ascending=False).head(top_n)
+
+
+def device_share(devices):
+    """Share of portfolio clicks and impressions per device, with CTR and weighted position."""
+    grouped = aggregate.aggregate(devices, by='Device')
+    grouped['Click %'] = grouped['Clicks'] / grouped['Clicks'].sum() * 100
+    grouped['Impression %'] = grouped['Impressions'] / grouped['Impressions'].sum() * 100
+    return grouped.sort_values('Clicks', ascending=False)
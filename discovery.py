@@ -0,0 +1,81 @@
+"""Discovery of export folders in the data directory.
+
+Search Console names export folders ``<domain>-Performance-on-Search-YYYY-MM-DD``.
+The data directory is scanned once with ``os.scandir`` and every folder
+name is parsed into its domain and export date, so filters (by domain,
+by export date, latest export per domain) are applied before any CSV is
+opened. Folders whose names do not follow the pattern are kept as a
+domain of their own, without an export date.
+"""
+import fnmatch
+import os
+import re
+from datetime import date
+
+FOLDER_PATTERN = re.compile(r"^(?P<domain>.+?)-Performance-on-Search-(?P<date>\d{4}-\d{2}-\d{2})$")
+
+
+class ExportFolder:
+    """One export folder with the domain and export date parsed from its name."""
+
+    def __init__(self, path, name, domain, export_date):
+        self.path = path
+        self.name = name
+        self.domain = domain
+        self.export_date = export_date
+
+    def __repr__(self):
+        return f"ExportFolder({self.name!r}, domain={self.domain!r}, export_date={self.export_date})"
+
+
+def parse_folder_name(name):
+    """Return (domain, export date) for an export folder name; the date is None if it does not parse."""
+    match = FOLDER_PATTERN.match(name)
+    if match is None:
+        return name, None
+    try:
+        return match.group('domain'), date.fromisoformat(match.group('date'))
+    except ValueError:
+        return name, None
+
+
+def scan(data_dir):
+    """Return an ExportFolder for every subdirectory of ``data_dir``, sorted by name."""
+    exports = []
+    with os.scandir(data_dir) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                domain, export_date = parse_folder_name(entry.name)
+                exports.append(ExportFolder(entry.path, entry.name, domain, export_date))
+    return sorted(exports, key=lambda export: export.name)
+
+
+def select(exports, domains=None, since=None, latest_only=True):
+    """Filter ExportFolders, keeping their order.
+
+    ``domains`` is a list of domain names or shell-style patterns
+    (``*.example.com``), matched case-insensitively; ``since`` drops
+    exports dated before that date (and those without a date). With
+    ``latest_only`` only the most recent export of each domain is kept.
+    """
+    if domains:
+        patterns = [pattern.lower() for pattern in domains]
+        exports = [export for export in exports
+                   if any(fnmatch.fnmatchcase(export.domain.lower(), pattern) for pattern in patterns)]
+    if since is not None:
+        exports = [export for export in exports if export.export_date is not None and export.export_date >= since]
+    if latest_only:
+        latest = {}
+        for export in exports:
+            current = latest.get(export.domain)
+            if current is None or (export.export_date or date.min, export.name) > (
+                    current.export_date or date.min, current.name):
+                latest[export.domain] = export
+        kept = set(id(export) for export in latest.values())
+        exports = [export for export in exports if id(export) in kept]
+    return exports
+
+
+def find_domain_folders(data_dir, domains=None, since=None, latest_only=True):
+    """Return the paths of the export folders in ``data_dir`` to analyze (see ``select``)."""
+    return [export.path for export in select(scan(data_dir), domains, since, latest_only)]
@@ -0,0 +1,60 @@
+"""Loading of Search Console CSV exports from an export folder."""
+import os
+
+import aggregate
+import cache
+import schema
+import streaming
+
+# CSV files Search Console writes into each export folder
+EXPORT_FILES = ("Countries.csv", "Dates.csv", "Devices.csv", "Filters.csv",
+                "Pages.csv", "Search appearance.csv", "Queries.csv")
+
+
+def parse_csv(file_path):
+    """Parse a Search Console CSV export into a cleaned DataFrame with compact dtypes."""
+    return schema.read_export(file_path)
+
+
+def load_csv_data(folder_path, filename):
+    """Load CSV data from the specified folder and filename."""
+    file_path = os.path.join(folder_path, filename)
+    try:
+        return cache.cached_read(file_path, parse_csv)
+    except Exception as e:
+        print(f"Error loading {filename}: {e}")
+        return None
+
+
+def load_ranked_data(folder_path, filename, top_n=10, df=None, on_chunk=None):
+    """Load an export sorted by clicks, returning (sorted rows, column totals).
+
+    Files above the streaming threshold are read in chunks and only their
+    top ``top_n`` rows are kept; smaller files are loaded in full. Pass an
+    already loaded ``df`` to rank it without reading the file again.
+    ``on_chunk`` is called with every streamed chunk, or once with the
+    whole frame, before ranking.
+    """
+    if df is None:
+        file_path = os.path.join(folder_path, filename)
+        try:
+            if streaming.should_stream(file_path):
+                tops, totals = streaming.stream_csv(file_path, top_n=top_n, on_chunk=on_chunk)
+                return tops['Clicks'], totals
+        except Exception as e:
+            print(f"Error loading {filename}: {e}")
+            return None, None
+        df = load_csv_data(folder_path, filename)
+
+    if df is None:
+        return None, None
+    if on_chunk is not None:
+        on_chunk(df)
+    totals = dict(aggregate.sums(df), rows=len(df))
+    # Stable sort so ties keep file order, matching the streamed top rows
+    return df.sort_values('Clicks', ascending=False, kind='mergesort'), totals
+
+
+def load_domain_frames(folder_path, filenames=EXPORT_FILES):
+    """Load several exports of one folder, returning a dict of filename -> DataFrame (or None)."""
+    return {filename: load_csv_data(folder_path, filename) for filename in filenames}
@@ -1,705 +1,185 @@
 import os
-import pandas as pd
-import matplotlib.pyplot as plt
-from datetime import datetime
-import numpy as np
-import base64
-from io import BytesIO
-
-def load_csv_data(folder_path, filename):
-    """Load CSV data from the specified folder and filename."""
-    file_path = os.path.join(folder_path, filename)
-    try:
-        return pd.read_csv(file_path)
-    except Exception as e:
-        print(f"Error loading {filename}: {e}")
-        return None
+import io
+import argparse
+import contextlib
+import sys
+import time
+from datetime import date, datetime
 
-def generate_html_report(domain_summaries, domain_details):
-    """Generate an HTML report with Tailwind CSS styling."""
-    
-    # Create HTML header with Tailwind CSS
-    html = """
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Google Search Console Analysis Report</title>
-        <script src="https://unpkg.com/@tailwindcss/browser@4"></script>
-        <style>
-            body {
-                font-family: 'Inter', sans-serif;
-                background-color: #f9fafb;
-            }
-            .chart-container {
-                width: 100%;
-                max-width: 800px;
-                margin: 0 auto;
-            }
-        </style>
-    </head>
-    <body class="p-6">
-        <div class="max-w-7xl mx-auto">
-            <h1 class="text-3xl font-bold text-gray-900 mb-8">Google Search Console Analysis Report</h1>
-            <p class="text-gray-600 mb-8">Generated on: """ + datetime.now().strftime("%Y-%m-%d %H:%M:%S") + """</p>
-            
-            <div class="bg-white rounded-lg shadow-md p-6 mb-8">
-                <h2 class="text-xl font-semibold text-gray-800 mb-4">Overall Summary</h2>
-    """
-    
-    # Create summary table
-    if domain_summaries:
-        summary_df = pd.DataFrame(domain_summaries)
-        
-        # Calculate aggregate statistics
-        total_clicks = summary_df['total_clicks'].sum()
-        total_impressions = summary_df['total_impressions'].sum()
-        avg_ctr = summary_df['avg_ctr'].mean()
-        avg_position = summary_df['avg_position'].mean()
-        best_domain_clicks = summary_df.loc[summary_df['total_clicks'].idxmax()]['domain']
-        best_domain_ctr = summary_df.loc[summary_df['avg_ctr'].idxmax()]['domain']
-        
-        # Add aggregate statistics to HTML
-        html += f"""
-                <div class="grid grid-cols-1 md:grid-cols-3 gap-4 mb-6">
-                    <div class="bg-blue-50 p-4 rounded-lg">
-                        <p class="text-sm text-blue-600 font-medium">Total Clicks</p>
-                        <p class="text-2xl font-bold text-blue-800">{int(total_clicks)}</p>
-                    </div>
-                    <div class="bg-green-50 p-4 rounded-lg">
-                        <p class="text-sm text-green-600 font-medium">Total Impressions</p>
-                        <p class="text-2xl font-bold text-green-800">{int(total_impressions)}</p>
-                    </div>
-                    <div class="bg-purple-50 p-4 rounded-lg">
-                        <p class="text-sm text-purple-600 font-medium">Average CTR</p>
-                        <p class="text-2xl font-bold text-purple-800">{avg_ctr:.2f}%</p>
-                    </div>
-                </div>
-                
-                <div class="grid grid-cols-1 md:grid-cols-2 gap-4 mb-6">
-                    <div class="bg-yellow-50 p-4 rounded-lg">
-                        <p class="text-sm text-yellow-600 font-medium">Average Position</p>
-                        <p class="text-2xl font-bold text-yellow-800">{avg_position:.2f}</p>
-                    </div>
-                    <div class="bg-indigo-50 p-4 rounded-lg">
-                        <p class="text-sm text-indigo-600 font-medium">Best Performing Domain</p>
-                        <p class="text-xl font-bold text-indigo-800">{best_domain_clicks}</p>
-                        <p class="text-xs text-indigo-600">(by clicks)</p>
-                    </div>
-                </div>
-        """
-        
-        # Add new section for Aggregated Averages
-        html += """
-            </div>
-            
-            <div class="bg-white rounded-lg shadow-md p-6 mb-8">
-                <h2 class="text-xl font-semibold text-gray-800 mb-4">Aggregated Averages</h2>
-                
-                <div class="grid grid-cols-1 md:grid-cols-2 gap-6 mb-6">
-        """
-        
-        # Calculate additional aggregated statistics
-        max_clicks = summary_df['total_clicks'].max()
-        min_clicks = summary_df['total_clicks'].min()
-        median_clicks = summary_df['total_clicks'].median()
-        
-        max_impressions = summary_df['total_impressions'].max()
-        min_impressions = summary_df['total_impressions'].min()
-        median_impressions = summary_df['total_impressions'].median()
-        
-        max_ctr = summary_df['avg_ctr'].max()
-        min_ctr = summary_df['avg_ctr'].min()
-        
-        max_position = summary_df['avg_position'].max()
-        min_position = summary_df['avg_position'].min()
-        
-        # Calculate percentiles and standard deviation for clicks
-        p25_clicks = summary_df['total_clicks'].quantile(0.25)
-        p75_clicks = summary_df['total_clicks'].quantile(0.75)
-        p90_clicks = summary_df['total_clicks'].quantile(0.90)
-        std_clicks = summary_df['total_clicks'].std()
-        iqr_clicks = p75_clicks - p25_clicks
-        
-        # Calculate percentiles and standard deviation for impressions
-        p25_impressions = summary_df['total_impressions'].quantile(0.25)
-        p75_impressions = summary_df['total_impressions'].quantile(0.75)
-        p90_impressions = summary_df['total_impressions'].quantile(0.90)
-        std_impressions = summary_df['total_impressions'].std()
-        iqr_impressions = p75_impressions - p25_impressions
-        
-        # Calculate percentiles and standard deviation for CTR
-        p25_ctr = summary_df['avg_ctr'].quantile(0.25)
-        p75_ctr = summary_df['avg_ctr'].quantile(0.75)
-        p90_ctr = summary_df['avg_ctr'].quantile(0.90)
-        std_ctr = summary_df['avg_ctr'].std()
-        iqr_ctr = p75_ctr - p25_ctr
-        
-        # Calculate percentiles and standard deviation for position
-        p25_position = summary_df['avg_position'].quantile(0.25)
-        p75_position = summary_df['avg_position'].quantile(0.75)
-        p90_position = summary_df['avg_position'].quantile(0.90)
-        std_position = summary_df['avg_position'].std()
-        iqr_position = p75_position - p25_position
-        
-        # Update Clicks statistics with more detailed metrics
-        html += f"""
-                    <div class="bg-white border border-gray-200 rounded-lg p-4">
-                        <h3 class="text-lg font-medium text-gray-800 mb-3">Clicks</h3>
-                        <div class="space-y-2">
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">Average:</span>
-                                <span class="text-sm font-medium text-gray-900">{summary_df['total_clicks'].mean():.1f}</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">Median:</span>
-                                <span class="text-sm font-medium text-gray-900">{median_clicks:.1f}</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">Standard Deviation:</span>
-                                <span class="text-sm font-medium text-gray-900">{std_clicks:.1f}</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">25th Percentile:</span>
-                                <span class="text-sm font-medium text-gray-900">{p25_clicks:.1f}</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">75th Percentile:</span>
-                                <span class="text-sm font-medium text-gray-900">{p75_clicks:.1f}</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">90th Percentile:</span>
-                                <span class="text-sm font-medium text-gray-900">{p90_clicks:.1f}</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">IQR:</span>
-                                <span class="text-sm font-medium text-gray-900">{iqr_clicks:.1f}</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">Maximum:</span>
-                                <span class="text-sm font-medium text-gray-900">{max_clicks:.0f} ({summary_df.loc[summary_df['total_clicks'].idxmax()]['domain']})</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">Minimum:</span>
-                                <span class="text-sm font-medium text-gray-900">{min_clicks:.0f} ({summary_df.loc[summary_df['total_clicks'].idxmin()]['domain']})</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">Total:</span>
-                                <span class="text-sm font-medium text-gray-900">{total_clicks:.0f}</span>
-                            </div>
-                        </div>
-                    </div>
-        """
-        
-        # Update Impressions statistics with more detailed metrics
-        html += f"""
-                    <div class="bg-white border border-gray-200 rounded-lg p-4">
-                        <h3 class="text-lg font-medium text-gray-800 mb-3">Impressions</h3>
-                        <div class="space-y-2">
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">Average:</span>
-                                <span class="text-sm font-medium text-gray-900">{summary_df['total_impressions'].mean():.1f}</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">Median:</span>
-                                <span class="text-sm font-medium text-gray-900">{median_impressions:.1f}</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">Standard Deviation:</span>
-                                <span class="text-sm font-medium text-gray-900">{std_impressions:.1f}</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">25th Percentile:</span>
-                                <span class="text-sm font-medium text-gray-900">{p25_impressions:.1f}</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">75th Percentile:</span>
-                                <span class="text-sm font-medium text-gray-900">{p75_impressions:.1f}</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">90th Percentile:</span>
-                                <span class="text-sm font-medium text-gray-900">{p90_impressions:.1f}</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">IQR:</span>
-                                <span class="text-sm font-medium text-gray-900">{iqr_impressions:.1f}</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">Maximum:</span>
-                                <span class="text-sm font-medium text-gray-900">{max_impressions:.0f} ({summary_df.loc[summary_df['total_impressions'].idxmax()]['domain']})</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">Minimum:</span>
-                                <span class="text-sm font-medium text-gray-900">{min_impressions:.0f} ({summary_df.loc[summary_df['total_impressions'].idxmin()]['domain']})</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">Total:</span>
-                                <span class="text-sm font-medium text-gray-900">{total_impressions:.0f}</span>
-                            </div>
-                        </div>
-                    </div>
-        """
-        
-        # Update CTR statistics with more detailed metrics
-        html += f"""
-                    <div class="bg-white border border-gray-200 rounded-lg p-4">
-                        <h3 class="text-lg font-medium text-gray-800 mb-3">CTR</h3>
-                        <div class="space-y-2">
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">Average:</span>
-                                <span class="text-sm font-medium text-gray-900">{avg_ctr:.2f}%</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">Median:</span>
-                                <span class="text-sm font-medium text-gray-900">{summary_df['avg_ctr'].median():.2f}%</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">Standard Deviation:</span>
-                                <span class="text-sm font-medium text-gray-900">{std_ctr:.2f}%</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">25th Percentile:</span>
-                                <span class="text-sm font-medium text-gray-900">{p25_ctr:.2f}%</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">75th Percentile:</span>
-                                <span class="text-sm font-medium text-gray-900">{p75_ctr:.2f}%</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">90th Percentile:</span>
-                                <span class="text-sm font-medium text-gray-900">{p90_ctr:.2f}%</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">Maximum:</span>
-                                <span class="text-sm font-medium text-gray-900">{max_ctr:.2f}% ({summary_df.loc[summary_df['avg_ctr'].idxmax()]['domain']})</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">Minimum:</span>
-                                <span class="text-sm font-medium text-gray-900">{min_ctr:.2f}% ({summary_df.loc[summary_df['avg_ctr'].idxmin()]['domain']})</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">Overall CTR:</span>
-                                <span class="text-sm font-medium text-gray-900">{(total_clicks / total_impressions) * 100:.2f}%</span>
-                            </div>
-                        </div>
-                    </div>
-        """
-        
-        # Update Position statistics with more detailed metrics
-        html += f"""
-                    <div class="bg-white border border-gray-200 rounded-lg p-4">
-                        <h3 class="text-lg font-medium text-gray-800 mb-3">Position</h3>
-                        <div class="space-y-2">
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">Average:</span>
-                                <span class="text-sm font-medium text-gray-900">{avg_position:.2f}</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">Median:</span>
-                                <span class="text-sm font-medium text-gray-900">{summary_df['avg_position'].median():.2f}</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">Standard Deviation:</span>
-                                <span class="text-sm font-medium text-gray-900">{std_position:.2f}</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">25th Percentile:</span>
-                                <span class="text-sm font-medium text-gray-900">{p25_position:.2f}</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">75th Percentile:</span>
-                                <span class="text-sm font-medium text-gray-900">{p75_position:.2f}</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">90th Percentile:</span>
-                                <span class="text-sm font-medium text-gray-900">{p90_position:.2f}</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">IQR:</span>
-                                <span class="text-sm font-medium text-gray-900">{iqr_position:.2f}</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">Best (Lowest):</span>
-                                <span class="text-sm font-medium text-gray-900">{min_position:.2f} ({summary_df.loc[summary_df['avg_position'].idxmin()]['domain']})</span>
-                            </div>
-                            <div class="flex justify-between">
-                                <span class="text-sm text-gray-600">Worst (Highest):</span>
-                                <span class="text-sm font-medium text-gray-900">{max_position:.2f} ({summary_df.loc[summary_df['avg_position'].idxmax()]['domain']})</span>
-                            </div>
-                        </div>
-                    </div>
-        """
-        
-        # Update Key Insights section with more nuanced analysis
-        html += """
-                </div>
-                
-                <div class="bg-gray-50 p-4 rounded-lg">
-                    <h3 class="text-md font-medium text-gray-800 mb-2">Key Insights</h3>
-                    <ul class="list-disc pl-5 space-y-1 text-sm text-gray-700">
-        """
-        
-        # Add insights based on the data
-        if max_clicks > summary_df['total_clicks'].mean() * 2:
-            html += f"""
-                        <li>The top-performing domain ({summary_df.loc[summary_df['total_clicks'].idxmax()]['domain']}) has {max_clicks / summary_df['total_clicks'].mean():.1f}x more clicks than the average.</li>
-            """
-        
-        # Add insight about median vs mean for clicks (indicates skew)
-        if median_clicks < summary_df['total_clicks'].mean() * 0.8:
-            html += f"""
-                        <li>The median clicks ({median_clicks:.1f}) is significantly lower than the mean ({summary_df['total_clicks'].mean():.1f}), indicating that a few high-performing domains are skewing the average upward.</li>
-            """
-        
-        # Add insight about standard deviation for clicks
-        if std_clicks > summary_df['total_clicks'].mean():
-            html += f"""
-                        <li>The high standard deviation in clicks ({std_clicks:.1f}) indicates substantial variation in performance across domains.</li>
-            """
-        
-        # Add insight about IQR for CTR
-        if iqr_ctr > avg_ctr * 0.5:
-            html += f"""
-                        <li>The wide interquartile range for CTR ({iqr_ctr:.2f}%) suggests significant differences in engagement rates across domains.</li>
-            """
-        
-        # Add insight about position distribution
-        if p25_position < avg_position * 0.7:
-            html += f"""
-                        <li>25% of domains have an average position better than {p25_position:.2f}, significantly outperforming the overall average of {avg_position:.2f}.</li>
-            """
-        
-        # Add general insights
-        html += f"""
-                        <li>Overall, the domains receive an average of {summary_df['total_clicks'].mean():.1f} clicks from {summary_df['total_impressions'].mean():.1f} impressions.</li>
-                        <li>The average CTR across all domains is {avg_ctr:.2f}%, with positions averaging {avg_position:.2f}.</li>
-                    </ul>
-                </div>
-            </div>
-        """
-        
-        # Add domain comparison table
-        html += """
-                <h3 class="text-lg font-medium text-gray-800 mb-2">Domain Comparison</h3>
-                <div class="overflow-x-auto">
-                    <table class="min-w-full divide-y divide-gray-200">
-                        <thead class="bg-gray-50">
-                            <tr>
-                                <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Domain</th>
-                                <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Clicks</th>
-                                <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Impressions</th>
-                                <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">CTR</th>
-                                <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Position</th>
-                            </tr>
-                        </thead>
-                        <tbody class="bg-white divide-y divide-gray-200">
-        """
-        
-        # Sort the dataframe by impressions in descending order
-        sorted_summary_df = summary_df.sort_values('total_impressions', ascending=False)
-        
-        # Add rows for each domain
-        for _, row in sorted_summary_df.iterrows():
-            html += f"""
-                            <tr>
-                                <td class="px-6 py-4 whitespace-nowrap text-sm font-medium text-gray-900">{row['domain']}</td>
-                                <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">{int(row['total_clicks'])}</td>
-                                <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">{int(row['total_impressions'])}</td>
-                                <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">{row['avg_ctr']:.2f}%</td>
-                                <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">{row['avg_position']:.2f}</td>
-                            </tr>
-            """
-        
-        html += """
-                        </tbody>
-                    </table>
-                </div>
-            </div>
-        """
-    
-    # Add detailed domain sections
-    for domain_name, domain_data in domain_details.items():
-        html += f"""
-            <div class="bg-white rounded-lg shadow-md p-6 mb-8">
-                <h2 class="text-xl font-semibold text-gray-800 mb-4">{domain_name}</h2>
-                
-                <div class="grid grid-cols-1 md:grid-cols-2 gap-6">
-        """
-        
-        # Add device distribution if available
-        if 'devices' in domain_data and domain_data['devices'] is not None:
-            devices_df = domain_data['devices']
-            
-            # Create device distribution HTML
-            html += """
-                    <div>
-                        <h3 class="text-lg font-medium text-gray-800 mb-2">Device Distribution</h3>
-                        <div class="overflow-x-auto">
-                            <table class="min-w-full divide-y divide-gray-200">
-                                <thead class="bg-gray-50">
-                                    <tr>
-                                        <th class="px-4 py-2 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Device</th>
-                                        <th class="px-4 py-2 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Clicks</th>
-                                        <th class="px-4 py-2 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Click %</th>
-                                    </tr>
-                                </thead>
-                                <tbody class="bg-white divide-y divide-gray-200">
-            """
-            
-            for _, row in devices_df.iterrows():
-                html += f"""
-                                    <tr>
-                                        <td class="px-4 py-2 whitespace-nowrap text-sm font-medium text-gray-900">{row['Device']}</td>
-                                        <td class="px-4 py-2 whitespace-nowrap text-sm text-gray-500">{int(row['Clicks'])}</td>
-                                        <td class="px-4 py-2 whitespace-nowrap text-sm text-gray-500">{row['Click %']:.1f}%</td>
-                                    </tr>
-                """
-            
-            html += """
-                                </tbody>
-                            </table>
-                        </div>
-                    </div>
-            """
-        
-        # Add top queries if available
-        if 'queries' in domain_data and domain_data['queries'] is not None:
-            queries_df = domain_data['queries'].head(10)
-            
-            # Create top queries HTML
-            html += """
-                    <div>
-                        <h3 class="text-lg font-medium text-gray-800 mb-2">Top Queries</h3>
-                        <div class="overflow-x-auto">
-                            <table class="min-w-full divide-y divide-gray-200">
-                                <thead class="bg-gray-50">
-                                    <tr>
-                                        <th class="px-4 py-2 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Query</th>
-                                        <th class="px-4 py-2 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Clicks</th>
-                                        <th class="px-4 py-2 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Impressions</th>
-                                    </tr>
-                                </thead>
-                                <tbody class="bg-white divide-y divide-gray-200">
-            """
-            
-            for _, row in queries_df.iterrows():
-                query_col = queries_df.columns[0]  # Get the name of the first column (query column)
-                html += f"""
-                                    <tr>
-                                        <td class="px-4 py-2 whitespace-nowrap text-sm font-medium text-gray-900">{row[query_col]}</td>
-                                        <td class="px-4 py-2 whitespace-nowrap text-sm text-gray-500">{int(row['Clicks'])}</td>
-                                        <td class="px-4 py-2 whitespace-nowrap text-sm text-gray-500">{int(row['Impressions'])}</td>
-                                    </tr>
-                """
-            
-            html += """
-                                </tbody>
-                            </table>
-                        </div>
-                    </div>
-            """
-        
-        # Add top pages if available
-        if 'pages' in domain_data and domain_data['pages'] is not None:
-            pages_df = domain_data['pages'].head(10)
-            
-            # Create top pages HTML
-            html += """
-                    <div class="col-span-1 md:col-span-2">
-                        <h3 class="text-lg font-medium text-gray-800 mb-2">Top Pages</h3>
-                        <div class="overflow-x-auto">
-                            <table class="min-w-full divide-y divide-gray-200">
-                                <thead class="bg-gray-50">
-                                    <tr>
-                                        <th class="px-4 py-2 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Page</th>
-                                        <th class="px-4 py-2 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Clicks</th>
-                                        <th class="px-4 py-2 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Impressions</th>
-                                        <th class="px-4 py-2 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">CTR</th>
-                                        <th class="px-4 py-2 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Position</th>
-                                    </tr>
-                                </thead>
-                                <tbody class="bg-white divide-y divide-gray-200">
-            """
-            
-            for _, row in pages_df.iterrows():
-                page_col = pages_df.columns[0]  # Get the name of the first column (page column)
-                html += f"""
-                                    <tr>
-                                        <td class="px-4 py-2 whitespace-nowrap text-sm font-medium text-gray-900">{row[page_col]}</td>
-                                        <td class="px-4 py-2 whitespace-nowrap text-sm text-gray-500">{int(row['Clicks'])}</td>
-                                        <td class="px-4 py-2 whitespace-nowrap text-sm text-gray-500">{int(row['Impressions'])}</td>
-                                        <td class="px-4 py-2 whitespace-nowrap text-sm text-gray-500">{float(row['CTR']):.2f}%</td>
-                                        <td class="px-4 py-2 whitespace-nowrap text-sm text-gray-500">{float(row['Position']):.2f}</td>
-                                    </tr>
-                """
-            
-            html += """
-                                </tbody>
-                            </table>
-                        </div>
-                    </div>
-            """
-        
-        html += """
-                </div>
-            </div>
-        """
-    
-    # Close HTML
-    html += """
-        </div>
-    </body>
-    </html>
+# Only modules that are cheap to import are loaded up front; pandas and the
+# modules built on it are imported where they are first needed, so --help
+# and other quick invocations start fast (see benchmarks/bench_startup.py)
+import cache
+import charts
+import discovery
+import manifest
+import prefetch
+import profiling
+import streaming
+
+# Rows of the top pages/queries tables kept for the report
+REPORT_TOP_N = 10
+
+def analyze_domain(domain_folder, frames=None, errors=None):
+    """Analyze data for a specific domain.
+
+    ``frames`` optionally maps export filenames to DataFrames that were
+    already loaded (e.g. by the prefetcher); other files are read here.
+    ``errors`` maps files that already failed to load to their exception,
+    which is reported here instead of reading the file again.
+
+    Returns the domain summary and a slim report fragment (device split, top
+    pages and queries, totals) rather than the full DataFrames, so memory
+    stays bounded by one domain however many are analyzed.
     """
-    
-    return html
+    import pandas as pd
+
+    import zlib
+
+    import aggregate
+    import sketches
+    from loader import EXPORT_FILES, load_csv_data, load_ranked_data
+
+    frames = frames or {}
+    errors = errors or {}
+
+    def load(filename):
+        if filename in errors:
+            print(f"Error loading {filename}: {errors[filename]}")
+            return None
+        if filename in frames:
+            return frames[filename]
+        return load_csv_data(domain_folder, filename)
+
+    def load_ranked(filename, on_chunk=None):
+        if filename in errors:
+            print(f"Error loading {filename}: {errors[filename]}")
+            return None, None
+        return load_ranked_data(domain_folder, filename, top_n=REPORT_TOP_N, df=frames.get(filename),
+                                on_chunk=on_chunk)
+
+    domain_name = os.path.basename(domain_folder)
+    print(f"\n{'='*80}\nAnalyzing domain: {domain_name}\n{'='*80}")
 
-def analyze_domain(domain_folder):
-    """Analyze data for a specific domain."""
-    print(f"\n{'='*80}\nAnalyzing domain: {os.path.basename(domain_folder)}\n{'='*80}")
-    
     # Load all CSV files
-    countries_df = load_csv_data(domain_folder, "Countries.csv")
-    dates_df = load_csv_data(domain_folder, "Dates.csv")
-    devices_df = load_csv_data(domain_folder, "Devices.csv")
-    filters_df = load_csv_data(domain_folder, "Filters.csv")
-    pages_df = load_csv_data(domain_folder, "Pages.csv")
-    search_appearance_df = load_csv_data(domain_folder, "Search appearance.csv")
-    queries_df = load_csv_data(domain_folder, "Queries.csv")
-    
+    with profiling.stage('load', domain_name) as record:
+        countries_df = load("Countries.csv")
+        dates_df = load("Dates.csv")
+        devices_df = load("Devices.csv")
+        filters_df = load("Filters.csv")
+        pages_sorted, pages_totals = load_ranked("Pages.csv")
+        search_appearance_df = load("Search appearance.csv")
+        # Query-level sketches are filled while Queries.csv is read, chunk by chunk when streamed
+        query_sketches = sketches.QuerySketches(seed=zlib.crc32(domain_name.encode('utf-8')))
+        queries_sorted, queries_totals = load_ranked("Queries.csv", on_chunk=query_sketches.update)
+        loaded = [countries_df, dates_df, devices_df, filters_df, search_appearance_df]
+        record['rows'] = (sum(len(df) for df in loaded if df is not None)
+                          + sum(totals['rows'] for totals in (pages_totals, queries_totals) if totals))
+        record['bytes_read'] = profiling.folder_bytes(domain_folder, EXPORT_FILES)
+
     # Analyze dates data (time series)
-    if dates_df is not None:
-        print("\n--- Time Series Analysis ---")
-        # Convert Date to datetime
-        dates_df['Date'] = pd.to_datetime(dates_df['Date'])
-        
-        # Sort by date
-        dates_df = dates_df.sort_values('Date')
-        
-        # Clean CTR column - remove % and convert to float
-        if 'CTR' in dates_df.columns:
-            dates_df['CTR'] = dates_df['CTR'].astype(str).str.replace('%', '').str.replace(',', '.').astype(float)
-        
-        # Calculate summary statistics
-        total_clicks = dates_df['Clicks'].sum()
-        total_impressions = dates_df['Impressions'].sum()
-        avg_ctr = (dates_df['Clicks'].sum() / dates_df['Impressions'].sum()) * 100
-        avg_position = dates_df['Position'].mean()
-        
-        print(f"Total Clicks: {total_clicks}")
-        print(f"Total Impressions: {total_impressions}")
-        print(f"Average CTR: {avg_ctr:.2f}%")
-        print(f"Average Position: {avg_position:.2f}")
-        
-        # Calculate monthly aggregates
-        dates_df['Month'] = dates_df['Date'].dt.to_period('M')
-        
-        try:
-            monthly_data = dates_df.groupby('Month').agg({
-                'Clicks': 'sum',
-                'Impressions': 'sum',
-                'CTR': 'mean',
-                'Position': 'mean'
-            })
-            
-            print("\nMonthly Performance:")
-            print(monthly_data)
-        except Exception as e:
-            print(f"\nError calculating monthly aggregates: {e}")
-            print("Attempting to calculate with numeric columns only...")
-            
-            # Try with just the numeric columns
-            monthly_data = dates_df.groupby('Month').agg({
-                'Clicks': 'sum',
-                'Impressions': 'sum',
-                'Position': 'mean'
-            })
-            
-            # Calculate CTR from the aggregated data
-            monthly_data['CTR'] = (monthly_data['Clicks'] / monthly_data['Impressions']) * 100
-            
+    with profiling.stage('time_series', domain_name) as record:
+        if dates_df is not None:
+            print("\n--- Time Series Analysis ---")
+            # Convert Date to datetime
+            dates_df['Date'] = pd.to_datetime(dates_df['Date'])
+
+            # Sort by date
+            dates_df = dates_df.sort_values('Date')
+
+            # Calculate summary statistics; position is weighted by impressions
+            dates_sums = aggregate.sums(dates_df)
+            dates_totals = aggregate.finalize(dates_sums)
+            total_clicks = dates_totals['Clicks']
+            total_impressions = dates_totals['Impressions']
+            avg_ctr = dates_totals['CTR']
+            avg_position = dates_totals['Position']
+
+            print(f"Total Clicks: {total_clicks}")
+            print(f"Total Impressions: {total_impressions}")
+            print(f"Average CTR: {avg_ctr:.2f}%")
+            print(f"Average Position: {avg_position:.2f}")
+
+            # Calculate monthly aggregates from summed clicks, impressions and position weights
+            dates_df['Month'] = dates_df['Date'].dt.to_period('M')
+            monthly_data = aggregate.aggregate(dates_df, by='Month')
+
             print("\nMonthly Performance:")
             print(monthly_data)
-    
-    # Clean CTR column in other dataframes
-    for df in [countries_df, devices_df, pages_df, search_appearance_df, queries_df]:
-        if df is not None and 'CTR' in df.columns:
-            df['CTR'] = df['CTR'].astype(str).str.replace('%', '').str.replace(',', '.').astype(float)
-    
-    # Analyze countries data
-    if countries_df is not None:
-        print("\n--- Countries Analysis ---")
-        # Sort by clicks in descending order
-        countries_sorted = countries_df.sort_values('Clicks', ascending=False)
-        
-        print("Top 5 Countries by Clicks:")
-        print(countries_sorted.head(5))
-        
-        # Calculate percentage of total clicks and impressions
-        total_clicks = countries_df['Clicks'].sum()
-        total_impressions = countries_df['Impressions'].sum()
-        
-        countries_df['Click %'] = (countries_df['Clicks'] / total_clicks) * 100
-        countries_df['Impression %'] = (countries_df['Impressions'] / total_impressions) * 100
-        
-        print("\nCountry Distribution:")
-        print(countries_df[['Country', 'Clicks', 'Click %', 'Impressions', 'Impression %']].head(10))
-    
-    # Analyze devices data
-    if devices_df is not None:
-        print("\n--- Devices Analysis ---")
-        print(devices_df)
-        
-        # Calculate percentage of total for each device
-        total_clicks = devices_df['Clicks'].sum()
-        total_impressions = devices_df['Impressions'].sum()
-        
-        devices_df['Click %'] = (devices_df['Clicks'] / total_clicks) * 100
-        devices_df['Impression %'] = (devices_df['Impressions'] / total_impressions) * 100
-        
-        print("\nDevice Distribution:")
-        print(devices_df[['Device', 'Clicks', 'Click %', 'Impressions', 'Impression %']])
-    
-    # Analyze top pages
-    if pages_df is not None:
-        print("\n--- Top Pages Analysis ---")
-        # Sort by clicks in descending order
-        pages_sorted = pages_df.sort_values('Clicks', ascending=False)
-        
-        print("Top 10 Pages by Clicks:")
-        print(pages_sorted.head(10))
-        
-        # Calculate what percentage of total traffic goes to top 10 pages
-        total_clicks = pages_df['Clicks'].sum()
-        top10_clicks = pages_sorted.head(10)['Clicks'].sum()
-        
-        print(f"\nTop 10 pages account for {(top10_clicks/total_clicks)*100:.2f}% of all clicks")
-    
-    # Analyze top queries
-    if queries_df is not None:
-        print("\n--- Top Queries Analysis ---")
-        # Sort by clicks in descending order
-        queries_sorted = queries_df.sort_values('Clicks', ascending=False)
-        
-        print("Top 10 Queries by Clicks:")
-        print(queries_sorted.head(10))
-        
-        # Calculate what percentage of total traffic comes from top 10 queries
-        total_clicks = queries_df['Clicks'].sum()
-        top10_clicks = queries_sorted.head(10)['Clicks'].sum()
-        
-        print(f"\nTop 10 queries account for {(top10_clicks/total_clicks)*100:.2f}% of all clicks")
-    
-    # Store domain details for HTML report
+        record['rows'] = len(dates_df) if dates_df is not None else 0
+
+    with profiling.stage('breakdowns', domain_name):
+        # Analyze countries data
+        if countries_df is not None:
+            print("\n--- Countries Analysis ---")
+            # Sort by clicks in descending order
+            countries_sorted = countries_df.sort_values('Clicks', ascending=False)
+
+            print("Top 5 Countries by Clicks:")
+            print(countries_sorted.head(5))
+
+            # Calculate percentage of total clicks and impressions
+            total_clicks = countries_df['Clicks'].sum()
+            total_impressions = countries_df['Impressions'].sum()
+
+            countries_df['Click %'] = (countries_df['Clicks'] / total_clicks) * 100
+            countries_df['Impression %'] = (countries_df['Impressions'] / total_impressions) * 100
+
+            print("\nCountry Distribution:")
+            print(countries_df[['Country', 'Clicks', 'Click %', 'Impressions', 'Impression %']].head(10))
+
+        # Analyze devices data
+        if devices_df is not None:
+            print("\n--- Devices Analysis ---")
+            print(devices_df)
+
+            # Calculate percentage of total for each device
+            total_clicks = devices_df['Clicks'].sum()
+            total_impressions = devices_df['Impressions'].sum()
+
+            devices_df['Click %'] = (devices_df['Clicks'] / total_clicks) * 100
+            devices_df['Impression %'] = (devices_df['Impressions'] / total_impressions) * 100
+
+            print("\nDevice Distribution:")
+            print(devices_df[['Device', 'Clicks', 'Click %', 'Impressions', 'Impression %']])
+
+        # Analyze top pages
+        if pages_sorted is not None:
+            print("\n--- Top Pages Analysis ---")
+            print("Top 10 Pages by Clicks:")
+            print(pages_sorted.head(10))
+
+            # Calculate what percentage of total traffic goes to top 10 pages
+            total_clicks = pages_totals['Clicks']
+            top10_clicks = pages_sorted.head(10)['Clicks'].sum()
+
+            print(f"\nTop 10 pages account for {(top10_clicks/total_clicks)*100:.2f}% of all clicks")
+
+        # Analyze top queries
+        if queries_sorted is not None:
+            print("\n--- Top Queries Analysis ---")
+            print("Top 10 Queries by Clicks:")
+            print(queries_sorted.head(10))
+
+            # Calculate what percentage of total traffic comes from top 10 queries
+            total_clicks = queries_totals['Clicks']
+            top10_clicks = queries_sorted.head(10)['Clicks'].sum()
+
+            print(f"\nTop 10 queries account for {(top10_clicks/total_clicks)*100:.2f}% of all clicks")
+
+    # Keep only the slim report fragment; full frames can be reloaded on demand
+    # with loader.load_domain_frames(domain_details['folder'])
     domain_details = {
-        'dates': dates_df,
-        'countries': countries_df,
+        'folder': domain_folder,
+        'daily': dates_df[['Date', 'Clicks', 'Impressions']].reset_index(drop=True) if dates_df is not None else None,
         'devices': devices_df,
-        'pages': pages_df.sort_values('Clicks', ascending=False) if pages_df is not None else None,
-        'queries': queries_df.sort_values('Clicks', ascending=False) if queries_df is not None else None
+        'pages': pages_sorted.head(REPORT_TOP_N) if pages_sorted is not None else None,
+        'queries': queries_sorted.head(REPORT_TOP_N) if queries_sorted is not None else None,
+        'totals': {'dates': dates_sums if dates_df is not None else None,
+                   'pages': pages_totals, 'queries': queries_totals},
+        'sketches': query_sketches if queries_sorted is not None else None,
     }
-    
+
     return {
         'domain': os.path.basename(domain_folder),
         'total_clicks': dates_df['Clicks'].sum() if dates_df is not None else 0,
@@ -708,49 +188,642 @@ def analyze_domain(domain_folder):
         'avg_position': avg_position if dates_df is not None else 0
     }, domain_details
 
-def main():
-    # Find all domain folders in the data directory
-    data_dir = "data"
-    domain_folders = [os.path.join(data_dir, folder) for folder in os.listdir(data_dir) 
-                     if os.path.isdir(os.path.join(data_dir, folder))]
+def _analyze_domain_captured(folder):
+    """Run analyze_domain in a worker, capturing its console output.
+
+    Returns a (folder, summary, details, output, error, profile records)
+    tuple so the parent process can print each domain's output as one block,
+    carry on when a single folder fails, and keep the worker's timings.
+    """
+    buffer = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(buffer):
+            summary, details = analyze_domain(folder)
+        return folder, summary, details, buffer.getvalue(), None, profiling.drain()
+    except Exception as e:
+        return folder, None, None, buffer.getvalue(), f"{type(e).__name__}: {e}", profiling.drain()
+
+def _init_worker(cache_settings, streaming_settings):
+    """Apply the parent's options in a freshly started worker process."""
+    cache.configure(**cache_settings)
+    streaming.configure(**streaming_settings)
+
+def analyze_domains(domain_folders, workers=1, prefetch_depth=0, prefetch_mb=prefetch.DEFAULT_BUDGET_MB):
+    """Analyze every domain folder, optionally fanning out over a process pool.
+
+    Results are yielded in the order of ``domain_folders`` regardless of which
+    worker finishes first, so the summary and report stay deterministic.
+    When running in a single process, ``prefetch_depth`` > 0 loads the next
+    folders' CSV files in background threads while the current one is analyzed.
+    """
+    if workers <= 1:
+        if prefetch_depth > 0:
+            loaded = prefetch.prefetch_domains(domain_folders, depth=prefetch_depth, budget_mb=prefetch_mb)
+        else:
+            loaded = ((folder, None, None) for folder in domain_folders)
+        # Load errors of prefetched files are printed by analyze_domain, in this folder's output
+        for folder, frames, errors in loaded:
+            try:
+                summary, details = analyze_domain(folder, frames, errors)
+                yield folder, summary, details, None
+            except Exception as e:
+                yield folder, None, None, f"{type(e).__name__}: {e}"
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Worker processes get the parent's cache options, whatever the start method
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(cache.settings(), streaming.settings())) as executor:
+        # map() hands results back in submission order
+        for folder, summary, details, output, error, records in executor.map(_analyze_domain_captured,
+                                                                             domain_folders):
+            print(output, end='')
+            profiling.extend(records)
+            yield folder, summary, details, error
+
+def _data_options():
+    """Parser with the --data-dir and export cache options shared by the analysis run and the commands."""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--data-dir', default="data",
+                        help="Directory containing one export folder per domain (default: data)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Parse every CSV from scratch without reading or writing the export cache")
+    parser.add_argument('--cache-dir', default=cache.DEFAULT_CACHE_DIR,
+                        help=f"Directory for cached parsed exports (default: {cache.DEFAULT_CACHE_DIR})")
+    return parser
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Analyze Google Search Console exports for multiple domains.",
+                                     epilog="Other commands: 'index build|search', 'compare', 'serve', 'ingest', 'query' "
+                                            "(see 'main.py <command> --help').",
+                                     parents=[_data_options()])
+    parser.add_argument('--domain', action='append', metavar='PATTERN',
+                        help="Only analyze domains matching PATTERN (e.g. 'example.com' or '*.example.com'); "
+                             "repeat for several")
+    parser.add_argument('--since', type=date.fromisoformat, metavar='YYYY-MM-DD',
+                        help="Only analyze exports dated on or after this day (from the folder name)")
+    parser.add_argument('--all-exports', action='store_true',
+                        help="Analyze every export folder instead of only the latest export of each domain")
+    parser.add_argument('--report-dir', default="reports",
+                        help="Directory the HTML report is written to (default: reports)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Number of processes used to analyze domains in parallel (default: 1)")
+    parser.add_argument('--stream-threshold-mb', type=float, default=streaming.DEFAULT_THRESHOLD_MB,
+                        help="Read Queries.csv/Pages.csv files larger than this in chunks, keeping only "
+                             f"totals and top rows (default: {streaming.DEFAULT_THRESHOLD_MB})")
+    parser.add_argument('--consolidate', metavar='DIR',
+                        help="Also write long-format tables of all domains' exports to DIR "
+                             "(Feather when pyarrow is installed, pickle otherwise)")
+    parser.add_argument('--memory-report', action='store_true',
+                        help="Print per-domain memory use of the loaded exports with pandas defaults vs the compact schema")
+    parser.add_argument('--split', action='store_true',
+                        help="Write the report as a directory (search_console_report/ in --report-dir): an index "
+                             "page with a sortable, paginated domain table and one page per domain; only pages of "
+                             "changed domains are rewritten")
+    parser.add_argument('--charts', choices=charts.CHART_MODES, default='embed',
+                        help="Embed charts in the report, link to PNG files next to it, or leave them out")
+    parser.add_argument('--chart-dir', default=charts.DEFAULT_CHARTS_DIR,
+                        help="Directory for rendered charts, reused while a domain's data is unchanged")
+    parser.add_argument('--chart-max-mb', type=int, default=charts.DEFAULT_MAX_MB,
+                        help=f"Evict least recently used charts above this size (default: {charts.DEFAULT_MAX_MB})")
+    parser.add_argument('--profile', action='store_true',
+                        help="Also run under cProfile and tracemalloc and write their output next to the report")
+    parser.add_argument('--watch', action='store_true',
+                        help="Stay running and update the report whenever export folders are added or change, "
+                             "re-analyzing only those folders (rewrites search_console_report.html, or with --split the "
+                             "index and the changed domain pages in search_console_report/)")
+    parser.add_argument('--watch-interval', type=float, default=2.0, metavar='SECONDS',
+                        help="How often --watch checks the data directory for changes (default: 2)")
+    parser.add_argument('--full', action='store_true',
+                        help="Re-analyze every domain instead of reusing results for unchanged export folders")
+    parser.add_argument('--results-dir', default=manifest.DEFAULT_RESULTS_DIR,
+                        help=f"Directory for persisted per-domain results (default: {manifest.DEFAULT_RESULTS_DIR})")
+    parser.add_argument('--prefetch', type=int, default=0, metavar='N',
+                        help="Load the next N domains' CSV files in background threads while analyzing "
+                             "(single-process runs only; default: 0, off)")
+    parser.add_argument('--prefetch-mb', type=float, default=prefetch.DEFAULT_BUDGET_MB,
+                        help="Maximum on-disk size of CSV files being prefetched at once "
+                             f"(default: {prefetch.DEFAULT_BUDGET_MB})")
+    parser.add_argument('--rebuild-cache', action='store_true',
+                        help="Ignore existing cache entries and re-parse every CSV, refreshing the cache")
+    parser.add_argument('--cache-max-mb', type=int, default=cache.DEFAULT_MAX_MB,
+                        help=f"Evict least recently used cache entries above this size (default: {cache.DEFAULT_MAX_MB})")
+    args = parser.parse_args(argv)
+    if args.watch and args.profile:
+        parser.error("--profile cannot be combined with --watch")
+    return args
+
+def run(args, state=None):
+    """Run the analysis and write the HTML report; returns the report path.
+
+    ``state`` is a dict kept by ``--watch`` between runs, holding the
+    fingerprint, summary and details of every analyzed folder in memory.
+    It is updated in place.
+    """
+    import pandas as pd
+
+    import aggregate
+    import schema
+    import sketches
+    import timeseries
+    from report import SPLIT_PAGES_DIR, write_html_report, write_split_report
+    from stats import describe_metrics
+
+    cache.configure(enabled=not args.no_cache, rebuild=args.rebuild_cache,
+                    cache_dir=args.cache_dir, max_mb=args.cache_max_mb)
+    streaming.configure(threshold_mb=args.stream_threshold_mb)
+    
+    report_dir = args.report_dir
+    os.makedirs(report_dir, exist_ok=True)
+    if args.split:
+        # One directory across runs, so pages of unchanged domains are kept
+        split_dir = os.path.join(report_dir, "search_console_report")
+        report_path = os.path.join(split_dir, "index.html")
+    else:
+        # --watch keeps rewriting one report so it can simply be reloaded
+        report_name = ("search_console_report.html" if args.watch
+                       else f"search_console_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html")
+        report_path = os.path.join(report_dir, report_name)
     
-    # Analyze each domain
+    with profiling.stage('discovery') as record:
+        # Find the export folders to analyze, filtering on their names before any CSV is opened
+        exports = discovery.scan(args.data_dir)
+        selected = discovery.select(exports, domains=args.domain, since=args.since,
+                                    latest_only=not args.all_exports)
+        domain_folders = [export.path for export in selected]
+        if len(selected) < len(exports):
+            print(f"Analyzing {len(selected)} of {len(exports)} export folders "
+                  "(older exports of a domain and filtered folders are skipped; see --all-exports)")
+        
+        # Reuse results for folders whose files have not changed since the last run
+        results = manifest.ResultsManifest(args.results_dir)
+        fingerprints = {folder: manifest.folder_fingerprint(folder) for folder in domain_folders}
+        domain_results = {}
+        if state is not None and not args.full:
+            # Results of the previous --watch run are still in memory
+            for folder in domain_folders:
+                entry = state.get(folder)
+                if entry is not None and entry[0] == fingerprints[folder]:
+                    domain_results[folder] = entry[1:]
+        if not args.full:
+            for folder in domain_folders:
+                if folder in domain_results:
+                    continue
+                cached = results.lookup(folder, fingerprints[folder])
+                if cached is not None:
+                    domain_results[folder] = cached
+            if domain_results:
+                print(f"Reusing results for {len(domain_results)} of {len(domain_folders)} domains")
+        record['rows'] = len(domain_folders)
+    
+    # Analyze each new or changed domain
+    with profiling.stage('analysis') as record:
+        changed_folders = [folder for folder in domain_folders if folder not in domain_results]
+        for folder, summary, details, error in analyze_domains(changed_folders, workers=args.workers,
+                                                               prefetch_depth=args.prefetch,
+                                                               prefetch_mb=args.prefetch_mb):
+            if error is not None:
+                print(f"\nSkipping {os.path.basename(folder)}: {error}")
+                continue
+            results.store(folder, fingerprints[folder], summary, details)
+            domain_results[folder] = (summary, details)
+        
+        # Only forget folders that are gone, not those left out by --domain/--since
+        results.prune([export.path for export in exports])
+        results.save()
+        record['rows'] = len(changed_folders)
+    
+    if state is not None:
+        state.clear()
+        state.update((folder, (fingerprints[folder],) + tuple(domain_results[folder])) for folder in domain_results)
+    
+    # Merge in folder order so the summary and report do not depend on what was cached
     domain_summaries = []
     all_domain_details = {}
-    
     for folder in domain_folders:
-        domain_name = os.path.basename(folder)
-        summary, details = analyze_domain(folder)
-        domain_summaries.append(summary)
-        all_domain_details[domain_name] = details
+        if folder in domain_results:
+            summary, details = domain_results[folder]
+            domain_summaries.append(summary)
+            all_domain_details[os.path.basename(folder)] = details
+    
+    if not args.no_cache:
+        cache.evict()
     
     # Create a summary dataframe for all domains
+    metric_stats = None
+    portfolio = None
     if domain_summaries:
-        summary_df = pd.DataFrame(domain_summaries)
-        print("\n--- Overall Summary for All Domains ---")
-        print(summary_df)
-        
-        # Calculate aggregate statistics
-        print("\nAggregate Statistics:")
-        print(f"Total Clicks Across All Domains: {summary_df['total_clicks'].sum()}")
-        print(f"Total Impressions Across All Domains: {summary_df['total_impressions'].sum()}")
-        print(f"Average CTR Across All Domains: {summary_df['avg_ctr'].mean():.2f}%")
-        print(f"Average Position Across All Domains: {summary_df['avg_position'].mean():.2f}")
-        print(f"Best Performing Domain (by clicks): {summary_df.loc[summary_df['total_clicks'].idxmax()]['domain']}")
-        print(f"Best Performing Domain (by CTR): {summary_df.loc[summary_df['avg_ctr'].idxmax()]['domain']}")
+        with profiling.stage('aggregation') as record:
+            summary_df = pd.DataFrame(domain_summaries)
+            # Portfolio CTR and position from the domains' summed clicks, impressions and position weights
+            portfolio = aggregate.finalize(aggregate.merge(
+                [details['totals']['dates'] for details in all_domain_details.values()]))
+            print("\n--- Overall Summary for All Domains ---")
+            print(summary_df)
+            
+            # Calculate aggregate statistics once for the console and the report
+            metric_stats = describe_metrics(summary_df)
+            print("\nAggregate Statistics:")
+            print(f"Total Clicks Across All Domains: {metric_stats['total_clicks'].total:.0f}")
+            print(f"Total Impressions Across All Domains: {metric_stats['total_impressions'].total:.0f}")
+            if portfolio is not None:
+                print(f"Average CTR Across All Domains: {portfolio['CTR']:.2f}% (total clicks / total impressions)")
+                print(f"Average Position Across All Domains: {portfolio['Position']:.2f} (weighted by impressions)")
+            print(f"Best Performing Domain (by clicks): {metric_stats['total_clicks'].max_label}")
+            print(f"Best Performing Domain (by CTR): {metric_stats['avg_ctr'].max_label}")
+            record['rows'] = len(summary_df)
     
-    # Generate HTML report
-    html_report = generate_html_report(domain_summaries, all_domain_details)
+    # Portfolio-wide query percentiles and top queries from the merged per-domain sketches
+    query_sketches = None
+    if all_domain_details:
+        with profiling.stage('sketches') as record:
+            query_sketches = sketches.QuerySketches.merge_all(
+                details.get('sketches') for details in all_domain_details.values())
+            if query_sketches.rows:
+                print(f"\n--- Query-Level Percentiles Across the Portfolio ({query_sketches.rows} queries, approximate) ---")
+                print(query_sketches.percentiles().round(2))
+                print("\n--- Top Queries Across the Portfolio (clicks between min and max) ---")
+                top_queries = query_sketches.top_queries()
+                if top_queries.empty:
+                    print(f"No query is guaranteed more than {query_sketches.heavy_hitters.threshold:.0f} clicks")
+                else:
+                    print(top_queries.to_string(index=False))
+            record['rows'] = query_sketches.rows
     
-    # Save HTML report to file
-    report_dir = "reports"
-    os.makedirs(report_dir, exist_ok=True)
-    report_path = os.path.join(report_dir, f"search_console_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html")
+    # Rolling windows, WoW/YoY and anomalies for all domains at once
+    trends = None
+    if all_domain_details:
+        with profiling.stage('trends') as record:
+            trends = timeseries.trends({domain_name: details.get('daily')
+                                        for domain_name, details in all_domain_details.items()})
+            if len(trends):
+                print("\n--- Recent Trends (as of each domain's last day) ---")
+                print(trends[['domain', 'last_date', 'clicks_7d', 'clicks_wow', 'clicks_28d', 'clicks_yoy',
+                              'ctr_28d', 'clicks_anomalies', 'impressions_anomalies']].round(2).to_string(index=False))
+            record['rows'] = len(trends)
+    
+    if args.memory_report:
+        with profiling.stage('memory_report'):
+            print("\n--- Memory Usage per Domain (pandas defaults vs compact schema) ---")
+            for folder in domain_folders:
+                print(f"\n{os.path.basename(folder)}")
+                print(schema.memory_report(folder).to_string(index=False))
+    
+    # Build portfolio-wide tables from every domain's exports
+    if args.consolidate:
+        import consolidate
+
+        with profiling.stage('consolidate') as record:
+            consolidated = consolidate.consolidate([folder for folder in domain_folders if folder in domain_results])
+            if 'queries' in consolidated:
+                print("\n--- Queries Ranking for the Most Domains ---")
+                print(consolidate.query_reach(consolidated['queries']))
+            if 'devices' in consolidated:
+                print("\n--- Device Share Across the Portfolio ---")
+                print(consolidate.device_share(consolidated['devices']))
+            paths = consolidate.write_consolidated(consolidated, args.consolidate)
+            print(f"\nConsolidated tables written: {', '.join(paths)}")
+            record['rows'] = sum(len(df) for df in consolidated.values())
     
-    with open(report_path, 'w', encoding='utf-8') as f:
-        f.write(html_report)
+    # Render missing charts and point the report at the cached images
+    chart_sources = {}
+    # Linked charts sit next to the pages that show them
+    chart_page_dir = os.path.join(split_dir, SPLIT_PAGES_DIR) if args.split else report_dir
+    if args.charts != 'off':
+        with profiling.stage('charts') as record:
+            chart_keys = charts.render_charts(all_domain_details, args.chart_dir, workers=args.workers)
+            chart_sources = charts.chart_sources(chart_keys, args.charts, args.chart_dir, chart_page_dir)
+            charts.evict(args.chart_dir, args.chart_max_mb, keep=chart_keys.values())
+            record['rows'] = len(chart_keys)
+    if args.charts != 'link':
+        # Copies linked by an earlier --charts link run are no longer shown
+        charts.prune_linked(chart_page_dir)
+    
+    # Generate HTML report, streaming it straight to the file
+    with profiling.stage('report') as record:
+        if args.split:
+            # A domain page changes with its export folder or the shape of the stored results
+            page_keys = {os.path.basename(folder): f"{manifest.RESULTS_VERSION}|{fingerprints[folder]}"
+                         for folder in domain_results}
+            _, written = write_split_report(split_dir, domain_summaries, all_domain_details, metric_stats,
+                                            chart_sources, trends, portfolio, query_sketches, page_keys=page_keys,
+                                            workers=args.workers)
+            print(f"Wrote {written} of {len(all_domain_details)} domain pages")
+        else:
+            write_html_report(report_path, domain_summaries, all_domain_details, metric_stats, chart_sources, trends,
+                              portfolio, query_sketches)
+        record['rows'] = len(domain_summaries)
     
     print(f"\nHTML report generated: {report_path}")
+    return report_path
+
+def index_command(argv):
+    """Build or search the query/page index (``main.py index build|search``)."""
+    import search_index
+
+    parser = argparse.ArgumentParser(prog="main.py index",
+                                     description="Cross-domain index of Top queries and Top pages.")
+    parser.add_argument('--index-dir', default=search_index.DEFAULT_INDEX_DIR,
+                        help=f"Directory holding the index (default: {search_index.DEFAULT_INDEX_DIR})")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help="Index every domain's Queries.csv and Pages.csv",
+                                parents=[_data_options()])
+    build.add_argument('--full', action='store_true',
+                       help="Re-read every domain instead of only those whose export folder changed")
+
+    search = commands.add_parser('search', help="Find the domains, queries and pages matching TEXT")
+    search.add_argument('text')
+    mode = search.add_mutually_exclusive_group()
+    mode.add_argument('--prefix', dest='mode', action='store_const', const='prefix',
+                      help="Match the last word as a prefix")
+    mode.add_argument('--substring', dest='mode', action='store_const', const='substring',
+                      help="Match each word anywhere inside a word or path segment")
+    mode.add_argument('--exact', dest='mode', action='store_const', const='exact',
+                      help="Match the whole query or page URL (ignoring case)")
+    search.add_argument('--kind', choices=search_index.KINDS, help="Only search queries or only pages")
+    search.add_argument('--limit', type=int, default=20, help="Rows to show, by clicks (default: 20)")
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        cache.configure(enabled=not args.no_cache, cache_dir=args.cache_dir)
+        domain_folders = discovery.find_domain_folders(args.data_dir)
+        start = time.perf_counter()
+        reread = search_index.build_index(domain_folders, args.index_dir, full=args.full)
+        index = search_index.SearchIndex(args.index_dir)
+        print(f"Indexed {index.meta['rows']} rows and {index.meta['tokens']} tokens from {len(domain_folders)} "
+              f"domains ({reread} re-read) in {time.perf_counter() - start:.2f}s")
+        return
+
+    import pandas as pd
+
+    try:
+        index = search_index.SearchIndex(args.index_dir)
+    except FileNotFoundError as e:
+        print(e)
+        sys.exit(1)
+    start = time.perf_counter()
+    rows = index.search(args.text, mode=args.mode or 'terms', kind=args.kind)
+    results = index.results(rows, limit=args.limit)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if results.empty:
+        print(f"No matches for '{args.text}' ({elapsed_ms:.1f} ms)")
+        return
+    with pd.option_context('display.max_colwidth', 80, 'display.width', 200):
+        print(results.to_string(index=False))
+    domains = len(set(index.domain[rows].tolist()))
+    print(f"\n{len(rows)} matching rows across {domains} domains, top {len(results)} by clicks shown "
+          f"({elapsed_ms:.1f} ms)")
+
+def compare_command(argv):
+    """Compare successive exports of the same domains (``main.py compare``)."""
+    import compare
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(prog="main.py compare",
+                                     description="Period-over-period changes in Top queries and Top pages "
+                                                 "between two exports of the same domain.",
+                                     parents=[_data_options()])
+    parser.add_argument('folders', nargs='*', metavar='FOLDER',
+                        help="Two export folders (older first) to compare; by default the latest two exports "
+                             "of every domain in --data-dir are compared")
+    parser.add_argument('--domain', action='append', metavar='PATTERN',
+                        help="Only compare domains matching PATTERN; repeat for several")
+    parser.add_argument('--all-pairs', action='store_true',
+                        help="Compare every pair of successive exports, not only the latest two")
+    parser.add_argument('--table', choices=compare.TABLES, action='append',
+                        help="Only compare queries or pages (default: both)")
+    parser.add_argument('--out-dir', help="Write every full comparison table to this directory as CSV")
+    parser.add_argument('--top', type=int, default=10, help="Biggest gains and losses to show (default: 10)")
+    args = parser.parse_args(argv)
+    if args.folders and len(args.folders) != 2:
+        parser.error("give exactly two export folders, or none to compare the whole data directory")
+
+    cache.configure(enabled=not args.no_cache, cache_dir=args.cache_dir)
+    tables = {table: compare.TABLES[table] for table in args.table or compare.TABLES}
+    start = time.perf_counter()
+
+    with pd.option_context('display.max_colwidth', 60, 'display.width', 200):
+        if args.folders:
+            diffs = compare.compare_exports(args.folders[0], args.folders[1], tables)
+            for table, diff in diffs.items():
+                print(f"\n{table.title()}: {compare.summarize(diff)}")
+                gains, losses = compare.movers(diff, args.top)
+                label = tables[table][1]
+                columns = [label, 'status', 'clicks_before', 'clicks_after', 'clicks_delta', 'ctr_delta',
+                           'position_delta']
+                print(f"\nBiggest gains:\n{gains[columns].round(2).to_string(index=False)}")
+                print(f"\nBiggest losses:\n{losses[columns].round(2).to_string(index=False)}")
+                if args.out_dir:
+                    os.makedirs(args.out_dir, exist_ok=True)
+                    diff.to_csv(os.path.join(args.out_dir, f"{table}.csv"), index=False)
+        else:
+            summary = compare.compare_portfolio(args.data_dir, domains=args.domain, all_pairs=args.all_pairs,
+                                                out_dir=args.out_dir, tables=tables)
+            if summary.empty:
+                print(f"No domain in {args.data_dir} has two dated exports to compare")
+                return
+            print(summary.to_string(index=False))
+
+    print(f"\nCompared in {time.perf_counter() - start:.2f}s")
+    if args.out_dir:
+        print(f"Comparison tables written to {args.out_dir}")
+
+def serve_command(argv):
+    """Serve domain results as JSON over HTTP (``main.py serve``)."""
+    import server
+
+    parser = argparse.ArgumentParser(prog="main.py serve",
+                                     description="Local HTTP API with each domain's summary, top queries and "
+                                                 "pages, device split and monthly series as JSON.",
+                                     parents=[_data_options()])
+    parser.add_argument('--domain', action='append', metavar='PATTERN',
+                        help="Only serve domains matching PATTERN; repeat for several")
+    parser.add_argument('--host', default=server.DEFAULT_HOST,
+                        help=f"Address to listen on (default: {server.DEFAULT_HOST})")
+    parser.add_argument('--port', type=int, default=server.DEFAULT_PORT,
+                        help=f"Port to listen on (default: {server.DEFAULT_PORT})")
+    parser.add_argument('--cache-entries', type=int, default=server.DEFAULT_CACHE_ENTRIES,
+                        help="Domain results and responses kept in memory, each "
+                             f"(default: {server.DEFAULT_CACHE_ENTRIES})")
+    parser.add_argument('--results-dir', default=manifest.DEFAULT_RESULTS_DIR,
+                        help=f"Directory for persisted per-domain results (default: {manifest.DEFAULT_RESULTS_DIR})")
+    args = parser.parse_args(argv)
+
+    cache.configure(enabled=not args.no_cache, cache_dir=args.cache_dir)
+    domain_results = server.DomainResults(args.data_dir, _analyze_domain_captured, results_dir=args.results_dir,
+                                          domains=args.domain, cache_entries=args.cache_entries)
+    httpd = server.make_server(server.API(domain_results, cache_entries=args.cache_entries), args.host, args.port)
+    print(f"Serving {args.data_dir} at http://{args.host}:{httpd.server_port}/api/domains; press Ctrl+C to stop")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopped serving")
+    finally:
+        httpd.server_close()
+
+def ingest_command(argv):
+    """Load every domain's exports into the SQLite store (``main.py ingest``)."""
+    import store
+
+    parser = argparse.ArgumentParser(prog="main.py ingest",
+                                     description="Load the exports into a local SQLite database for 'main.py query'.",
+                                     parents=[_data_options()])
+    parser.add_argument('--domain', action='append', metavar='PATTERN',
+                        help="Only ingest domains matching PATTERN; repeat for several")
+    parser.add_argument('--since', type=date.fromisoformat, metavar='YYYY-MM-DD',
+                        help="Only ingest exports dated on or after this day")
+    parser.add_argument('--all-exports', action='store_true',
+                        help="Ingest every export folder instead of only the latest export of each domain")
+    parser.add_argument('--store', default=store.DEFAULT_STORE_PATH,
+                        help=f"Database file (default: {store.DEFAULT_STORE_PATH})")
+    parser.add_argument('--full', action='store_true',
+                        help="Reload every export instead of only new or changed folders")
+    args = parser.parse_args(argv)
+
+    cache.configure(enabled=not args.no_cache, cache_dir=args.cache_dir)
+    exports = discovery.scan(args.data_dir)
+    selected = discovery.select(exports, domains=args.domain, since=args.since, latest_only=not args.all_exports)
+    start = time.perf_counter()
+    # Only forget exports that are gone, not those left out by the filters
+    ingested, rows = store.ingest(selected, args.store, full=args.full,
+                                  known_folders=[export.path for export in exports])
+    print(f"Ingested {ingested} of {len(selected)} export folders ({rows} rows) into {args.store} "
+          f"in {time.perf_counter() - start:.2f}s")
+
+def query_command(argv):
+    """Run SQL against the SQLite store (``main.py query``)."""
+    import pandas as pd
+
+    import store
+
+    parser = argparse.ArgumentParser(prog="main.py query",
+                                     description="Run a SQL query against the database written by 'main.py ingest'. "
+                                                 "Tables: exports, countries, dates, devices, pages, queries, "
+                                                 "search_appearance.")
+    parser.add_argument('sql', help="The query, or '-' to read it from standard input")
+    parser.add_argument('--store', default=store.DEFAULT_STORE_PATH,
+                        help=f"Database file (default: {store.DEFAULT_STORE_PATH})")
+    parser.add_argument('--format', choices=('table', 'csv', 'json'), default='table',
+                        help="Output format (default: table)")
+    args = parser.parse_args(argv)
+
+    sql = sys.stdin.read() if args.sql == '-' else args.sql
+    start = time.perf_counter()
+    try:
+        result = store.query(sql, args.store)
+    except FileNotFoundError as e:
+        print(e)
+        sys.exit(1)
+    except Exception as e:
+        print(f"Query failed: {e}")
+        sys.exit(1)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if args.format == 'csv':
+        result.to_csv(sys.stdout, index=False)
+    elif args.format == 'json':
+        print(result.to_json(orient='records', date_format='iso'))
+    else:
+        with pd.option_context('display.max_colwidth', 80, 'display.width', 200, 'display.max_rows', None):
+            print(result.to_string(index=False))
+        print(f"\n{len(result)} rows ({elapsed_ms:.1f} ms)")
+
+def _write_run_profile(report_path):
+    """Write the per-stage and per-domain timings next to the report."""
+    json_path, _ = profiling.write_profile(os.path.splitext(report_path)[0] + ".profile")
+    print(f"Run profile written: {json_path}")
+
+def watch(args):
+    """Run the analysis, then rerun it whenever export folders change, until interrupted (``--watch``).
+
+    Unchanged domains are taken from memory, so an update only analyzes the
+    new or changed folders before the report is rewritten.
+    """
+    import watcher
+
+    state = {}
+    folder_watcher = watcher.Watcher(args.data_dir, interval=args.watch_interval)
+    # Taken before the first run so exports landing during it are picked up
+    snapshot = watcher.snapshot(args.data_dir)
+    try:
+        _write_run_profile(run(args, state))
+        # From here on, reuse what is in memory
+        args.full = args.rebuild_cache = False
+        while True:
+            print(f"\nWatching {args.data_dir} for new or changed exports ({folder_watcher.mode}); "
+                  "press Ctrl+C to stop")
+            current = folder_watcher.wait(snapshot)
+            changed = watcher.changed_folders(snapshot, current)
+            snapshot = current
+            print(f"\nExport folders changed: {', '.join(os.path.basename(folder) for folder in changed)}")
+            start = time.perf_counter()
+            profiling.drain()
+            try:
+                report_path = run(args, state)
+            except Exception as e:
+                # Keep watching; a half-copied export is analyzed again once it changes
+                print(f"Error updating the report: {e}")
+                continue
+            _write_run_profile(report_path)
+            print(f"Report updated in {time.perf_counter() - start:.2f}s")
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+    finally:
+        folder_watcher.close()
+
+# Subcommands; anything else is a regular analysis run
+COMMANDS = {
+    'index': index_command,
+    'compare': compare_command,
+    'serve': serve_command,
+    'ingest': ingest_command,
+    'query': query_command,
+}
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] in COMMANDS:
+        return COMMANDS[argv[0]](argv[1:])
+    
+    args = parse_args(argv)
+    if args.watch:
+        return watch(args)
+    
+    if not args.profile:
+        report_path = run(args)
+    else:
+        # Wrap the whole run in cProfile and tracemalloc; this slows it down noticeably
+        import cProfile
+        import pstats
+        import tracemalloc
+        
+        profiler = cProfile.Profile()
+        tracemalloc.start(25)
+        profiler.enable()
+        try:
+            report_path = run(args)
+        finally:
+            profiler.disable()
+            snapshot = tracemalloc.take_snapshot()
+            _, traced_peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        
+        base_path = os.path.splitext(report_path)[0]
+        profiler.dump_stats(f"{base_path}.prof")
+        with open(f"{base_path}.cprofile.txt", 'w', encoding='utf-8') as f:
+            pstats.Stats(profiler, stream=f).sort_stats('cumulative').print_stats(50)
+        with open(f"{base_path}.tracemalloc.txt", 'w', encoding='utf-8') as f:
+            f.write(f"Peak traced memory: {traced_peak / 1024 / 1024:.1f} MB\n\nTop allocation sites:\n")
+            for stat in snapshot.statistics('lineno')[:25]:
+                f.write(f"{stat}\n")
+        print(f"cProfile and tracemalloc output written next to the report: {base_path}.*")
+    
+    # Per-stage and per-domain timings next to the report
+    _write_run_profile(report_path)
 
 if __name__ == "__main__":
     main()
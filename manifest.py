@@ -0,0 +1,111 @@
+"""Persisted per-domain analysis results for incremental runs.
+
+The manifest maps each export folder to a fingerprint of its CSV files and
+to a pickle holding the domain summary plus the report fragment returned by
+analyze_domain. On the next run only folders whose fingerprint changed are
+analyzed again; everything else is loaded from here.
+
+A CLI run and the API server can share one results directory, so ``save``
+merges this instance's changes into the manifest on disk under a lock
+instead of overwriting the other's entries. Each pickle also records the
+fingerprint it was computed for, and ``lookup`` checks it.
+"""
+import hashlib
+import json
+import os
+import pickle
+
+from atomic import atomic_write, file_lock
+
+# Bump when analyze_domain's summary or report details change shape, or exports are parsed differently
+RESULTS_VERSION = 9
+
+DEFAULT_RESULTS_DIR = os.path.join(".cache", "results")
+MANIFEST_FILE = "manifest.json"
+LOCK_FILE = "manifest.lock"
+
+
+def folder_fingerprint(folder):
+    """Return a hash of the names, sizes and mtimes of the files in ``folder``."""
+    parts = []
+    for entry in sorted(os.scandir(folder), key=lambda e: e.name):
+        if entry.is_file():
+            stat = entry.stat()
+            parts.append(f"{entry.name}|{stat.st_size}|{stat.st_mtime_ns}")
+    return hashlib.sha1("\n".join(parts).encode('utf-8')).hexdigest()
+
+
+class ResultsManifest:
+    """Folder fingerprints and cached analysis results stored under ``results_dir``."""
+
+    def __init__(self, results_dir=DEFAULT_RESULTS_DIR):
+        self.results_dir = results_dir
+        self.entries = self._read()
+        # Changes since the last save, merged into the manifest on disk by save()
+        self._stored = {}
+        self._removed = set()
+
+    def _read(self):
+        path = os.path.join(self.results_dir, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Ignoring unreadable results manifest: {e}")
+            return {}
+        return data.get('domains', {}) if data.get('version') == RESULTS_VERSION else {}
+
+    def _result_path(self, domain_name):
+        key = hashlib.sha1(domain_name.encode('utf-8')).hexdigest()
+        return os.path.join(self.results_dir, key + '.pkl')
+
+    def lookup(self, folder, fingerprint):
+        """Return the cached (summary, details) for ``folder`` or None if stale or missing."""
+        domain_name = os.path.basename(folder)
+        entry = self.entries.get(domain_name)
+        if entry is None or entry['fingerprint'] != fingerprint:
+            return None
+        try:
+            with open(self._result_path(domain_name), 'rb') as f:
+                stored_fingerprint, summary, details = pickle.load(f)
+        except Exception:
+            return None
+        # Another process may have replaced the pickle since the manifest was read
+        return (summary, details) if stored_fingerprint == fingerprint else None
+
+    def store(self, folder, fingerprint, summary, details):
+        """Persist the analysis result for ``folder``."""
+        domain_name = os.path.basename(folder)
+        os.makedirs(self.results_dir, exist_ok=True)
+        with atomic_write(self._result_path(domain_name)) as f:
+            pickle.dump((fingerprint, summary, details), f, protocol=pickle.HIGHEST_PROTOCOL)
+        self.entries[domain_name] = self._stored[domain_name] = {'fingerprint': fingerprint}
+        self._removed.discard(domain_name)
+
+    def prune(self, folders):
+        """Drop entries (and their result files) for folders that no longer exist."""
+        keep = {os.path.basename(folder) for folder in folders}
+        for domain_name in list(self.entries):
+            if domain_name not in keep:
+                del self.entries[domain_name]
+                self._stored.pop(domain_name, None)
+                self._removed.add(domain_name)
+                try:
+                    os.remove(self._result_path(domain_name))
+                except OSError:
+                    pass
+
+    def save(self):
+        """Merge the entries stored and pruned since the last save into the manifest on disk."""
+        os.makedirs(self.results_dir, exist_ok=True)
+        with file_lock(os.path.join(self.results_dir, LOCK_FILE)):
+            entries = self._read()
+            entries.update(self._stored)
+            for domain_name in self._removed:
+                entries.pop(domain_name, None)
+            with atomic_write(os.path.join(self.results_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+                json.dump({'version': RESULTS_VERSION, 'domains': entries}, f, indent=2, sort_keys=True)
+        self.entries = entries
+        self._stored, self._removed = {}, set()
@@ -0,0 +1,101 @@
+"""Vectorized parsing of locale-formatted numbers in Search Console exports.
+
+Exports come with CTR values such as ``3.45%``, ``3,45 %`` or ``<1%`` and,
+depending on the account locale, metrics with thousands separators
+(``1,234`` / ``1.234``) or decimal commas (``12,5``). Instead of running a
+chain of ``str.replace`` calls over every row, each column is factorized
+first: only the distinct strings are parsed, and the result is scattered
+back to all rows with one integer take. CTR columns typically have a few
+hundred distinct values even in 50k-row Queries.csv files.
+
+Clicks and impressions are whole numbers, so in those columns every ``.``
+and ``,`` is a thousands separator (``1,234`` and ``1.234`` are both 1234).
+For CTR and position, the separator rules for a distinct value are:
+
+- both ``.`` and ``,`` present: the one that comes last is the decimal
+  separator, the other is a thousands separator (``1.234,5`` / ``1,234.5``)
+- only one kind present, exactly once: it is the decimal separator
+  (``12,5`` / ``12.5``), matching what Search Console writes for CTR
+- only one kind present, several times: thousands separators (``1.234.567``)
+
+Values prefixed with ``<`` or ``>`` (``<1%``) are read as their bound.
+Anything unparseable becomes NaN.
+"""
+import numpy as np
+import pandas as pd
+
+# Numeric columns shared by all metric exports (Countries, Dates, Devices, ...)
+METRIC_COLUMNS = ('Clicks', 'Impressions', 'CTR', 'Position')
+# Metric columns holding counts, where "." and "," can only be thousands separators
+INTEGER_COLUMNS = ('Clicks', 'Impressions')
+
+# dtype hints for read_csv: keep CTR as raw strings so pandas does not try
+# (and fail) to infer a type for "3.45%" before we parse it, and counts too,
+# as pandas would read an unquoted "1.234" as a decimal number
+READ_CSV_DTYPES = {'CTR': str, 'Clicks': str, 'Impressions': str}
+
+# Percent signs, whitespace (including non-breaking spaces), Swiss apostrophe
+# thousands separators and "<"/">" bound markers
+_STRIP_PATTERN = r"[%\s'<>]"
+
+
+def _parse_unique(strings, integer=False):
+    """Parse an array of distinct, non-null strings into float64.
+
+    With ``integer`` every ``.`` and ``,`` is dropped as a thousands separator.
+    """
+    s = pd.Series(strings, dtype=object).astype(str).str.replace(_STRIP_PATTERN, '', regex=True)
+    if integer:
+        return pd.to_numeric(s.str.replace(r'[.,]', '', regex=True), errors='coerce').to_numpy(dtype=np.float64)
+
+    last_dot = s.str.rfind('.').to_numpy()
+    last_comma = s.str.rfind(',').to_numpy()
+    dots = s.str.count(r'\.').to_numpy()
+    commas = s.str.count(',').to_numpy()
+
+    both = (dots > 0) & (commas > 0)
+    comma_decimal = (both & (last_comma > last_dot)) | (~both & (commas == 1))
+    dot_thousands = (both & (last_comma > last_dot)) | (~both & (dots > 1))
+    comma_thousands = (both & (last_dot > last_comma)) | (~both & (commas > 1))
+
+    # Remove thousands separators first, then turn a decimal comma into a point
+    s = s.where(~dot_thousands, s.str.replace('.', '', regex=False))
+    s = s.where(~comma_thousands, s.str.replace(',', '', regex=False))
+    s = s.where(~comma_decimal, s.str.replace(',', '.', regex=False))
+
+    return pd.to_numeric(s, errors='coerce').to_numpy(dtype=np.float64)
+
+
+def parse_numbers(values, dtype=np.float64, integer=False):
+    """Parse locale-formatted numbers or percentages into a float array.
+
+    ``values`` can be any array-like; numeric input is only cast. Percent
+    signs are dropped, so ``"3,45 %"`` becomes ``3.45``. Pass ``integer``
+    for count columns, where ``"1,234"`` and ``"1.234"`` both mean 1234.
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return series.to_numpy(dtype=dtype)
+
+    codes, uniques = pd.factorize(series, sort=False)
+    parsed = _parse_unique(np.asarray(uniques, dtype=object), integer=integer).astype(dtype)
+    # factorize marks missing values with -1; map them to NaN
+    return np.append(parsed, np.array([np.nan], dtype=dtype))[codes]
+
+
+def normalize_metrics(df, columns=METRIC_COLUMNS):
+    """Convert the metric columns of ``df`` to numbers in place and return it.
+
+    Columns that pandas already parsed as numbers are left alone.
+    """
+    for column in columns:
+        if column in df.columns and not pd.api.types.is_numeric_dtype(df[column].dtype):
+            df[column] = parse_numbers(df[column], integer=column in INTEGER_COLUMNS)
+    return df
+
+
+def read_export(file_path, **kwargs):
+    """Read a Search Console CSV export with its metric columns already numeric."""
+    dtype = dict(READ_CSV_DTYPES)
+    dtype.update(kwargs.pop('dtype', None) or {})
+    return normalize_metrics(pd.read_csv(file_path, dtype=dtype, **kwargs))
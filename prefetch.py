@@ -0,0 +1,76 @@
+"""Background loading of upcoming export folders.
+
+While one domain is being analyzed, a small thread pool already reads the
+CSV files of the next folders, so disk and network latency overlap with
+the analysis. ``depth`` bounds how many folders are loaded ahead, and
+``budget_mb`` bounds the on-disk size of the files in flight (one folder is
+always allowed, however large). Folders are yielded in their original
+order, each with the errors of the files that failed to load, so they are
+reported in that folder's output rather than from a background thread.
+"""
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cache
+import streaming
+
+DEFAULT_DEPTH = 2
+DEFAULT_BUDGET_MB = 256
+
+
+def _prefetch_files(folder):
+    """Export files of ``folder`` worth loading ahead, with their total size in bytes."""
+    from loader import EXPORT_FILES
+
+    filenames, size = [], 0
+    for filename in EXPORT_FILES:
+        file_path = os.path.join(folder, filename)
+        if not os.path.exists(file_path) or streaming.should_stream(file_path):
+            # Missing files are reported by analyze_domain; huge ones are streamed there
+            continue
+        filenames.append(filename)
+        size += os.path.getsize(file_path)
+    return filenames, size
+
+
+def _load(folder, filenames):
+    """Load ``filenames`` of ``folder``; returns (frames, errors) keyed by filename."""
+    from loader import parse_csv
+
+    frames, errors = {}, {}
+    for filename in filenames:
+        try:
+            frames[filename] = cache.cached_read(os.path.join(folder, filename), parse_csv)
+        except Exception as e:
+            errors[filename] = e
+    return frames, errors
+
+
+def prefetch_domains(domain_folders, depth=DEFAULT_DEPTH, budget_mb=DEFAULT_BUDGET_MB):
+    """Yield ``(folder, frames, errors)`` for each folder while loading the following ones in the background.
+
+    ``frames`` maps export filename to its DataFrame and ``errors`` maps the
+    files that failed to load to their exception; files above the streaming
+    threshold are in neither.
+    """
+    budget = budget_mb * 1024 * 1024
+    pending = deque(domain_folders)
+    in_flight = deque()
+    bytes_in_flight = 0
+
+    with ThreadPoolExecutor(max_workers=max(depth, 1), thread_name_prefix='prefetch') as executor:
+        while pending or in_flight:
+            # Top up the queue while there is room in both the depth and the memory budget
+            while pending and len(in_flight) < max(depth, 1):
+                filenames, size = _prefetch_files(pending[0])
+                if in_flight and bytes_in_flight + size > budget:
+                    break
+                folder = pending.popleft()
+                in_flight.append((folder, size, executor.submit(_load, folder, filenames)))
+                bytes_in_flight += size
+
+            folder, size, future = in_flight.popleft()
+            frames, errors = future.result()
+            bytes_in_flight -= size
+            yield folder, frames, errors
@@ -0,0 +1,102 @@
+"""Per-stage timing and memory instrumentation for a run.
+
+Wrap a piece of work in ``stage(name, domain=...)`` to record its wall
+time, CPU time, the process' peak RSS when it finished, and the rows and
+bytes it processed. Records are kept per process; worker processes hand
+theirs back with ``drain()`` and the parent adds them with ``extend()``.
+``write_profile`` saves everything as JSON and CSV.
+
+Peak RSS is the high-water mark of the process that ran the stage (it
+never goes down), so it shows where memory grew rather than what a stage
+used on its own. It is left empty on platforms without ``resource``.
+"""
+import contextlib
+import csv
+import json
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+FIELDS = ('stage', 'domain', 'pid', 'wall_s', 'cpu_s', 'peak_rss_mb', 'rows', 'bytes_read')
+
+_records = []
+
+
+def peak_rss_mb():
+    """Return this process' peak resident set size in MB, or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+@contextlib.contextmanager
+def stage(name, domain=None):
+    """Record one stage; the yielded dict's ``rows``/``bytes_read`` can be filled in by the caller."""
+    record = {'stage': name, 'domain': domain, 'pid': os.getpid(), 'rows': 0, 'bytes_read': 0}
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield record
+    finally:
+        record['wall_s'] = round(time.perf_counter() - wall_start, 6)
+        record['cpu_s'] = round(time.process_time() - cpu_start, 6)
+        rss = peak_rss_mb()
+        record['peak_rss_mb'] = round(rss, 1) if rss is not None else None
+        _records.append(record)
+
+
+def drain():
+    """Return and clear the records collected in this process."""
+    records = list(_records)
+    _records.clear()
+    return records
+
+
+def extend(records):
+    """Add records collected in another process."""
+    _records.extend(records)
+
+
+def records():
+    """Return the records collected so far."""
+    return list(_records)
+
+
+def folder_bytes(folder, filenames):
+    """Total on-disk size of ``filenames`` that exist in ``folder``."""
+    total = 0
+    for filename in filenames:
+        path = os.path.join(folder, filename)
+        if os.path.exists(path):
+            total += os.path.getsize(path)
+    return total
+
+
+def write_profile(base_path, run_records=None):
+    """Write ``<base_path>.json`` and ``<base_path>.csv``; returns both paths."""
+    run_records = records() if run_records is None else run_records
+    json_path, csv_path = f"{base_path}.json", f"{base_path}.csv"
+
+    totals = {}
+    for record in run_records:
+        if record['domain'] is None:
+            continue
+        entry = totals.setdefault(record['stage'], {'wall_s': 0.0, 'cpu_s': 0.0, 'rows': 0, 'bytes_read': 0})
+        for key in entry:
+            entry[key] += record[key]
+
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump({'records': run_records, 'per_domain_stage_totals': totals}, f, indent=2, default=str)
+    with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        for record in run_records:
+            writer.writerow({field: record.get(field) for field in FIELDS})
+    return json_path, csv_path
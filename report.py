@@ -0,0 +1,837 @@
+"""HTML report rendering.
+
+The report is produced as a stream of string chunks from precompiled
+templates, so it can be written straight to a file without building the
+whole document in memory. Table rows are formatted column-wise with
+vectorized string operations rather than one ``iterrows`` step per row.
+
+For large portfolios ``write_split_report`` writes a directory instead: a
+light ``index.html`` whose domain comparison table is sorted, filtered and
+paginated in the browser from compact data in ``domains.js``, plus one page per
+domain. Domain pages are only rewritten when their data changed.
+"""
+import hashlib
+import html
+import json
+import math
+import os
+import re
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from atomic import atomic_write
+from stats import describe_metrics
+
+HEADER = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Google Search Console Analysis Report</title>
+    <script src="https://unpkg.com/@tailwindcss/browser@4"></script>
+    <style>
+        body {{
+            font-family: 'Inter', sans-serif;
+            background-color: #f9fafb;
+        }}
+        .chart-container {{
+            width: 100%;
+            max-width: 800px;
+            margin: 0 auto;
+        }}
+    </style>
+</head>
+<body class="p-6">
+    <div class="max-w-7xl mx-auto">
+        <h1 class="text-3xl font-bold text-gray-900 mb-8">Google Search Console Analysis Report</h1>
+        <p class="text-gray-600 mb-8">Generated on: {generated_on}</p>
+"""
+
+FOOTER = """
+    </div>
+</body>
+</html>
+"""
+
+OVERALL_SUMMARY = """
+        <div class="bg-white rounded-lg shadow-md p-6 mb-8">
+            <h2 class="text-xl font-semibold text-gray-800 mb-4">Overall Summary</h2>
+            <div class="grid grid-cols-1 md:grid-cols-3 gap-4 mb-6">
+                <div class="bg-blue-50 p-4 rounded-lg">
+                    <p class="text-sm text-blue-600 font-medium">Total Clicks</p>
+                    <p class="text-2xl font-bold text-blue-800">{total_clicks:.0f}</p>
+                </div>
+                <div class="bg-green-50 p-4 rounded-lg">
+                    <p class="text-sm text-green-600 font-medium">Total Impressions</p>
+                    <p class="text-2xl font-bold text-green-800">{total_impressions:.0f}</p>
+                </div>
+                <div class="bg-purple-50 p-4 rounded-lg">
+                    <p class="text-sm text-purple-600 font-medium">Average CTR</p>
+                    <p class="text-2xl font-bold text-purple-800">{avg_ctr:.2f}%</p>
+                </div>
+            </div>
+            <div class="grid grid-cols-1 md:grid-cols-2 gap-4 mb-6">
+                <div class="bg-yellow-50 p-4 rounded-lg">
+                    <p class="text-sm text-yellow-600 font-medium">Average Position</p>
+                    <p class="text-2xl font-bold text-yellow-800">{avg_position:.2f}</p>
+                </div>
+                <div class="bg-indigo-50 p-4 rounded-lg">
+                    <p class="text-sm text-indigo-600 font-medium">Best Performing Domain</p>
+                    <p class="text-xl font-bold text-indigo-800">{best_domain_clicks}</p>
+                    <p class="text-xs text-indigo-600">(by clicks)</p>
+                </div>
+            </div>
+        </div>
+"""
+
+NO_DOMAINS = """
+        <div class="bg-white rounded-lg shadow-md p-6 mb-8">
+            <h2 class="text-xl font-semibold text-gray-800 mb-4">Overall Summary</h2>
+            <p class="text-gray-600">No domains were analyzed.</p>
+        </div>
+"""
+
+AVERAGES_START = """
+        <div class="bg-white rounded-lg shadow-md p-6 mb-8">
+            <h2 class="text-xl font-semibold text-gray-800 mb-4">Aggregated Averages</h2>
+            <div class="grid grid-cols-1 md:grid-cols-2 gap-6 mb-6">
+"""
+
+STAT_CARD_START = """
+                <div class="bg-white border border-gray-200 rounded-lg p-4">
+                    <h3 class="text-lg font-medium text-gray-800 mb-3">{title}</h3>
+                    <div class="space-y-2">
+"""
+
+STAT_ROW = """                        <div class="flex justify-between">
+                            <span class="text-sm text-gray-600">{label}:</span>
+                            <span class="text-sm font-medium text-gray-900">{value}</span>
+                        </div>
+"""
+
+STAT_CARD_END = """                    </div>
+                </div>
+"""
+
+INSIGHTS_START = """
+            </div>
+            <div class="bg-gray-50 p-4 rounded-lg">
+                <h3 class="text-md font-medium text-gray-800 mb-2">Key Insights</h3>
+                <ul class="list-disc pl-5 space-y-1 text-sm text-gray-700">
+"""
+
+INSIGHT = """                    <li>{text}</li>
+"""
+
+INSIGHTS_END = """                </ul>
+            </div>
+        </div>
+"""
+
+COMPARISON_START = """
+        <div class="bg-white rounded-lg shadow-md p-6 mb-8">
+            <h3 class="text-lg font-medium text-gray-800 mb-2">Domain Comparison</h3>
+            <div class="overflow-x-auto">
+                <table class="min-w-full divide-y divide-gray-200">
+                    <thead class="bg-gray-50">
+                        <tr>
+                            <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Domain</th>
+                            <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Clicks</th>
+                            <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Impressions</th>
+                            <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">CTR</th>
+                            <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Position</th>
+                        </tr>
+                    </thead>
+                    <tbody class="bg-white divide-y divide-gray-200">
+"""
+
+COMPARISON_END = """                    </tbody>
+                </table>
+            </div>
+        </div>
+"""
+
+TABLE_CARD_START = """
+        <div class="bg-white rounded-lg shadow-md p-6 mb-8">
+            <h3 class="text-lg font-medium text-gray-800 mb-2">{title}</h3>
+            <p class="text-sm text-gray-600 mb-4">{note}</p>
+            <div class="overflow-x-auto">
+                <table class="min-w-full divide-y divide-gray-200">
+                    <thead class="bg-gray-50">
+                        <tr>
+{header_cells}                        </tr>
+                    </thead>
+                    <tbody class="bg-white divide-y divide-gray-200">
+"""
+
+TABLE_HEADER_CELL = """                            <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">{label}</th>
+"""
+
+TRENDS_NOTE = ("As of each domain's last day of data. Week over week compares the last 7 days with the 7 before; "
+               "year over year compares the last 28 days with the same days 52 weeks earlier. Anomalies are days "
+               "more than {anomaly_z:g} standard deviations from the previous 28 days' mean.")
+TRENDS_HEADERS = ("Domain", "Last Day", "Clicks 7d", "WoW", "Clicks 28d", "YoY", "CTR 28d", "Anomalies 28d")
+
+QUERY_PERCENTILES_NOTE = ("Distribution of every query row of every domain, merged from per-domain KLL sketches: "
+                          "each percentile's rank is within about 1.7% of the number of queries (99% confidence).")
+QUERY_PERCENTILES_HEADERS = ("Metric", "25th Percentile", "Median", "75th Percentile", "90th Percentile")
+
+TOP_QUERIES_NOTE = ("Queries guaranteed more than {threshold:,.0f} clicks summed over all domains (1/{slots} of all "
+                    "clicks), from merged heavy hitter and count-min sketches, ranked by the clicks they are "
+                    "guaranteed to have. Lower bounds undercount by at most {error:,} clicks; the true click count "
+                    "lies in the range shown, with 98% confidence. Queries below the threshold cannot be ranked "
+                    "reliably and are left out.")
+TOP_QUERIES_HEADERS = ("Query", "Clicks (at least)", "Clicks (at most)")
+
+# Shown for statistics that need more history than a domain has
+MISSING = "&ndash;"
+
+DOMAIN_START = """
+        <div class="bg-white rounded-lg shadow-md p-6 mb-8">
+            <h2 class="text-xl font-semibold text-gray-800 mb-4">{domain_name}</h2>
+            <div class="grid grid-cols-1 md:grid-cols-2 gap-6">
+"""
+
+DOMAIN_END = """            </div>
+        </div>
+"""
+
+CHART = """
+                <div class="chart-container col-span-1 md:col-span-2">
+                    <h3 class="text-lg font-medium text-gray-800 mb-2">Clicks and Impressions Over Time</h3>
+                    <img src="{src}" alt="Clicks and impressions over time for {domain_name}" loading="lazy">
+                </div>
+"""
+
+# Cell classes for the first (label) column and the metric columns
+COMPARISON_CELLS = ("px-6 py-4 whitespace-nowrap text-sm font-medium text-gray-900",
+                    "px-6 py-4 whitespace-nowrap text-sm text-gray-500")
+DETAIL_CELLS = ("px-4 py-2 whitespace-nowrap text-sm font-medium text-gray-900",
+                "px-4 py-2 whitespace-nowrap text-sm text-gray-500")
+
+DOMAIN_PAGE_HEADER = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{domain_name} - Google Search Console Analysis Report</title>
+    <script src="https://unpkg.com/@tailwindcss/browser@4"></script>
+    <style>
+        body {{
+            font-family: 'Inter', sans-serif;
+            background-color: #f9fafb;
+        }}
+        .chart-container {{
+            width: 100%;
+            max-width: 800px;
+            margin: 0 auto;
+        }}
+    </style>
+</head>
+<body class="p-6">
+    <div class="max-w-7xl mx-auto">
+        <p class="mb-6"><a href="../index.html" class="text-blue-600 hover:underline">&larr; All domains</a></p>
+"""
+
+# Client-side domain comparison of the split report; rows come from domains.js
+COMPARISON_APP = """
+        <div class="bg-white rounded-lg shadow-md p-6 mb-8">
+            <h3 class="text-lg font-medium text-gray-800 mb-2">Domain Comparison</h3>
+            <input id="comparison-filter" type="search" placeholder="Filter domains"
+                   class="border border-gray-300 rounded px-3 py-1 text-sm mb-4">
+            <div class="overflow-x-auto">
+                <table id="comparison" data-page-size="{page_size}" class="min-w-full divide-y divide-gray-200">
+                    <thead class="bg-gray-50">
+                        <tr>
+{header_cells}                        </tr>
+                    </thead>
+                    <tbody id="comparison-body" class="bg-white divide-y divide-gray-200"></tbody>
+                </table>
+            </div>
+            <div class="flex items-center justify-between mt-4 text-sm text-gray-600">
+                <button id="comparison-previous" class="px-3 py-1 border border-gray-300 rounded">Previous</button>
+                <span id="comparison-status"></span>
+                <button id="comparison-next" class="px-3 py-1 border border-gray-300 rounded">Next</button>
+            </div>
+        </div>
+        <script src="{data_script}"></script>
+"""
+
+COMPARISON_SORT_CELL = """                            <th data-key="{key}" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider cursor-pointer select-none">{label}</th>
+"""
+
+COMPARISON_SCRIPT = """        <script>
+        (function () {
+            var data = window.SEARCH_CONSOLE_DOMAINS;
+            var table = document.getElementById('comparison');
+            var body = document.getElementById('comparison-body');
+            var status = document.getElementById('comparison-status');
+            var pageSize = parseInt(table.dataset.pageSize, 10);
+            var column = {};
+            data.columns.forEach(function (name, i) { column[name] = i; });
+            var decimals = {clicks: 0, impressions: 0, ctr: 2, position: 2};
+            var state = {sort: 'impressions', descending: true, page: 0, filter: ''};
+
+            function format(name, value) {
+                if (value === null) { return '\u2013'; }
+                return value.toFixed(decimals[name]) + (name === 'ctr' ? '%' : '');
+            }
+
+            function render() {
+                var filter = state.filter.toLowerCase();
+                var rows = data.rows.filter(function (row) {
+                    return row[column.domain].toLowerCase().indexOf(filter) !== -1;
+                });
+                var key = column[state.sort], sign = state.descending ? -1 : 1;
+                rows.sort(function (a, b) {
+                    var x = a[key], y = b[key];
+                    if (x === y) { return 0; }
+                    if (x === null) { return 1; }
+                    if (y === null) { return -1; }
+                    return (x < y ? -1 : 1) * sign;
+                });
+                var pages = Math.max(1, Math.ceil(rows.length / pageSize));
+                state.page = Math.min(state.page, pages - 1);
+                body.textContent = '';
+                rows.slice(state.page * pageSize, (state.page + 1) * pageSize).forEach(function (row) {
+                    var tr = document.createElement('tr');
+                    var td = document.createElement('td');
+                    td.className = '""" + COMPARISON_CELLS[0] + """';
+                    if (row[column.page] === null) {
+                        // A domain without a page (no report fragment) is listed without a link
+                        td.textContent = row[column.domain];
+                    } else {
+                        var link = document.createElement('a');
+                        link.href = row[column.page];
+                        link.className = 'text-blue-600 hover:underline';
+                        link.textContent = row[column.domain];
+                        td.appendChild(link);
+                    }
+                    tr.appendChild(td);
+                    ['clicks', 'impressions', 'ctr', 'position'].forEach(function (name) {
+                        var cell = document.createElement('td');
+                        cell.className = '""" + COMPARISON_CELLS[1] + """';
+                        cell.textContent = format(name, row[column[name]]);
+                        tr.appendChild(cell);
+                    });
+                    body.appendChild(tr);
+                });
+                status.textContent = 'Page ' + (state.page + 1) + ' of ' + pages + ' (' + rows.length + ' domains)';
+            }
+
+            table.querySelectorAll('th[data-key]').forEach(function (th) {
+                th.addEventListener('click', function () {
+                    var key = th.dataset.key;
+                    state.descending = state.sort === key ? !state.descending : key !== 'domain' && key !== 'position';
+                    state.sort = key;
+                    state.page = 0;
+                    render();
+                });
+            });
+            document.getElementById('comparison-filter').addEventListener('input', function (event) {
+                state.filter = event.target.value;
+                state.page = 0;
+                render();
+            });
+            document.getElementById('comparison-previous').addEventListener('click', function () {
+                state.page = Math.max(0, state.page - 1);
+                render();
+            });
+            document.getElementById('comparison-next').addEventListener('click', function () {
+                state.page += 1;
+                render();
+            });
+            render();
+        })();
+        </script>
+"""
+
+# Key and header of the columns of the client-side comparison table
+COMPARISON_COLUMNS = (('domain', "Domain"), ('clicks', "Clicks"), ('impressions', "Impressions"),
+                      ('ctr', "CTR"), ('position', "Position"))
+COMPARISON_PAGE_SIZE = 50
+
+# Bump when the split report's domain pages change, so existing pages are rewritten
+SPLIT_REPORT_VERSION = 1
+SPLIT_PAGES_DIR = "domains"
+SPLIT_MANIFEST = "pages.json"
+
+DETAIL_TABLE_START = """
+                <div{wrapper_class}>
+                    <h3 class="text-lg font-medium text-gray-800 mb-2">{title}</h3>
+                    <div class="overflow-x-auto">
+                        <table class="min-w-full divide-y divide-gray-200">
+                            <thead class="bg-gray-50">
+                                <tr>
+{header_cells}                                </tr>
+                            </thead>
+                            <tbody class="bg-white divide-y divide-gray-200">
+"""
+
+DETAIL_TABLE_END = """                            </tbody>
+                        </table>
+                    </div>
+                </div>
+"""
+
+DETAIL_HEADER_CELL = """                                    <th class="px-4 py-2 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">{label}</th>
+"""
+
+
+def format_fixed(values, decimals):
+    """Format numbers with a fixed number of decimals, column-wise.
+
+    Equivalent to ``f"{value:.{decimals}f}"`` for finite values, but done with
+    integer arithmetic on the whole column instead of once per element.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    finite = np.isfinite(values)
+    scale = 10 ** decimals
+    scaled = np.rint(np.abs(np.where(finite, values, 0)) * scale).astype(np.int64)
+    text = (scaled // scale).astype(str).astype(object)
+    if decimals:
+        text = text + '.' + np.char.zfill((scaled % scale).astype(str), decimals).astype(object)
+    negative = (values < 0) & (scaled > 0)
+    if negative.any():
+        text[negative] = '-' + text[negative]
+    if not finite.all():
+        text[~finite] = values[~finite].astype(str).astype(object)
+    return text
+
+
+def format_change(values, decimals=1):
+    """Format percentage changes with an explicit sign, MISSING where undefined."""
+    values = np.asarray(values, dtype=np.float64)
+    text = format_fixed(values, decimals) + "%"
+    positive = values >= 0.5 * 10 ** -decimals
+    text[positive] = "+" + text[positive]
+    text[~np.isfinite(values)] = MISSING
+    return text
+
+
+def format_optional(values, decimals, suffix=""):
+    """Like ``format_fixed`` plus ``suffix``, with MISSING for NaN."""
+    values = np.asarray(values, dtype=np.float64)
+    text = format_fixed(values, decimals) + suffix
+    text[~np.isfinite(values)] = MISSING
+    return text
+
+
+_escape = np.frompyfunc(html.escape, 1, 1)
+
+
+def format_text(values):
+    """HTML-escape a column of labels."""
+    return _escape(np.asarray(values).astype(str)).astype(object)
+
+
+def render_rows(columns, cell_classes, indent):
+    """Render table rows from a list of already formatted string columns."""
+    if not columns or len(columns[0]) == 0:
+        return ""
+    label_class, metric_class = cell_classes
+    cell_indent = indent + "    "
+    row = np.full(len(columns[0]), f"{indent}<tr>\n", dtype=object)
+    for i, column in enumerate(columns):
+        css = label_class if i == 0 else metric_class
+        row = row + f'{cell_indent}<td class="{css}">' + column + "</td>\n"
+    row = row + f"{indent}</tr>\n"
+    return "".join(row.tolist())
+
+
+def _stat_card(title, rows):
+    yield STAT_CARD_START.format(title=title)
+    for label, value in rows:
+        yield STAT_ROW.format(label=label, value=value)
+    yield STAT_CARD_END
+
+
+def _detail_table(title, headers, columns, wide=False):
+    yield DETAIL_TABLE_START.format(
+        wrapper_class=' class="col-span-1 md:col-span-2"' if wide else '',
+        title=title,
+        header_cells="".join(DETAIL_HEADER_CELL.format(label=label) for label in headers),
+    )
+    yield render_rows(columns, DETAIL_CELLS, " " * 32)
+    yield DETAIL_TABLE_END
+
+
+def _summary_section(summary_df, metric_stats, portfolio=None, comparison=True):
+    """Yield the overall summary, aggregated averages and (unless ``comparison`` is False) comparison table."""
+    clicks = metric_stats['total_clicks']
+    impressions = metric_stats['total_impressions']
+    ctr = metric_stats['avg_ctr']
+    position = metric_stats['avg_position']
+
+    # Portfolio-wide CTR and position weigh every domain by its impressions
+    if portfolio is not None:
+        overall_ctr, overall_position = portfolio['CTR'], portfolio['Position']
+    else:
+        overall_ctr, overall_position = (clicks.total / impressions.total) * 100, position.mean
+
+    def label(value):
+        return html.escape(str(value))
+
+    yield OVERALL_SUMMARY.format(
+        total_clicks=clicks.total, total_impressions=impressions.total, avg_ctr=overall_ctr,
+        avg_position=overall_position, best_domain_clicks=label(clicks.max_label),
+    )
+
+    yield AVERAGES_START
+    yield from _stat_card("Clicks", [
+        ("Average", f"{clicks.mean:.1f}"),
+        ("Median", f"{clicks.median:.1f}"),
+        ("Standard Deviation", f"{clicks.std:.1f}"),
+        ("25th Percentile", f"{clicks.p25:.1f}"),
+        ("75th Percentile", f"{clicks.p75:.1f}"),
+        ("90th Percentile", f"{clicks.p90:.1f}"),
+        ("IQR", f"{clicks.iqr:.1f}"),
+        ("Maximum", f"{clicks.max:.0f} ({label(clicks.max_label)})"),
+        ("Minimum", f"{clicks.min:.0f} ({label(clicks.min_label)})"),
+        ("Total", f"{clicks.total:.0f}"),
+    ])
+    yield from _stat_card("Impressions", [
+        ("Average", f"{impressions.mean:.1f}"),
+        ("Median", f"{impressions.median:.1f}"),
+        ("Standard Deviation", f"{impressions.std:.1f}"),
+        ("25th Percentile", f"{impressions.p25:.1f}"),
+        ("75th Percentile", f"{impressions.p75:.1f}"),
+        ("90th Percentile", f"{impressions.p90:.1f}"),
+        ("IQR", f"{impressions.iqr:.1f}"),
+        ("Maximum", f"{impressions.max:.0f} ({label(impressions.max_label)})"),
+        ("Minimum", f"{impressions.min:.0f} ({label(impressions.min_label)})"),
+        ("Total", f"{impressions.total:.0f}"),
+    ])
+    yield from _stat_card("CTR", [
+        ("Average", f"{ctr.mean:.2f}%"),
+        ("Median", f"{ctr.median:.2f}%"),
+        ("Standard Deviation", f"{ctr.std:.2f}%"),
+        ("25th Percentile", f"{ctr.p25:.2f}%"),
+        ("75th Percentile", f"{ctr.p75:.2f}%"),
+        ("90th Percentile", f"{ctr.p90:.2f}%"),
+        ("Maximum", f"{ctr.max:.2f}% ({label(ctr.max_label)})"),
+        ("Minimum", f"{ctr.min:.2f}% ({label(ctr.min_label)})"),
+        ("Overall CTR", f"{overall_ctr:.2f}%"),
+    ])
+    yield from _stat_card("Position", [
+        ("Average", f"{position.mean:.2f}"),
+        ("Median", f"{position.median:.2f}"),
+        ("Standard Deviation", f"{position.std:.2f}"),
+        ("25th Percentile", f"{position.p25:.2f}"),
+        ("75th Percentile", f"{position.p75:.2f}"),
+        ("90th Percentile", f"{position.p90:.2f}"),
+        ("IQR", f"{position.iqr:.2f}"),
+        ("Best (Lowest)", f"{position.min:.2f} ({label(position.min_label)})"),
+        ("Worst (Highest)", f"{position.max:.2f} ({label(position.max_label)})"),
+        ("Overall (Impression-Weighted)", f"{overall_position:.2f}"),
+    ])
+
+    # Add insights based on the data
+    yield INSIGHTS_START
+    if clicks.max > clicks.mean * 2:
+        yield INSIGHT.format(text=f"The top-performing domain ({label(clicks.max_label)}) has "
+                                  f"{clicks.max / clicks.mean:.1f}x more clicks than the average.")
+    # Median well below the mean indicates skew
+    if clicks.median < clicks.mean * 0.8:
+        yield INSIGHT.format(text=f"The median clicks ({clicks.median:.1f}) is significantly lower than the mean "
+                                  f"({clicks.mean:.1f}), indicating that a few high-performing domains are "
+                                  f"skewing the average upward.")
+    if clicks.std > clicks.mean:
+        yield INSIGHT.format(text=f"The high standard deviation in clicks ({clicks.std:.1f}) indicates substantial "
+                                  f"variation in performance across domains.")
+    if ctr.iqr > ctr.mean * 0.5:
+        yield INSIGHT.format(text=f"The wide interquartile range for CTR ({ctr.iqr:.2f}%) suggests significant "
+                                  f"differences in engagement rates across domains.")
+    if position.p25 < position.mean * 0.7:
+        yield INSIGHT.format(text=f"25% of domains have an average position better than {position.p25:.2f}, "
+                                  f"significantly outperforming the overall average of {position.mean:.2f}.")
+    yield INSIGHT.format(text=f"Overall, the domains receive an average of {clicks.mean:.1f} clicks from "
+                              f"{impressions.mean:.1f} impressions.")
+    yield INSIGHT.format(text=f"Across the portfolio, CTR is {overall_ctr:.2f}% of impressions, at an "
+                              f"impression-weighted average position of {overall_position:.2f}.")
+    yield INSIGHTS_END
+    if not comparison:
+        return
+
+    # Domain comparison table sorted by impressions in descending order
+    sorted_df = summary_df.sort_values('total_impressions', ascending=False, kind='mergesort')
+    yield COMPARISON_START
+    yield render_rows([
+        format_text(sorted_df['domain']),
+        format_fixed(sorted_df['total_clicks'], 0),
+        format_fixed(sorted_df['total_impressions'], 0),
+        format_fixed(sorted_df['avg_ctr'], 2) + "%",
+        format_fixed(sorted_df['avg_position'], 2),
+    ], COMPARISON_CELLS, " " * 24)
+    yield COMPARISON_END
+
+
+def _table_card_start(title, note, headers):
+    return TABLE_CARD_START.format(
+        title=title, note=note,
+        header_cells="".join(TABLE_HEADER_CELL.format(label=label) for label in headers),
+    )
+
+
+def _query_sketch_section(query_sketches):
+    """Yield portfolio-wide query percentiles and top queries from merged ``sketches.QuerySketches``."""
+    percentiles = query_sketches.percentiles()
+    yield _table_card_start(f"Query-Level Percentiles ({query_sketches.rows} queries)", QUERY_PERCENTILES_NOTE,
+                            QUERY_PERCENTILES_HEADERS)
+    yield render_rows([format_text(percentiles.index)] + [
+        format_optional(percentiles[column], 2) for column in percentiles.columns
+    ], COMPARISON_CELLS, " " * 24)
+    yield COMPARISON_END
+
+    top_queries = query_sketches.top_queries()
+    heavy_hitters = query_sketches.heavy_hitters
+    note = TOP_QUERIES_NOTE.format(threshold=heavy_hitters.threshold, slots=heavy_hitters.capacity + 1,
+                                   error=heavy_hitters.error)
+    yield _table_card_start("Top Queries Across the Portfolio", note, TOP_QUERIES_HEADERS)
+    yield render_rows([
+        format_text(top_queries['query']),
+        format_fixed(top_queries['clicks_min'], 0),
+        format_fixed(top_queries['clicks_max'], 0),
+    ], COMPARISON_CELLS, " " * 24)
+    yield COMPARISON_END
+
+
+def _trends_section(trends_df):
+    """Yield the recent trends table (see ``timeseries.trends``), domains with most clicks first."""
+    from timeseries import ANOMALY_Z
+
+    trends_df = trends_df.sort_values('clicks_28d', ascending=False, kind='mergesort', na_position='last')
+    yield _table_card_start("Recent Trends", TRENDS_NOTE.format(anomaly_z=ANOMALY_Z), TRENDS_HEADERS)
+    yield render_rows([
+        format_text(trends_df['domain']),
+        np.datetime_as_string(trends_df['last_date'].to_numpy(dtype='datetime64[D]')).astype(object),
+        format_optional(trends_df['clicks_7d'], 0),
+        format_change(trends_df['clicks_wow']),
+        format_optional(trends_df['clicks_28d'], 0),
+        format_change(trends_df['clicks_yoy']),
+        format_optional(trends_df['ctr_28d'], 2, "%"),
+        format_fixed(trends_df['clicks_anomalies'] + trends_df['impressions_anomalies'], 0),
+    ], COMPARISON_CELLS, " " * 24)
+    yield COMPARISON_END
+
+
+def _domain_section(domain_name, domain_data, chart_src=None):
+    """Yield the detail section for one domain."""
+    yield DOMAIN_START.format(domain_name=html.escape(str(domain_name)))
+
+    if chart_src is not None:
+        yield CHART.format(src=html.escape(chart_src), domain_name=html.escape(str(domain_name)))
+
+    devices_df = domain_data.get('devices')
+    if devices_df is not None:
+        yield from _detail_table("Device Distribution", ["Device", "Clicks", "Click %"], [
+            format_text(devices_df['Device']),
+            format_fixed(devices_df['Clicks'], 0),
+            format_fixed(devices_df['Click %'], 1) + "%",
+        ])
+
+    queries_df = domain_data.get('queries')
+    if queries_df is not None:
+        queries_df = queries_df.head(10)
+        yield from _detail_table("Top Queries", ["Query", "Clicks", "Impressions"], [
+            format_text(queries_df.iloc[:, 0]),
+            format_fixed(queries_df['Clicks'], 0),
+            format_fixed(queries_df['Impressions'], 0),
+        ])
+
+    pages_df = domain_data.get('pages')
+    if pages_df is not None:
+        pages_df = pages_df.head(10)
+        yield from _detail_table("Top Pages", ["Page", "Clicks", "Impressions", "CTR", "Position"], [
+            format_text(pages_df.iloc[:, 0]),
+            format_fixed(pages_df['Clicks'], 0),
+            format_fixed(pages_df['Impressions'], 0),
+            format_fixed(pages_df['CTR'], 2) + "%",
+            format_fixed(pages_df['Position'], 2),
+        ], wide=True)
+
+    yield DOMAIN_END
+
+
+def iter_html_report(domain_summaries, domain_details, metric_stats=None, chart_sources=None, trends=None,
+                     portfolio=None, query_sketches=None):
+    """Yield the HTML report (Tailwind CSS styling) as a sequence of string chunks.
+
+    ``metric_stats`` is the result of ``stats.describe_metrics`` for the
+    summaries; it is computed here when the caller has not done so already.
+    ``chart_sources`` maps domain names to the ``<img src>`` of their chart
+    (see ``charts.chart_sources``) and ``trends`` is the per-domain table
+    from ``timeseries.trends``. ``portfolio`` holds the portfolio-wide
+    ``CTR`` and ``Position`` from ``aggregate.finalize``; without it the
+    headline position falls back to the unweighted mean across domains.
+    ``query_sketches`` is the merged ``sketches.QuerySketches`` of all
+    domains, for the query-level percentiles and top queries.
+    """
+    chart_sources = chart_sources or {}
+    yield HEADER.format(generated_on=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+
+    if domain_summaries:
+        summary_df = pd.DataFrame(domain_summaries)
+        if metric_stats is None:
+            metric_stats = describe_metrics(summary_df)
+        yield from _summary_section(summary_df, metric_stats, portfolio)
+        if trends is not None and len(trends):
+            yield from _trends_section(trends)
+        if query_sketches is not None and query_sketches.rows:
+            yield from _query_sketch_section(query_sketches)
+    else:
+        yield NO_DOMAINS
+
+    for domain_name, domain_data in domain_details.items():
+        yield from _domain_section(domain_name, domain_data, chart_sources.get(domain_name))
+
+    yield FOOTER
+
+
+def _write_chunks(path, chunks):
+    """Write ``chunks`` to ``path`` atomically."""
+    with atomic_write(path, 'w', encoding='utf-8') as f:
+        for chunk in chunks:
+            f.write(chunk)
+
+
+def write_html_report(path, domain_summaries, domain_details, metric_stats=None, chart_sources=None,
+                      trends=None, portfolio=None, query_sketches=None):
+    """Stream the HTML report to ``path``.
+
+    The report is written to a temporary file next to ``path`` and moved into
+    place, so a reader (or a browser reloading a report kept up to date by
+    ``--watch``) never sees a half-written file.
+    """
+    _write_chunks(path, iter_html_report(domain_summaries, domain_details, metric_stats, chart_sources, trends,
+                                         portfolio, query_sketches))
+
+
+def generate_html_report(domain_summaries, domain_details, metric_stats=None, chart_sources=None, trends=None,
+                         portfolio=None, query_sketches=None):
+    """Generate an HTML report with Tailwind CSS styling."""
+    return "".join(iter_html_report(domain_summaries, domain_details, metric_stats, chart_sources, trends,
+                                    portfolio, query_sketches))
+
+
+def page_filename(domain_name):
+    """File name of a domain's page in the split report, safe for any folder name."""
+    name = re.sub(r'[^A-Za-z0-9._-]+', '_', str(domain_name))
+    if name != str(domain_name):
+        # Keep names that differ only in replaced characters apart
+        name += '-' + hashlib.sha1(str(domain_name).encode('utf-8')).hexdigest()[:8]
+    return name + '.html'
+
+
+def comparison_data(summary_df, page_files):
+    """The domain comparison as compact columnar data: ``{'columns': [...], 'rows': [[...], ...]}``."""
+    def plain(values, decimals):
+        values = np.round(np.asarray(values, dtype=np.float64), decimals).tolist()
+        return [None if not math.isfinite(value) else (int(value) if decimals == 0 else value) for value in values]
+
+    domains = summary_df['domain'].astype(str).tolist()
+    columns = [domains, plain(summary_df['total_clicks'], 0), plain(summary_df['total_impressions'], 0),
+               plain(summary_df['avg_ctr'], 4), plain(summary_df['avg_position'], 4),
+               [f"{SPLIT_PAGES_DIR}/{page_files[domain]}" if domain in page_files else None for domain in domains]]
+    return {'columns': [key for key, _ in COMPARISON_COLUMNS] + ['page'], 'rows': [list(row) for row in zip(*columns)]}
+
+
+def iter_split_index(domain_summaries, metric_stats=None, trends=None, portfolio=None, query_sketches=None):
+    """Yield the index page of the split report; its comparison table loads ``domains.js``."""
+    yield HEADER.format(generated_on=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    if domain_summaries:
+        summary_df = pd.DataFrame(domain_summaries)
+        if metric_stats is None:
+            metric_stats = describe_metrics(summary_df)
+        yield from _summary_section(summary_df, metric_stats, portfolio, comparison=False)
+        yield COMPARISON_APP.format(
+            page_size=COMPARISON_PAGE_SIZE, data_script="domains.js",
+            header_cells="".join(COMPARISON_SORT_CELL.format(key=key, label=label)
+                                 for key, label in COMPARISON_COLUMNS),
+        )
+        yield COMPARISON_SCRIPT
+        if trends is not None and len(trends):
+            yield from _trends_section(trends)
+        if query_sketches is not None and query_sketches.rows:
+            yield from _query_sketch_section(query_sketches)
+    else:
+        yield NO_DOMAINS
+    yield FOOTER
+
+
+def _write_domain_page(job):
+    """Write one domain page of the split report (runs in worker processes with ``workers`` > 1)."""
+    path, domain_name, domain_data, chart_src = job
+    _write_chunks(path, [DOMAIN_PAGE_HEADER.format(domain_name=html.escape(str(domain_name))),
+                         *_domain_section(domain_name, domain_data, chart_src), FOOTER])
+
+
+def write_split_report(report_dir, domain_summaries, domain_details, metric_stats=None, chart_sources=None,
+                       trends=None, portfolio=None, query_sketches=None, page_keys=None, workers=1):
+    """Write the report as ``index.html``, ``domains.js`` and one page per domain under ``report_dir``.
+
+    ``page_keys`` maps domain names to a string that changes whenever the
+    domain's results do (e.g. its export folder fingerprint). A domain page
+    is only rewritten when its key, its chart or ``SPLIT_REPORT_VERSION``
+    changed since the last write, or when it has no key; pages of domains
+    that are gone are removed. Changed pages are written by ``workers``
+    processes. Returns (index path, domain pages written).
+    """
+    chart_sources = chart_sources or {}
+    page_keys = page_keys or {}
+    pages_dir = os.path.join(report_dir, SPLIT_PAGES_DIR)
+    os.makedirs(pages_dir, exist_ok=True)
+
+    manifest_path = os.path.join(report_dir, SPLIT_MANIFEST)
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        previous = {}
+
+    pages, jobs = {}, []
+    for domain_name, domain_data in domain_details.items():
+        filename = page_filename(domain_name)
+        chart_src = chart_sources.get(domain_name)
+        key = None
+        if domain_name in page_keys:
+            raw = f"{SPLIT_REPORT_VERSION}|{page_keys[domain_name]}|{chart_src}"
+            key = hashlib.sha1(raw.encode('utf-8')).hexdigest()
+        pages[domain_name] = {'file': filename, 'key': key}
+        path = os.path.join(pages_dir, filename)
+        if key is not None and previous.get(domain_name) == pages[domain_name] and os.path.exists(path):
+            continue
+        # Only the tables the page shows, to keep what is sent to worker processes small
+        data = {name: domain_data.get(name) for name in ('devices', 'queries', 'pages')}
+        jobs.append((path, domain_name, data, chart_src))
+
+    if workers > 1 and len(jobs) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(_write_domain_page, jobs, chunksize=8))
+    else:
+        for job in jobs:
+            _write_domain_page(job)
+
+    current_files = {page['file'] for page in pages.values()}
+    for page in previous.values():
+        if isinstance(page, dict) and page.get('file') not in current_files:
+            try:
+                os.remove(os.path.join(pages_dir, page['file']))
+            except (OSError, TypeError):
+                pass
+
+    data = comparison_data(pd.DataFrame(domain_summaries, columns=['domain', 'total_clicks', 'total_impressions',
+                                                                   'avg_ctr', 'avg_position']),
+                           {domain_name: page['file'] for domain_name, page in pages.items()})
+    # A script rather than JSON, which browsers also load for reports opened from disk
+    encoded = json.dumps(data, separators=(',', ':'))
+    _write_chunks(os.path.join(report_dir, "domains.js"), ["window.SEARCH_CONSOLE_DOMAINS = ", encoded, ";\n"])
+
+    index_path = os.path.join(report_dir, "index.html")
+    _write_chunks(index_path, iter_split_index(domain_summaries, metric_stats, trends, portfolio, query_sketches))
+    _write_chunks(manifest_path, [json.dumps(pages, indent=1, sort_keys=True)])
+    return index_path, len(jobs)
@@ -0,0 +1,109 @@
+"""Column dtypes for each Search Console export file.
+
+Exports are loaded with downcast metrics (int32 clicks and impressions,
+float32 CTR and position), categoricals for low-cardinality labels such as
+country and device, and a parsed ``Date`` column, instead of pandas'
+int64/float64/object defaults. High-cardinality labels (pages, queries)
+stay object dtype, where categoricals would not save anything.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+import normalize
+
+METRIC_DTYPES = {
+    'Clicks': np.int32,
+    'Impressions': np.int32,
+    'CTR': np.float32,
+    'Position': np.float32,
+}
+
+# Export file -> label column dtypes (metrics use METRIC_DTYPES)
+SCHEMAS = {
+    "Countries.csv": {'Country': 'category'},
+    "Dates.csv": {'Date': 'datetime64[ns]'},
+    "Devices.csv": {'Device': 'category'},
+    "Filters.csv": {'Filter': object, 'Value': object},
+    "Pages.csv": {'Top pages': object},
+    "Queries.csv": {'Top queries': object},
+    "Search appearance.csv": {'Search Appearance': 'category'},
+}
+
+
+def read_csv_kwargs(filename):
+    """Return the dtype/parse_dates arguments for reading ``filename`` with read_csv."""
+    dtype = dict(normalize.READ_CSV_DTYPES)
+    parse_dates = []
+    for column, column_dtype in SCHEMAS.get(filename, {}).items():
+        if column_dtype == 'datetime64[ns]':
+            parse_dates.append(column)
+        else:
+            dtype[column] = column_dtype
+    return {'dtype': dtype, 'parse_dates': parse_dates or False}
+
+
+def _fits_integer(values, dtype):
+    """Whether every non-missing value is a whole number within the range of ``dtype``."""
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return True
+    info = np.iinfo(dtype)
+    return bool(np.all(values == np.floor(values)) and values.min() >= info.min and values.max() <= info.max)
+
+
+def apply_metric_dtypes(df):
+    """Normalize metric columns and downcast them in place; returns ``df``.
+
+    Integer columns with missing values are kept as float32 rather than
+    failing the cast. Integer columns holding fractions or values outside
+    the integer range are kept as float64 with a warning, never truncated.
+    """
+    normalize.normalize_metrics(df)
+    for column, dtype in METRIC_DTYPES.items():
+        if column not in df.columns:
+            continue
+        if np.issubdtype(dtype, np.integer):
+            values = df[column].to_numpy(dtype=np.float64)
+            if not _fits_integer(values, dtype):
+                print(f"Warning: {column} holds values that are not whole numbers within the {np.dtype(dtype)} "
+                      "range; keeping them as float64")
+                df[column] = values
+                continue
+            if np.isnan(values).any():
+                dtype = np.float32
+        df[column] = df[column].astype(dtype)
+    return df
+
+
+def read_export(file_path, **kwargs):
+    """Read an export file with the compact dtypes from its schema."""
+    kwargs = {**read_csv_kwargs(os.path.basename(file_path)), **kwargs}
+    return apply_metric_dtypes(pd.read_csv(file_path, **kwargs))
+
+
+def memory_report(folder_path):
+    """Compare memory use of each export in ``folder_path`` with pandas defaults vs the schema.
+
+    Returns a DataFrame with one row per file found and a total row.
+    """
+    rows = []
+    for filename in SCHEMAS:
+        file_path = os.path.join(folder_path, filename)
+        if not os.path.exists(file_path):
+            continue
+        default = normalize.read_export(file_path)
+        compact = read_export(file_path)
+        rows.append({
+            'file': filename,
+            'rows': len(compact),
+            'default_bytes': int(default.memory_usage(deep=True).sum()),
+            'compact_bytes': int(compact.memory_usage(deep=True).sum()),
+        })
+    report = pd.DataFrame(rows, columns=['file', 'rows', 'default_bytes', 'compact_bytes'])
+    if not report.empty:
+        total = report[['rows', 'default_bytes', 'compact_bytes']].sum()
+        report.loc[len(report)] = ['Total', *total]
+        report['saving %'] = (1 - report['compact_bytes'] / report['default_bytes']) * 100
+    return report
@@ -0,0 +1,333 @@
+"""Persistent inverted index over the Top queries and Top pages of every domain.
+
+Answers "which domains rank for this query" or "which pages contain this
+path segment" without re-reading any CSV. Every row of each domain's
+Queries.csv and Pages.csv is kept once (domain, label, clicks,
+impressions, position), and labels are split into lowercase tokens: words
+for queries, path segments and words for page URLs.
+
+The index is a set of ``.npy`` arrays opened with a memory map, so a
+lookup only touches the pages it needs:
+
+- a sorted token vocabulary with, per token, the ascending row ids that
+  contain it (CSR layout: ``postings[posting_offsets[t]:posting_offsets[t + 1]]``).
+  Tokens sharing a prefix are adjacent, so a prefix search is one
+  contiguous slice found with two binary searches;
+- a sorted vocabulary of the trigrams in those tokens, mapping each to the
+  tokens that contain it, so a substring search only checks candidate
+  tokens;
+- row metrics and UTF-8 encoded labels (bytes plus offsets).
+
+Each build writes its arrays into a new ``gen-<id>/`` directory and then
+replaces ``meta.json``, which names that directory, in one atomic rename;
+a search that is running meanwhile keeps reading the generation its
+metadata pointed to. The generation before the current one is kept for
+such readers and older ones are removed.
+
+Each domain's rows are also kept in a small pickle under ``blocks/`` with
+the export folder's fingerprint, so rebuilding only re-reads the domains
+whose files changed.
+"""
+import hashlib
+import json
+import os
+import pickle
+import re
+import shutil
+import uuid
+
+import numpy as np
+
+from atomic import atomic_write
+
+# Bump when the index layout or tokenization changes, or exports are parsed differently
+INDEX_VERSION = 3
+
+DEFAULT_INDEX_DIR = os.path.join(".cache", "index")
+META_FILE = "meta.json"
+KINDS = ('queries', 'pages')
+KIND_FILES = {'queries': 'Queries.csv', 'pages': 'Pages.csv'}
+SEARCH_MODES = ('terms', 'prefix', 'substring', 'exact')
+
+# Runs of letters and digits; splits URLs on '/', '-', '.', '_' and the like
+TOKEN_PATTERN = r"[^\W_]+"
+
+ARRAYS = ('domain', 'kind', 'clicks', 'impressions', 'position', 'label_bytes', 'label_offsets',
+          'vocab', 'postings', 'posting_offsets', 'trigrams', 'trigram_postings', 'trigram_offsets')
+
+
+def tokenize(text):
+    """Split ``text`` into lowercase tokens the way labels are indexed."""
+    return re.findall(TOKEN_PATTERN, str(text).lower())
+
+
+def _block_path(index_dir, domain_name):
+    key = hashlib.sha1(domain_name.encode('utf-8')).hexdigest()
+    return os.path.join(index_dir, 'blocks', key + '.pkl')
+
+
+def _domain_block(folder):
+    """Label and metric columns of one domain's Queries.csv and Pages.csv."""
+    from loader import load_csv_data
+
+    block = {}
+    for kind, filename in KIND_FILES.items():
+        if not os.path.exists(os.path.join(folder, filename)):
+            continue
+        df = load_csv_data(folder, filename)
+        if df is None:
+            continue
+        block[kind] = df[[df.columns[0], 'Clicks', 'Impressions', 'Position']].rename(
+            columns={df.columns[0]: 'label'}).reset_index(drop=True)
+    return block
+
+
+def _csr(codes, values, size):
+    """Group ``values`` by ``codes`` (0..size-1); returns (values in code order, offsets)."""
+    order = np.argsort(codes, kind='stable')
+    offsets = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(codes, minlength=size), out=offsets[1:])
+    return values[order].astype(np.int32), offsets
+
+
+def _build_arrays(domain_blocks):
+    """Build the index arrays from a list of per-domain blocks (in domain order)."""
+    import pandas as pd
+
+    frames = []
+    for code, block in enumerate(domain_blocks):
+        for kind_code, kind in enumerate(KINDS):
+            df = block.get(kind)
+            if df is None or df.empty:
+                continue
+            frames.append(pd.DataFrame({
+                'domain': np.full(len(df), code, dtype=np.int32),
+                'kind': np.full(len(df), kind_code, dtype=np.int8),
+                'label': df['label'].astype(str).to_numpy(dtype=object),
+                'clicks': df['Clicks'].fillna(0).to_numpy(dtype=np.int64),
+                'impressions': df['Impressions'].fillna(0).to_numpy(dtype=np.int64),
+                'position': df['Position'].to_numpy(dtype=np.float32),
+            }))
+    rows = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame({
+        'domain': np.empty(0, np.int32), 'kind': np.empty(0, np.int8), 'label': np.empty(0, object),
+        'clicks': np.empty(0, np.int64), 'impressions': np.empty(0, np.int64), 'position': np.empty(0, np.float32)})
+
+    # Token -> rows; explode keeps row order, so postings come out ascending per token
+    tokens = rows['label'].str.lower().str.findall(TOKEN_PATTERN).explode().dropna()
+    pairs = pd.DataFrame({'row': tokens.index.to_numpy(dtype=np.int64),
+                          'token': tokens.to_numpy(dtype=object)}).drop_duplicates()
+    codes, vocab = pd.factorize(pairs['token'], sort=True)
+    postings, posting_offsets = _csr(codes, pairs['row'].to_numpy(), len(vocab))
+    vocab = np.asarray(vocab, dtype=str) if len(vocab) else np.empty(0, dtype='U1')
+
+    # Trigram -> tokens, for substring search
+    gram_keys, gram_tokens = [], []
+    for token_id, token in enumerate(vocab.tolist()):
+        grams = {token[i:i + 3] for i in range(len(token) - 2)}
+        gram_keys.extend(grams)
+        gram_tokens.extend([token_id] * len(grams))
+    gram_codes, trigrams = pd.factorize(pd.Series(gram_keys, dtype=object), sort=True)
+    trigram_postings, trigram_offsets = _csr(gram_codes, np.asarray(gram_tokens, dtype=np.int64), len(trigrams))
+    trigrams = np.asarray(trigrams, dtype=str) if len(trigrams) else np.empty(0, dtype='U3')
+
+    encoded = [label.encode('utf-8') for label in rows['label'].tolist()]
+    label_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(label) for label in encoded], out=label_offsets[1:])
+
+    return {
+        'domain': rows['domain'].to_numpy(dtype=np.int32),
+        'kind': rows['kind'].to_numpy(dtype=np.int8),
+        'clicks': rows['clicks'].to_numpy(dtype=np.int64),
+        'impressions': rows['impressions'].to_numpy(dtype=np.int64),
+        'position': rows['position'].to_numpy(dtype=np.float32),
+        'label_bytes': np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        'label_offsets': label_offsets,
+        'vocab': vocab,
+        'postings': postings,
+        'posting_offsets': posting_offsets,
+        'trigrams': trigrams,
+        'trigram_postings': trigram_postings,
+        'trigram_offsets': trigram_offsets,
+    }
+
+
+def _read_meta(index_dir):
+    path = os.path.join(index_dir, META_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding='utf-8') as f:
+            meta = json.load(f)
+    except Exception as e:
+        print(f"Ignoring unreadable search index metadata: {e}")
+        return None
+    return meta if meta.get('version') == INDEX_VERSION else None
+
+
+def build_index(domain_folders, index_dir=DEFAULT_INDEX_DIR, full=False):
+    """Build or refresh the index for ``domain_folders``; returns the number of domains re-read.
+
+    Domains whose export folder is unchanged since the last build reuse
+    their stored block unless ``full`` is set.
+    """
+    import manifest
+
+    os.makedirs(os.path.join(index_dir, 'blocks'), exist_ok=True)
+    meta = None if full else _read_meta(index_dir)
+    previous = meta['fingerprints'] if meta else {}
+
+    domain_names, fingerprints, blocks = [], {}, []
+    reread = 0
+    for folder in domain_folders:
+        domain_name = os.path.basename(folder)
+        fingerprint = manifest.folder_fingerprint(folder)
+        path = _block_path(index_dir, domain_name)
+        block = None
+        if previous.get(domain_name) == fingerprint and os.path.exists(path):
+            try:
+                with open(path, 'rb') as f:
+                    block = pickle.load(f)
+            except Exception:
+                block = None
+        if block is None:
+            block = _domain_block(folder)
+            with atomic_write(path) as f:
+                pickle.dump(block, f, protocol=pickle.HIGHEST_PROTOCOL)
+            reread += 1
+        domain_names.append(domain_name)
+        fingerprints[domain_name] = fingerprint
+        blocks.append(block)
+
+    # Drop blocks of domains that are gone
+    keep = {os.path.basename(_block_path(index_dir, name)) for name in domain_names}
+    for entry in os.scandir(os.path.join(index_dir, 'blocks')):
+        if entry.name not in keep:
+            os.remove(entry.path)
+
+    arrays = _build_arrays(blocks)
+    generation = 'gen-' + uuid.uuid4().hex
+    os.makedirs(os.path.join(index_dir, generation))
+    for name in ARRAYS:
+        np.save(os.path.join(index_dir, generation, name + '.npy'), arrays[name], allow_pickle=False)
+
+    # Switching the metadata publishes the new generation in one rename
+    current = meta['generation'] if meta else None
+    meta = {'version': INDEX_VERSION, 'generation': generation, 'domains': domain_names,
+            'fingerprints': fingerprints, 'rows': int(len(arrays['domain'])),
+            'tokens': int(len(arrays['vocab']))}
+    with atomic_write(os.path.join(index_dir, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+
+    # Keep the previous generation for searches that read the old metadata;
+    # arrays at the top level are from before generations existed
+    for entry in os.scandir(index_dir):
+        if entry.is_dir() and entry.name.startswith('gen-') and entry.name not in (generation, current):
+            shutil.rmtree(entry.path, ignore_errors=True)
+        elif entry.is_file() and entry.name.endswith('.npy'):
+            os.remove(entry.path)
+    return reread
+
+
+class SearchIndex:
+    """Read-only view of an index built by ``build_index``."""
+
+    def __init__(self, index_dir=DEFAULT_INDEX_DIR):
+        meta = _read_meta(index_dir)
+        if meta is None:
+            raise FileNotFoundError(f"No search index in {index_dir}; build it with 'main.py index build'")
+        self.domains = meta['domains']
+        self.meta = meta
+        generation_dir = os.path.join(index_dir, meta['generation'])
+        for name in ARRAYS:
+            setattr(self, name, np.load(os.path.join(generation_dir, name + '.npy'), mmap_mode='r'))
+
+    def _token_range(self, prefix):
+        """Range of token ids that start with ``prefix``."""
+        lo = int(np.searchsorted(self.vocab, prefix, side='left'))
+        hi = int(np.searchsorted(self.vocab, prefix + '\U0010ffff', side='left'))
+        return lo, hi
+
+    def _rows_for_tokens(self, token_ids):
+        if len(token_ids) == 0:
+            return np.empty(0, dtype=np.int32)
+        parts = [self.postings[self.posting_offsets[t]:self.posting_offsets[t + 1]] for t in token_ids]
+        return np.unique(np.concatenate(parts))
+
+    def _token_rows(self, token):
+        lo, hi = self._token_range(token)
+        if lo < hi and self.vocab[lo] == token:
+            return np.asarray(self.postings[self.posting_offsets[lo]:self.posting_offsets[lo + 1]])
+        return np.empty(0, dtype=np.int32)
+
+    def _prefix_rows(self, prefix):
+        # Postings are grouped by token, so all tokens with this prefix form one slice
+        lo, hi = self._token_range(prefix)
+        return np.unique(self.postings[self.posting_offsets[lo]:self.posting_offsets[hi]])
+
+    def _substring_rows(self, text):
+        if len(text) < 3:
+            candidates = np.arange(len(self.vocab))
+        else:
+            candidates = None
+            for gram in {text[i:i + 3] for i in range(len(text) - 2)}:
+                i = int(np.searchsorted(self.trigrams, gram))
+                if i == len(self.trigrams) or self.trigrams[i] != gram:
+                    return np.empty(0, dtype=np.int32)
+                tokens = self.trigram_postings[self.trigram_offsets[i]:self.trigram_offsets[i + 1]]
+                candidates = tokens if candidates is None else np.intersect1d(candidates, tokens)
+        matches = candidates[np.char.find(np.asarray(self.vocab[candidates]), text) >= 0]
+        return self._rows_for_tokens(matches)
+
+    def label(self, row):
+        """Return the query or page URL of ``row``."""
+        start, end = self.label_offsets[row], self.label_offsets[row + 1]
+        return bytes(self.label_bytes[start:end]).decode('utf-8')
+
+    def search(self, text, mode='terms', kind=None):
+        """Return the ids of rows matching ``text``.
+
+        ``terms``: labels containing every token of ``text``; ``prefix``: the
+        same, with the last token matched as a prefix (search as you type);
+        ``substring``: every token of ``text`` occurs inside some token of the
+        label (e.g. ``rein`` finds ``glasreinigung``); ``exact``: the whole
+        label equals ``text``, ignoring case. ``kind`` limits the search to
+        ``'queries'`` or ``'pages'``.
+        """
+        tokens = tokenize(text)
+        if not tokens:
+            return np.empty(0, dtype=np.int32)
+        rows = None
+        for i, token in enumerate(tokens):
+            if mode == 'substring':
+                matched = self._substring_rows(token)
+            elif mode == 'prefix' and i == len(tokens) - 1:
+                matched = self._prefix_rows(token)
+            else:
+                matched = self._token_rows(token)
+            rows = matched if rows is None else np.intersect1d(rows, matched, assume_unique=True)
+            if len(rows) == 0:
+                break
+        if kind is not None:
+            rows = rows[self.kind[rows] == KINDS.index(kind)]
+        if mode == 'exact':
+            wanted = str(text).strip().lower()
+            rows = rows[[self.label(row).lower() == wanted for row in rows]]
+        return rows
+
+    def results(self, rows, limit=None):
+        """Return matching rows as a DataFrame sorted by clicks, highest first."""
+        import pandas as pd
+
+        rows = np.asarray(rows, dtype=np.int64)
+        order = np.argsort(-np.asarray(self.clicks[rows]), kind='mergesort')
+        if limit is not None:
+            order = order[:limit]
+        rows = rows[order]
+        return pd.DataFrame({
+            'domain': [self.domains[code] for code in self.domain[rows]],
+            'kind': [KINDS[code] for code in self.kind[rows]],
+            'label': [self.label(row) for row in rows],
+            'Clicks': np.asarray(self.clicks[rows]),
+            'Impressions': np.asarray(self.impressions[rows]),
+            'Position': np.asarray(self.position[rows], dtype=np.float64).round(2),
+        })
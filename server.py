@@ -0,0 +1,263 @@
+"""Local HTTP API serving the per-domain analysis results as JSON.
+
+The API serves the same summary and report fragment that ``analyze_domain``
+produces for the HTML report, so dashboards can poll numbers instead of
+scraping ``reports/``. Endpoints (``DOMAIN`` is the domain part of the
+export folder name; its latest export is served):
+
+- ``/api/domains``: the summary of every domain
+- ``/api/domains/DOMAIN``: one domain's summary
+- ``/api/domains/DOMAIN/top-queries`` and ``/top-pages``: top rows by clicks
+- ``/api/domains/DOMAIN/devices``: clicks and impressions per device
+- ``/api/domains/DOMAIN/monthly``: clicks, impressions and CTR per month
+
+Two in-memory LRU caches sit in front of the analysis: one holds each
+folder's (summary, details), the other the encoded responses. Both are
+keyed by the export folders' fingerprints (names, sizes and mtimes of their
+files), so a changed export is picked up on the next request and stale
+entries simply age out. A request for one domain lists the data directory
+and fingerprints only that domain's folder, a few ``stat`` calls; only
+``/api/domains`` fingerprints every folder. A folder missing from both
+caches is loaded from the persisted results in ``.cache/results`` or
+analyzed once. Responses carry an ETag hashed from their body
+(``If-None-Match`` is answered with 304) and are gzip-compressed once, when
+cached, for clients that accept it.
+"""
+import gzip
+import hashlib
+import json
+import math
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+import discovery
+import manifest
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+DEFAULT_CACHE_ENTRIES = 256
+# Smaller responses are sent uncompressed
+GZIP_MIN_BYTES = 1024
+DOMAIN_ENDPOINTS = ('summary', 'top-queries', 'top-pages', 'devices', 'monthly')
+
+
+class LRUCache:
+    """Thread-safe mapping that keeps the ``max_entries`` most recently used entries."""
+
+    def __init__(self, max_entries=DEFAULT_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {'entries': len(self), 'max_entries': self.max_entries, 'hits': self.hits, 'misses': self.misses}
+
+
+class NotFound(Exception):
+    pass
+
+
+def _plain(value):
+    """Convert numpy scalars, NaN and dates into JSON-serializable values."""
+    if isinstance(value, dict):
+        return {str(key): _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    if hasattr(value, 'item') and not isinstance(value, (str, bytes)):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _records(df):
+    """Rows of ``df`` as a list of dicts (empty without a frame)."""
+    if df is None:
+        return []
+    return json.loads(df.to_json(orient='records', date_format='iso', double_precision=4))
+
+
+def monthly(daily):
+    """Clicks, impressions and CTR per month of a daily (Date, Clicks, Impressions) frame."""
+    if daily is None or not len(daily):
+        return []
+    months = daily['Date'].dt.to_period('M').astype(str)
+    table = daily[['Clicks', 'Impressions']].groupby(months.to_numpy(), sort=True).sum()
+    table['CTR'] = (table['Clicks'] / table['Impressions'].where(table['Impressions'] > 0) * 100).round(4)
+    return _records(table.rename_axis('Month').reset_index())
+
+
+class DomainResults:
+    """Analysis results of the latest export of every domain, cached by folder fingerprint.
+
+    ``analyze`` is called as ``analyze(folder)`` and returns a (folder,
+    summary, details, output, error, profile records) tuple like
+    ``main._analyze_domain_captured``.
+    """
+
+    def __init__(self, data_dir, analyze, results_dir=manifest.DEFAULT_RESULTS_DIR, domains=None,
+                 cache_entries=DEFAULT_CACHE_ENTRIES):
+        self.data_dir = data_dir
+        self.domains = domains
+        self.analyze = analyze
+        self.results = manifest.ResultsManifest(results_dir)
+        self.cache = LRUCache(cache_entries)
+        # Analyses run one at a time, so concurrent requests for a new export analyze it once
+        self._lock = threading.Lock()
+
+    def exports(self, domain=None):
+        """Return ``{domain: (ExportFolder, fingerprint)}`` for the latest export of each domain.
+
+        With ``domain``, only that domain's folder is fingerprinted and returned.
+        """
+        exports = discovery.select(discovery.scan(self.data_dir), domains=self.domains)
+        return {export.domain: (export, manifest.folder_fingerprint(export.path)) for export in exports
+                if domain is None or export.domain == domain}
+
+    def get(self, folder, fingerprint):
+        """Return (summary, details) for ``folder`` as of ``fingerprint``."""
+        key = (folder, fingerprint)
+        result = self.cache.get(key)
+        if result is not None:
+            return result
+        with self._lock:
+            result = self.cache.get(key)
+            if result is None:
+                result = self.results.lookup(folder, fingerprint)
+            if result is None:
+                _, summary, details, _, error, _ = self.analyze(folder)
+                if error is not None:
+                    raise RuntimeError(f"Could not analyze {folder}: {error}")
+                self.results.store(folder, fingerprint, summary, details)
+                self.results.save()
+                result = (summary, details)
+            self.cache.put(key, result)
+        return result
+
+
+class API:
+    """Builds, caches and compresses the JSON responses."""
+
+    def __init__(self, domain_results, cache_entries=DEFAULT_CACHE_ENTRIES):
+        self.domain_results = domain_results
+        self.responses = LRUCache(cache_entries)
+
+    def _summary(self, domain, export, fingerprint):
+        summary, _ = self.domain_results.get(export.path, fingerprint)
+        return dict(_plain(summary), domain=domain, folder=export.name, export_date=_plain(export.export_date))
+
+    def _build(self, parts, exports):
+        """The payload for the path ``parts``, e.g. ['api', 'domains', 'example.com', 'devices']."""
+        if parts in ([], ['api']):
+            return {'endpoints': ['/api/domains'] + [f'/api/domains/DOMAIN/{name}' for name in DOMAIN_ENDPOINTS],
+                    'domains': len(exports), 'results_cache': self.domain_results.cache.stats(),
+                    'response_cache': self.responses.stats()}
+        if parts == ['api', 'domains']:
+            return [self._summary(domain, *exports[domain]) for domain in sorted(exports)]
+        if len(parts) in (3, 4) and parts[:2] == ['api', 'domains']:
+            domain = parts[2]
+            endpoint = parts[3] if len(parts) == 4 else 'summary'
+            if domain not in exports:
+                raise NotFound(f"Unknown domain: {domain}")
+            if endpoint not in DOMAIN_ENDPOINTS:
+                raise NotFound(f"Unknown endpoint: {endpoint}")
+            if endpoint == 'summary':
+                return self._summary(domain, *exports[domain])
+            _, details = self.domain_results.get(exports[domain][0].path, exports[domain][1])
+            if endpoint == 'top-queries':
+                return _records(details.get('queries'))
+            if endpoint == 'top-pages':
+                return _records(details.get('pages'))
+            if endpoint == 'devices':
+                return _records(details.get('devices'))
+            return monthly(details.get('daily'))
+        raise NotFound(f"Unknown path: /{'/'.join(parts)}")
+
+    def respond(self, path):
+        """Return (status, etag, body, gzipped body or None) for a GET of ``path``."""
+        parts = [unquote(part) for part in urlsplit(path).path.split('/') if part]
+        # A domain's responses depend on its own export only; the index and the list on all of them
+        domain = parts[2] if len(parts) >= 3 and parts[:2] == ['api', 'domains'] else None
+        exports = self.domain_results.exports(domain)
+        if domain in exports:
+            state = exports[domain][1]
+        else:
+            state = tuple(sorted((name, fingerprint) for name, (_, fingerprint) in exports.items()))
+        key = (tuple(parts), state)
+        cached = self.responses.get(key)
+        if cached is not None:
+            return cached
+
+        try:
+            status, payload = 200, self._build(parts, exports)
+        except NotFound as e:
+            status, payload = 404, {'error': str(e)}
+        except Exception as e:
+            return 500, None, json.dumps({'error': str(e)}).encode('utf-8'), None
+        body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        gzipped = gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_BYTES else None
+        # From the body, so the index's live cache statistics change it too
+        etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        response = (status, etag, body, gzipped)
+        # The index reports cache statistics, so it is always rebuilt
+        if status == 200 and parts not in ([], ['api']):
+            self.responses.put(key, response)
+        return response
+
+
+class APIRequestHandler(BaseHTTPRequestHandler):
+    server_version = "SearchConsoleAPI/1.0"
+
+    def do_GET(self):
+        status, etag, body, gzipped = self.server.api.respond(self.path)
+        if etag is not None and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        use_gzip = gzipped is not None and 'gzip' in self.headers.get('Accept-Encoding', '')
+        payload = gzipped if use_gzip else body
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.send_header('Vary', 'Accept-Encoding')
+        if etag is not None:
+            self.send_header('ETag', etag)
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def make_server(api, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Return a threading HTTP server answering requests with ``api``."""
+    server = ThreadingHTTPServer((host, port), APIRequestHandler)
+    server.daemon_threads = True
+    server.api = api
+    return server
@@ -0,0 +1,276 @@
+"""Mergeable sketches of query-level metrics for portfolio-wide percentiles and top queries.
+
+Every domain's Queries.csv is summarised while it is loaded (chunk by
+chunk when it is streamed) into a ``QuerySketches`` bundle of fixed size,
+which is stored with the domain's results. At report time the bundles of
+all domains are merged, so portfolio-wide figures over tens of millions of
+query rows never need those rows in memory.
+
+The sketches and their error bounds, with N the number of query rows
+(quantiles) or the total clicks (counts) summarised:
+
+- ``KLLSketch`` (Karnin, Lang and Liberty, 2016): quantiles of one metric.
+  With ``k = 200`` the rank of a returned quantile is within about
+  1.7% of N of the requested rank with 99% probability (the reported
+  p90 lies between the true p88.3 and p91.7). Size is O(k) values,
+  however many rows and merges.
+- ``CountMinSketch`` (Cormode and Muthukrishnan, 2005): clicks per query.
+  Estimates never undercount, and overcount by at most e / width x N
+  with probability at least 1 - exp(-depth): 0.27% of the total clicks
+  with 98% probability for the defaults (width 1024, depth 4).
+- ``HeavyHitters`` (Misra-Gries summary, mergeable as shown by Agarwal et
+  al., 2012): candidate top queries. Any query with more than
+  N / (capacity + 1) clicks is always kept, and its kept count
+  undercounts by at most that much (0.5% of the total clicks for
+  capacity 200).
+
+The top queries table ranks the candidates by their heavy hitter count,
+the guaranteed lower bound, and reports the count-min estimate (an upper
+bound) only as the error bar: ranking by the upper bound would let a query
+whose hash collides with busy buckets overtake queries known to have more
+clicks. Only candidates whose lower bound clears N / (capacity + 1) are
+listed. Below that threshold the summary holds arbitrary survivors, not
+the leaders: on a flat distribution, where no query reaches it, the table
+is empty rather than wrong.
+"""
+import math
+import random
+
+import numpy as np
+import pandas as pd
+
+KLL_K = 200
+# Capacity ratio between adjacent KLL levels
+KLL_C = 2 / 3
+CM_WIDTH = 1024
+CM_DEPTH = 4
+HH_CAPACITY = 200
+
+QUANTILE_METRICS = ('Clicks', 'Impressions', 'CTR', 'Position')
+PERCENTILES = (0.25, 0.5, 0.75, 0.90)
+
+# Two independent 16-byte keys for pandas' SipHash, combined into CM_DEPTH hash functions
+_HASH_KEYS = ('search-console-1', 'search-console-2')
+
+
+class KLLSketch:
+    """Mergeable quantile sketch; level ``i`` holds items that each stand for 2**i values."""
+
+    def __init__(self, k=KLL_K, seed=0):
+        self.k = k
+        self.n = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.levels = [np.empty(0)]
+        self._random = random.Random(seed)
+
+    def _capacity(self, level):
+        return max(2, math.ceil(self.k * KLL_C ** (len(self.levels) - level - 1)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # An odd item out stays; every other of the rest moves up with double weight
+                odd = len(items) % 2
+                promoted = items[odd + self._random.getrandbits(1)::2]
+                self.levels[level] = items[:odd]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def update(self, values):
+        """Add an array of values; NaNs are ignored."""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.n += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other):
+        """Add the values summarised by ``other`` to this sketch."""
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self._compress()
+
+    def quantiles(self, qs):
+        """Return the values at fractions ``qs`` (0..1) of the ranks; NaN when empty."""
+        qs = np.asarray(qs, dtype=np.float64)
+        if self.n == 0:
+            return np.full(qs.shape, np.nan)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2 ** level, dtype=np.int64)
+                                  for level, items in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        cumulative = np.cumsum(weights[order])
+        index = np.searchsorted(cumulative, qs * cumulative[-1], side='left')
+        result = items[order][np.minimum(index, len(items) - 1)]
+        # The exact extremes are known
+        result[qs <= 0] = self.min
+        result[qs >= 1] = self.max
+        return result
+
+
+def _hashes(keys):
+    """Two 64-bit hashes per key."""
+    keys = pd.Series(keys, dtype=object)
+    return [pd.util.hash_pandas_object(keys, index=False, hash_key=key).to_numpy() for key in _HASH_KEYS]
+
+
+class CountMinSketch:
+    """Mergeable counts per key that never undercount."""
+
+    def __init__(self, width=CM_WIDTH, depth=CM_DEPTH):
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.total = 0
+
+    def _buckets(self, keys):
+        depth, width = self.table.shape
+        h1, h2 = _hashes(keys)
+        # Kirsch-Mitzenmacher: row i uses h1 + i * h2 (wrapping 64-bit arithmetic)
+        with np.errstate(over='ignore'):
+            combined = h1[None, :] + np.arange(depth, dtype=np.uint64)[:, None] * (h2 | np.uint64(1))[None, :]
+        return (combined % np.uint64(width)).astype(np.int64)
+
+    def update(self, keys, counts):
+        counts = np.nan_to_num(np.asarray(counts, dtype=np.float64))
+        if not len(counts):
+            return
+        width = self.table.shape[1]
+        for row, buckets in enumerate(self._buckets(keys)):
+            self.table[row] += np.rint(np.bincount(buckets, weights=counts, minlength=width)).astype(np.int64)
+        self.total += int(counts.sum())
+
+    def merge(self, other):
+        self.table += other.table
+        self.total += other.total
+
+    def estimate(self, keys):
+        """Estimated counts of ``keys`` (upper bounds)."""
+        if not len(keys):
+            return np.empty(0, dtype=np.int64)
+        buckets = self._buckets(keys)
+        return self.table[np.arange(self.table.shape[0])[:, None], buckets].min(axis=0)
+
+    @property
+    def error_bound(self):
+        """Largest overcount (with probability 1 - exp(-depth)) at the current total."""
+        return math.e / self.table.shape[1] * self.total
+
+
+class HeavyHitters:
+    """Mergeable Misra-Gries summary keeping at most ``capacity`` candidate keys."""
+
+    def __init__(self, capacity=HH_CAPACITY):
+        self.capacity = capacity
+        self.counts = {}
+        self.total = 0
+        # Total subtracted from every kept count so far: the undercount bound
+        self.error = 0
+
+    def _reduce(self):
+        if len(self.counts) <= self.capacity:
+            return
+        values = np.fromiter(self.counts.values(), dtype=np.int64, count=len(self.counts))
+        threshold = int(-np.partition(-values, self.capacity)[self.capacity])
+        self.counts = {key: count - threshold for key, count in self.counts.items() if count > threshold}
+        self.error += threshold
+
+    def update(self, keys, counts):
+        counts = np.nan_to_num(np.asarray(counts, dtype=np.float64)).astype(np.int64)
+        self.total += int(counts.sum())
+        # Only the chunk's top rows can survive the reduction, so skip the rest up front
+        if len(counts) > self.capacity + 1:
+            threshold = int(-np.partition(-counts, self.capacity)[self.capacity])
+            keep = counts > threshold
+            self.error += threshold
+            keys, counts = np.asarray(keys, dtype=object)[keep], counts[keep] - threshold
+        for key, count in zip(keys, counts.tolist()):
+            self.counts[key] = self.counts.get(key, 0) + count
+        self._reduce()
+
+    def merge(self, other):
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.total += other.total
+        self.error += other.error
+        self._reduce()
+
+    @property
+    def threshold(self):
+        """Counts above this, N / (capacity + 1), are always kept."""
+        return self.total / (self.capacity + 1)
+
+
+class QuerySketches:
+    """Quantile, count-min and heavy hitter sketches of Queries.csv rows."""
+
+    def __init__(self, seed=0):
+        self.quantiles = {metric: KLLSketch(seed=seed + i) for i, metric in enumerate(QUANTILE_METRICS)}
+        self.clicks = CountMinSketch()
+        self.heavy_hitters = HeavyHitters()
+
+    def update(self, df):
+        """Add a chunk (or all) of a Queries.csv export."""
+        for metric in QUANTILE_METRICS:
+            self.quantiles[metric].update(df[metric].to_numpy(dtype=np.float64))
+        labels = df.iloc[:, 0].astype(str).to_numpy(dtype=object)
+        clicks = df['Clicks'].to_numpy(dtype=np.float64)
+        self.clicks.update(labels, clicks)
+        self.heavy_hitters.update(labels, clicks)
+
+    def merge(self, other):
+        for metric in QUANTILE_METRICS:
+            self.quantiles[metric].merge(other.quantiles[metric])
+        self.clicks.merge(other.clicks)
+        self.heavy_hitters.merge(other.heavy_hitters)
+
+    @classmethod
+    def merge_all(cls, sketches, seed=0):
+        """Return a new bundle summarising all of ``sketches`` (None entries are skipped)."""
+        merged = cls(seed=seed)
+        for sketch in sketches:
+            if sketch is not None:
+                merged.merge(sketch)
+        return merged
+
+    @property
+    def rows(self):
+        return self.quantiles[QUANTILE_METRICS[0]].n
+
+    def percentiles(self, percentiles=PERCENTILES):
+        """DataFrame of approximate percentiles per metric (rows) across all summarised queries."""
+        table = {metric: self.quantiles[metric].quantiles(percentiles) for metric in QUANTILE_METRICS}
+        columns = ['p25', 'median', 'p75', 'p90'] if tuple(percentiles) == PERCENTILES else \
+            [f"p{p * 100:g}" for p in percentiles]
+        return pd.DataFrame.from_dict(table, orient='index', columns=columns)
+
+    def top_queries(self, top_n=10):
+        """Top queries ranked by their guaranteed (heavy hitter) clicks, with count-min upper bounds.
+
+        Only queries guaranteed more than ``heavy_hitters.threshold`` clicks
+        are returned, so the result can hold fewer than ``top_n`` rows.
+        """
+        keys = list(self.heavy_hitters.counts)
+        result = pd.DataFrame({
+            'query': pd.Series(keys, dtype=object),
+            'clicks_min': pd.Series([self.heavy_hitters.counts[key] for key in keys], dtype=np.int64),
+            'clicks_max': pd.Series(self.clicks.estimate(keys), dtype=np.int64),
+        })
+        # The true count also lies within the heavy hitter undercount bound
+        result['clicks_min'] = np.maximum(result['clicks_min'], 0)
+        result['clicks_max'] = np.minimum(result['clicks_max'], result['clicks_min'] + self.heavy_hitters.error)
+        result = result[result['clicks_min'] > self.heavy_hitters.threshold]
+        return result.sort_values(['clicks_min', 'query'], ascending=[False, True], kind='mergesort').head(top_n)
@@ -0,0 +1,101 @@
+"""Descriptive statistics for the per-domain summary metrics.
+
+``describe_metrics`` computes every figure the report and console summary
+show (total, mean, standard deviation, min/max with their domains and the
+25/50/75/90th percentiles) for all metric columns at once: the columns are
+stacked into one 2-D array, sorted once, and all percentiles are
+interpolated from that sorted array without sorting again. NaN values (e.g. the CTR of a domain
+without impressions) are skipped, as pandas does.
+"""
+import numpy as np
+
+SUMMARY_METRICS = ('total_clicks', 'total_impressions', 'avg_ctr', 'avg_position')
+PERCENTILES = (0.25, 0.5, 0.75, 0.90)
+
+
+class MetricStats:
+    """Descriptive statistics for one metric column."""
+
+    def __init__(self, count, total, mean, std, minimum, maximum, min_label, max_label, p25, median, p75, p90):
+        self.count = count
+        self.total = total
+        self.mean = mean
+        self.std = std
+        self.min = minimum
+        self.max = maximum
+        self.min_label = min_label
+        self.max_label = max_label
+        self.p25 = p25
+        self.median = median
+        self.p75 = p75
+        self.p90 = p90
+
+    @property
+    def iqr(self):
+        return self.p75 - self.p25
+
+    def __repr__(self):
+        return (f"MetricStats(mean={self.mean:.2f}, median={self.median:.2f}, std={self.std:.2f}, "
+                f"min={self.min:.2f}, max={self.max:.2f})")
+
+
+def _sorted_quantiles(sorted_values, count):
+    """PERCENTILES of each column of ``sorted_values``, whose first ``count`` rows are the valid values.
+
+    Interpolates linearly between the closest ranks, like ``np.nanquantile``.
+    """
+    positions = np.outer(PERCENTILES, np.maximum(count - 1, 0))
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.minimum(lower + 1, np.maximum(count - 1, 0))
+    below = np.take_along_axis(sorted_values, lower, axis=0)
+    above = np.take_along_axis(sorted_values, upper, axis=0)
+    return below + (above - below) * (positions - lower)
+
+
+def describe_metrics(summary_df, columns=SUMMARY_METRICS, label_column='domain'):
+    """Return a dict mapping each of ``columns`` to its MetricStats.
+
+    ``min_label``/``max_label`` hold the ``label_column`` value of the first
+    row with the minimum/maximum, like ``df.loc[df[col].idxmax(), label]``.
+    """
+    values = summary_df[list(columns)].to_numpy(dtype=np.float64)
+    labels = summary_df[label_column].to_numpy()
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=0)
+
+    # One sort per column; NaNs end up at the bottom of each column
+    order = np.argsort(values, axis=0, kind='stable')
+    sorted_values = np.take_along_axis(values, order, axis=0)
+    quantiles = _sorted_quantiles(sorted_values, count)
+
+    totals = np.nansum(values, axis=0)
+    means = totals / np.maximum(count, 1)
+    squared = np.where(valid, values - means, 0.0) ** 2
+    stds = np.sqrt(squared.sum(axis=0) / np.maximum(count - 1, 1))
+
+    result = {}
+    for i, column in enumerate(columns):
+        n = int(count[i])
+        if n == 0:
+            result[column] = MetricStats(0, 0.0, *([np.nan] * 4), None, None, *([np.nan] * 4))
+            continue
+        # Stable ascending sort: the first minimum is at the top, the first maximum
+        # is the first row of the run of equal values at the end
+        min_row = order[0, i]
+        max_value = sorted_values[n - 1, i]
+        max_row = order[np.searchsorted(sorted_values[:n, i], max_value, side='left'), i]
+        result[column] = MetricStats(
+            count=n,
+            total=totals[i],
+            mean=means[i],
+            std=stds[i] if n > 1 else np.nan,
+            minimum=sorted_values[0, i],
+            maximum=max_value,
+            min_label=labels[min_row],
+            max_label=labels[max_row],
+            p25=quantiles[0, i],
+            median=quantiles[1, i],
+            p75=quantiles[2, i],
+            p90=quantiles[3, i],
+        )
+    return result
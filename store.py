@@ -0,0 +1,211 @@
+"""A local SQLite store of every domain's exports for ad-hoc SQL.
+
+``ingest`` loads the Countries, Dates, Devices, Pages, Queries and Search
+appearance exports of each export folder into one table per file, with a
+``domain`` and ``export_date`` column on every row, so questions across
+all clients are a single query, e.g. pages ranking on positions 4-10 with
+more than 1000 impressions::
+
+    SELECT domain, page, impressions, position FROM pages
+    WHERE position BETWEEN 4 AND 10 AND impressions > 1000
+    ORDER BY impressions DESC
+
+Tables (``LABEL`` is the file's label column):
+
+- ``exports(id, domain, folder, export_date, fingerprint)``
+- ``countries(country)``, ``dates(date)``, ``devices(device)``,
+  ``pages(page)``, ``queries(query)`` and
+  ``search_appearance(appearance)``, each with ``export_id, domain,
+  export_date, LABEL, clicks, impressions, ctr, position``
+
+Every table is indexed on ``domain``, ``dates`` also on ``date`` and
+``queries``/``pages`` on their label. Ingesting is incremental: folders
+whose fingerprint (see ``manifest.folder_fingerprint``) is unchanged are
+skipped, changed folders are replaced. The store records ``STORE_VERSION``
+as its ``user_version``; a store written by another version is rebuilt
+from scratch on the next ingest.
+"""
+import os
+import sqlite3
+
+import manifest
+import schema
+import streaming
+from loader import load_csv_data
+
+# Bump when the tables change or exports are parsed differently
+STORE_VERSION = 1
+
+DEFAULT_STORE_PATH = os.path.join(".cache", "store.sqlite3")
+
+# Export file -> (table, label column in the CSV, label column in the table)
+EXPORT_TABLES = {
+    "Countries.csv": ('countries', 'Country', 'country'),
+    "Dates.csv": ('dates', 'Date', 'date'),
+    "Devices.csv": ('devices', 'Device', 'device'),
+    "Pages.csv": ('pages', 'Top pages', 'page'),
+    "Queries.csv": ('queries', 'Top queries', 'query'),
+    "Search appearance.csv": ('search_appearance', 'Search Appearance', 'appearance'),
+}
+
+# Index name -> (table, columns)
+INDEXES = {
+    'idx_exports_domain': ('exports', 'domain, export_date'),
+    **{f'idx_{table}_export': (table, 'export_id') for table, _, _ in EXPORT_TABLES.values()},
+    **{f'idx_{table}_domain': (table, 'domain') for table, _, _ in EXPORT_TABLES.values() if table != 'dates'},
+    'idx_dates_domain_date': ('dates', 'domain, date'),
+    'idx_dates_date': ('dates', 'date'),
+    'idx_pages_page': ('pages', 'page'),
+    'idx_queries_query': ('queries', 'query'),
+}
+
+
+def _create_tables(conn):
+    conn.execute("""CREATE TABLE IF NOT EXISTS exports (
+        id INTEGER PRIMARY KEY, domain TEXT NOT NULL, folder TEXT NOT NULL UNIQUE,
+        export_date TEXT, fingerprint TEXT NOT NULL)""")
+    for table, _, label in EXPORT_TABLES.values():
+        conn.execute(f"""CREATE TABLE IF NOT EXISTS {table} (
+            export_id INTEGER NOT NULL REFERENCES exports(id), domain TEXT NOT NULL, export_date TEXT,
+            {label} TEXT, clicks INTEGER, impressions INTEGER, ctr REAL, position REAL)""")
+
+
+def _drop_tables(conn):
+    for table, _, _ in EXPORT_TABLES.values():
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+    conn.execute("DROP TABLE IF EXISTS exports")
+
+
+def _create_indexes(conn):
+    for name, (table, columns) in INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+
+
+def _drop_indexes(conn):
+    for name in INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def _chunks(folder, filename):
+    """Yield the cleaned rows of one export, in chunks for files above the streaming threshold."""
+    import pandas as pd
+
+    file_path = os.path.join(folder, filename)
+    if not os.path.exists(file_path):
+        return
+    if streaming.should_stream(file_path):
+        reader = pd.read_csv(file_path, chunksize=streaming.settings()['chunksize'],
+                             **schema.read_csv_kwargs(filename))
+        for chunk in reader:
+            yield schema.apply_metric_dtypes(chunk)
+    else:
+        df = load_csv_data(folder, filename)
+        if df is not None:
+            yield df
+
+
+def _rows(df, export_id, domain, export_date, label_column):
+    """Tuples for ``executemany``: plain Python values, dates as ISO text, NaN as NULL."""
+    import pandas as pd
+
+    labels = df[label_column]
+    if pd.api.types.is_datetime64_any_dtype(labels):
+        labels = labels.dt.strftime('%Y-%m-%d')
+    labels = labels.astype(object).where(labels.notna(), None)
+    metrics = df[['Clicks', 'Impressions', 'CTR', 'Position']].astype('float64')
+    # float32 CTR and position back to the precision of the export
+    metrics[['CTR', 'Position']] = metrics[['CTR', 'Position']].round(4)
+    metrics = metrics.astype(object).where(metrics.notna(), None)
+    clicks, impressions, ctr, position = (metrics[column].tolist() for column in metrics.columns)
+    clicks = [None if value is None else int(value) for value in clicks]
+    impressions = [None if value is None else int(value) for value in impressions]
+    return zip([export_id] * len(df), [domain] * len(df), [export_date] * len(df), labels.tolist(),
+               clicks, impressions, ctr, position)
+
+
+def _delete_export(conn, export_id):
+    for table, _, _ in EXPORT_TABLES.values():
+        conn.execute(f"DELETE FROM {table} WHERE export_id = ?", (export_id,))
+    conn.execute("DELETE FROM exports WHERE id = ?", (export_id,))
+
+
+def ingest(exports, path=DEFAULT_STORE_PATH, full=False, known_folders=None):
+    """Load ``exports`` (discovery.ExportFolder) into the store at ``path``; returns (ingested, rows).
+
+    Exports already stored with the same fingerprint are skipped unless
+    ``full``. Stored exports whose folder is not in ``known_folders``
+    (default: the paths of ``exports``) are removed.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] != STORE_VERSION:
+                # Written by another version (or empty): start over
+                _drop_tables(conn)
+                conn.execute(f"PRAGMA user_version = {STORE_VERSION}")
+            _create_tables(conn)
+            stored = {folder: (export_id, fingerprint) for export_id, folder, fingerprint
+                      in conn.execute("SELECT id, folder, fingerprint FROM exports")}
+            keep = {os.path.abspath(folder) for folder in
+                    (known_folders if known_folders is not None else [export.path for export in exports])}
+            for folder, (export_id, _) in stored.items():
+                if folder not in keep:
+                    _delete_export(conn, export_id)
+
+            changed = []
+            for export in exports:
+                folder = os.path.abspath(export.path)
+                fingerprint = manifest.folder_fingerprint(export.path)
+                if not full and stored.get(folder, (None, None))[1] == fingerprint:
+                    continue
+                changed.append((export, folder, fingerprint))
+
+            # Filling an empty store is much faster with the indexes built afterwards
+            if not stored:
+                _drop_indexes(conn)
+
+            rows = 0
+            for export, folder, fingerprint in changed:
+                if folder in stored:
+                    _delete_export(conn, stored[folder][0])
+                export_date = export.export_date.isoformat() if export.export_date else None
+                export_id = conn.execute(
+                    "INSERT INTO exports (domain, folder, export_date, fingerprint) VALUES (?, ?, ?, ?)",
+                    (export.domain, folder, export_date, fingerprint)).lastrowid
+                for filename, (table, label_column, label) in EXPORT_TABLES.items():
+                    for df in _chunks(export.path, filename):
+                        conn.executemany(f"INSERT INTO {table} VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                         _rows(df, export_id, export.domain, export_date, label_column))
+                        rows += len(df)
+            _create_indexes(conn)
+        if changed:
+            # Refresh the statistics the query planner uses to pick indexes
+            conn.execute("ANALYZE")
+        return len(changed), rows
+    finally:
+        conn.close()
+
+
+def connect(path=DEFAULT_STORE_PATH):
+    """Open the store read-only."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No store at {path}; run 'main.py ingest' first")
+    conn = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True)
+    if conn.execute("PRAGMA user_version").fetchone()[0] != STORE_VERSION:
+        conn.close()
+        raise FileNotFoundError(f"The store at {path} was written by another version; run 'main.py ingest' to rebuild it")
+    return conn
+
+
+def query(sql, path=DEFAULT_STORE_PATH, params=()):
+    """Run ``sql`` against the store and return the result as a DataFrame."""
+    import pandas as pd
+
+    conn = connect(path)
+    try:
+        return pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
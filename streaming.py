@@ -0,0 +1,84 @@
+"""Chunked reading of large Queries.csv and Pages.csv exports.
+
+The report only needs the top rows by clicks plus column totals, so for
+files above a size threshold the CSV is read in chunks: totals are kept as
+mergeable running sums (see ``aggregate``) and, per sort column, a bounded buffer of at most ``top_n``
+candidate rows is merged with each chunk's own top rows. Memory stays
+proportional to the chunk size instead of the file size.
+
+Ties are broken by position in the file (stable sort), which is what
+``df.sort_values(column, ascending=False, kind='mergesort').head(top_n)``
+returns for the fully loaded frame, so both paths give identical tables.
+"""
+import os
+
+DEFAULT_THRESHOLD_MB = 100
+DEFAULT_CHUNKSIZE = 50_000
+
+# Files that are worth streaming; the other exports are tiny
+STREAMABLE_FILES = ('Queries.csv', 'Pages.csv')
+
+_settings = {
+    'threshold_mb': DEFAULT_THRESHOLD_MB,
+    'chunksize': DEFAULT_CHUNKSIZE,
+}
+
+
+def configure(threshold_mb=DEFAULT_THRESHOLD_MB, chunksize=DEFAULT_CHUNKSIZE):
+    """Set the streaming options for this process."""
+    _settings.update(threshold_mb=threshold_mb, chunksize=chunksize)
+
+
+def settings():
+    """Return a copy of the current streaming options (e.g. to configure worker processes)."""
+    return dict(_settings)
+
+
+def should_stream(file_path):
+    """Return True if ``file_path`` is a streamable export above the size threshold."""
+    if os.path.basename(file_path) not in STREAMABLE_FILES:
+        return False
+    return os.path.getsize(file_path) > _settings['threshold_mb'] * 1024 * 1024
+
+
+def top_rows(df, column, top_n):
+    """Return the ``top_n`` rows of ``df`` by ``column``, ties kept in file order."""
+    return df.sort_values(column, ascending=False, kind='mergesort').head(top_n)
+
+
+def stream_csv(file_path, top_n=10, sort_columns=('Clicks',), on_chunk=None):
+    """Read ``file_path`` in chunks, returning (top tables, totals).
+
+    ``top tables`` maps each of ``sort_columns`` to a DataFrame of its
+    ``top_n`` rows; ``totals`` holds the mergeable sums from
+    ``aggregate.sums`` (clicks, impressions, position weight) plus
+    ``'rows'``, the number of rows read. ``on_chunk``, if given, is called
+    with every cleaned chunk (e.g. to update sketches).
+    """
+    import pandas as pd
+
+    import aggregate
+    import schema
+
+    sums = None
+    rows = 0
+    tops = {column: None for column in sort_columns}
+
+    reader = pd.read_csv(file_path, chunksize=_settings['chunksize'],
+                         **schema.read_csv_kwargs(os.path.basename(file_path)))
+    for chunk in reader:
+        schema.apply_metric_dtypes(chunk)
+        if on_chunk is not None:
+            on_chunk(chunk)
+        rows += len(chunk)
+        sums = aggregate.merge([sums, aggregate.sums(chunk)])
+
+        for column in sort_columns:
+            candidates = top_rows(chunk, column, top_n)
+            if tops[column] is not None:
+                # Chunks carry a running row index, so sort_index restores file order
+                candidates = pd.concat([tops[column], candidates]).sort_index()
+            tops[column] = top_rows(candidates, column, top_n)
+
+    totals = dict(sums or dict.fromkeys(aggregate.SUM_COLUMNS, 0), rows=rows)
+    return tops, totals
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The modules live flat at the repository root, as for main.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import aggregate
+
+
+@pytest.fixture
+def daily():
+    rng = np.random.default_rng(0)
+    dates = pd.date_range('2024-01-01', '2024-06-30', freq='D')
+    frames = []
+    for domain in ('a.example', 'b.example', 'c.example'):
+        impressions = rng.integers(0, 5000, size=len(dates))
+        frames.append(pd.DataFrame({
+            'domain': domain,
+            'Date': dates,
+            'Clicks': rng.integers(0, 200, size=len(dates)).clip(max=impressions),
+            'Impressions': impressions,
+            'Position': rng.uniform(1, 60, size=len(dates)),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def _assert_totals_equal(merged, expected):
+    assert merged['Clicks'] == expected['Clicks']
+    assert merged['Impressions'] == expected['Impressions']
+    assert merged['CTR'] == pytest.approx(expected['CTR'], rel=1e-12)
+    assert merged['Position'] == pytest.approx(expected['Position'], rel=1e-12)
+
+
+def test_merged_totals_do_not_depend_on_the_split(daily):
+    expected = aggregate.aggregate(daily)
+    chunks = [aggregate.sums(daily.iloc[start:start + 97]) for start in range(0, len(daily), 97)]
+    months = [aggregate.sums(group) for _, group in daily.groupby(daily['Date'].dt.to_period('M'))]
+    domains = [aggregate.sums(group) for _, group in daily.groupby('domain')]
+    for parts in (chunks, months, domains):
+        _assert_totals_equal(aggregate.finalize(aggregate.merge(parts)), expected)
+    # Merging already merged aggregates changes nothing either
+    _assert_totals_equal(aggregate.finalize(aggregate.merge([aggregate.merge(chunks[:3]), *chunks[3:]])), expected)
+
+
+def test_merged_groups_do_not_depend_on_the_split(daily):
+    daily['Month'] = daily['Date'].dt.to_period('M')
+    expected = aggregate.aggregate(daily, by='Month')
+    by_domain = [aggregate.sums(group, by='Month') for _, group in daily.groupby('domain')]
+    merged = aggregate.finalize(aggregate.merge(by_domain))
+    pd.testing.assert_frame_equal(merged, expected, check_exact=False, rtol=1e-12)
+
+
+def test_position_is_weighted_by_impressions():
+    df = pd.DataFrame({'Clicks': [1, 9], 'Impressions': [100, 900], 'Position': [10.0, 2.0]})
+    totals = aggregate.aggregate(df)
+    assert totals['CTR'] == pytest.approx(1.0)
+    assert totals['Position'] == pytest.approx(2.8)
+    # The unweighted mean of the ratios would be wrong
+    assert totals['Position'] != pytest.approx(df['Position'].mean())
@@ -0,0 +1,39 @@
+import os
+
+import charts
+
+
+def _write(path, size, mtime):
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+    os.utime(path, (mtime, mtime))
+
+
+def test_evict_removes_least_recently_used_charts(tmp_path):
+    megabyte = 1024 * 1024
+    for age, key in enumerate(['new', 'middle', 'old']):
+        _write(tmp_path / f"{key}.png", megabyte, 1000 - age)
+        _write(tmp_path / f"{key}.b64", megabyte // 2, 1000 - age)
+
+    assert charts.evict(str(tmp_path), max_mb=3) == 1
+    assert sorted(os.listdir(tmp_path)) == ['middle.b64', 'middle.png', 'new.b64', 'new.png']
+
+
+def test_evict_keeps_charts_of_the_current_report(tmp_path):
+    _write(tmp_path / "old.png", 1024 * 1024, 1)
+    _write(tmp_path / "new.png", 1024 * 1024, 2)
+
+    assert charts.evict(str(tmp_path), max_mb=1, keep=['old']) == 1
+    assert os.listdir(tmp_path) == ['old.png']
+
+
+def test_prune_linked_deletes_unreferenced_copies(tmp_path):
+    linked_dir = tmp_path / 'charts'
+    linked_dir.mkdir()
+    for key in ('current', 'stale'):
+        _write(linked_dir / f"{key}.png", 10, 1)
+
+    assert charts.prune_linked(str(tmp_path), ['current']) == 1
+    assert os.listdir(linked_dir) == ['current.png']
+    assert charts.prune_linked(str(tmp_path)) == 1
+    assert not linked_dir.exists()
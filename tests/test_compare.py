@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+import compare
+import discovery
+
+
+def _table(rows):
+    return pd.DataFrame(rows, columns=['Top queries', 'Clicks', 'Impressions', 'Position'])
+
+
+def test_diff_tables_flags_new_lost_and_kept_with_deltas():
+    before = _table([("glas", 10, 100, 5.0), ("wien", 4, 200, 10.0), ("alt", 3, 30, 2.0)])
+    after = _table([("wien", 9, 300, 6.0), ("glas", 10, 50, 4.0), ("neu", 7, 70, 1.0)])
+    diff = compare.diff_tables(before, after, 'Top queries').set_index('Top queries')
+
+    assert diff['status'].to_dict() == {'glas': 'kept', 'wien': 'kept', 'alt': 'lost', 'neu': 'new'}
+    assert diff['clicks_delta'].to_dict() == {'glas': 0, 'wien': 5, 'alt': -3, 'neu': 7}
+    assert diff.loc['wien', 'impressions_delta'] == 100
+    assert diff.loc['wien', 'ctr_before'] == 2.0 and diff.loc['wien', 'ctr_after'] == 3.0
+    assert diff.loc['glas', 'ctr_delta'] == 10.0
+    assert diff.loc['wien', 'position_delta'] == -4.0
+
+    # Missing on one side: no CTR or position there, zero counts
+    assert diff.loc['neu', 'clicks_before'] == 0 and np.isnan(diff.loc['neu', 'position_before'])
+    assert diff.loc['alt', 'impressions_after'] == 0 and np.isnan(diff.loc['alt', 'ctr_delta'])
+
+    assert compare.summarize(diff.reset_index()) == {
+        'kept': 2, 'new': 1, 'lost': 1, 'clicks_before': 17, 'clicks_after': 26,
+        'clicks_new': 7, 'clicks_lost': 3}
+
+
+def test_duplicate_labels_are_summed_with_impression_weighted_position():
+    before = _table([("glas", 1, 100, 2.0), ("glas", 3, 300, 6.0)])
+    after = _table([("glas", 2, 100, 3.0), (1234, 5, 50, 1.0)])
+    diff = compare.diff_tables(before, after, 'Top queries').set_index('Top queries')
+
+    assert diff.loc['glas', 'clicks_before'] == 4 and diff.loc['glas', 'impressions_before'] == 400
+    assert diff.loc['glas', 'position_before'] == 5.0
+    assert diff.loc['glas', 'position_delta'] == -2.0
+    # Labels are compared as text
+    assert diff.loc['1234', 'status'] == 'new'
+
+
+def test_movers_sorts_by_click_change():
+    before = _table([(f"q{i}", 10, 100, 1.0) for i in range(5)])
+    after = _table([(f"q{i}", 10 + (i - 2) * 3, 100, 1.0) for i in range(5)])
+    gains, losses = compare.movers(compare.diff_tables(before, after, 'Top queries'), top_n=2)
+    assert gains['Top queries'].tolist() == ['q4', 'q3']
+    assert losses['Top queries'].tolist() == ['q0', 'q1']
+
+
+def test_export_pairs_pairs_successive_exports_of_each_domain():
+    exports = [discovery.ExportFolder(name, name, *discovery.parse_folder_name(name)) for name in (
+        "b.de-Performance-on-Search-2025-01-01", "a.at-Performance-on-Search-2025-03-01",
+        "a.at-Performance-on-Search-2025-01-01", "a.at-Performance-on-Search-2025-02-01", "undated")]
+    pairs = [(before.name[-10:], after.name[-10:]) for before, after in compare.export_pairs(exports)]
+    assert pairs == [('2025-02-01', '2025-03-01')]
+    pairs = [(before.domain, after.export_date.month) for before, after in compare.export_pairs(exports, True)]
+    assert pairs == [('a.at', 2), ('a.at', 3)]
@@ -0,0 +1,80 @@
+from datetime import date
+
+import pytest
+
+import discovery
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    for name in ("shop.example.com-Performance-on-Search-2025-01-05",
+                 "shop.example.com-Performance-on-Search-2025-03-02",
+                 "Blog.Example.com-Performance-on-Search-2025-02-10",
+                 "other.de-Performance-on-Search-2024-12-31",
+                 "other.de-Performance-on-Search-2025-13-01",
+                 "manual-export"):
+        (tmp_path / name).mkdir()
+    (tmp_path / "notes.txt").write_text("not a folder")
+    return tmp_path
+
+
+def _names(exports):
+    return [export.name for export in exports]
+
+
+def test_parse_folder_name():
+    assert discovery.parse_folder_name("a.at-Performance-on-Search-2025-03-02") == ('a.at', date(2025, 3, 2))
+    assert discovery.parse_folder_name("a.at-Performance-on-Search-2025-02-30") == (
+        "a.at-Performance-on-Search-2025-02-30", None)
+    assert discovery.parse_folder_name("manual-export") == ("manual-export", None)
+
+
+def test_scan_parses_every_subdirectory(data_dir):
+    exports = discovery.scan(str(data_dir))
+    assert len(exports) == 6
+    assert [(export.domain, export.export_date) for export in exports][:2] == [
+        ('Blog.Example.com', date(2025, 2, 10)), ('manual-export', None)]
+
+
+def test_domain_patterns_match_case_insensitively(data_dir):
+    exports = discovery.scan(str(data_dir))
+    assert _names(discovery.select(exports, domains=['*.example.com'], latest_only=False)) == [
+        "Blog.Example.com-Performance-on-Search-2025-02-10",
+        "shop.example.com-Performance-on-Search-2025-01-05",
+        "shop.example.com-Performance-on-Search-2025-03-02"]
+    assert _names(discovery.select(exports, domains=['blog.example.com', 'nothing.*'])) == [
+        "Blog.Example.com-Performance-on-Search-2025-02-10"]
+
+
+def test_since_drops_older_and_undated_exports(data_dir):
+    exports = discovery.scan(str(data_dir))
+    assert _names(discovery.select(exports, since=date(2025, 2, 10), latest_only=False)) == [
+        "Blog.Example.com-Performance-on-Search-2025-02-10",
+        "shop.example.com-Performance-on-Search-2025-03-02"]
+
+
+def test_latest_export_per_domain(data_dir):
+    folders = discovery.find_domain_folders(str(data_dir))
+    assert [path.rsplit('/', 1)[-1] for path in folders] == [
+        "Blog.Example.com-Performance-on-Search-2025-02-10",
+        "manual-export",
+        "other.de-Performance-on-Search-2024-12-31",
+        # The folder with an invalid date is a domain of its own
+        "other.de-Performance-on-Search-2025-13-01",
+        "shop.example.com-Performance-on-Search-2025-03-02"]
+    # Filters apply before picking the latest export
+    folders = discovery.find_domain_folders(str(data_dir), domains=['shop.*'], since=date(2025, 1, 1))
+    assert [path.rsplit('/', 1)[-1] for path in folders] == ["shop.example.com-Performance-on-Search-2025-03-02"]
+
+
+def test_command_line_filters(data_dir):
+    import main
+
+    args = main.parse_args(['--data-dir', str(data_dir), '--domain', '*.example.com', '--domain', 'other.de',
+                            '--since', '2025-01-01', '--all-exports'])
+    selected = discovery.select(discovery.scan(args.data_dir), domains=args.domain, since=args.since,
+                                latest_only=not args.all_exports)
+    assert _names(selected) == [
+        "Blog.Example.com-Performance-on-Search-2025-02-10",
+        "shop.example.com-Performance-on-Search-2025-01-05",
+        "shop.example.com-Performance-on-Search-2025-03-02"]
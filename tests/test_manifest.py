@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+import cache
+import main
+import manifest
+from benchmarks.synthetic import generate_tree
+
+
+@pytest.fixture
+def tree(tmp_path):
+    folders = generate_tree(str(tmp_path / 'data'), domains=2, days=30, queries=50, pages=20)
+    yield tmp_path, folders
+    # run() configures the export cache for the whole process
+    cache.configure()
+
+
+def _run(tmp_path, monkeypatch):
+    """Run the analysis once and return the folders it analyzed (rather than reused)."""
+    analyzed = []
+    analyze_domains = main.analyze_domains
+
+    def recording(folders, **kwargs):
+        analyzed.extend(folders)
+        return analyze_domains(folders, **kwargs)
+
+    monkeypatch.setattr(main, 'analyze_domains', recording)
+    main.run(main.parse_args(['--data-dir', str(tmp_path / 'data'), '--report-dir', str(tmp_path / 'reports'),
+                              '--results-dir', str(tmp_path / 'results'), '--no-cache', '--charts', 'off']))
+    return analyzed
+
+
+def test_only_new_or_changed_folders_are_analyzed(tree, monkeypatch):
+    tmp_path, folders = tree
+    assert _run(tmp_path, monkeypatch) == folders
+    assert _run(tmp_path, monkeypatch) == []
+
+    path = os.path.join(folders[0], "Dates.csv")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert _run(tmp_path, monkeypatch) == [folders[0]]
+
+    monkeypatch.setattr(manifest, 'RESULTS_VERSION', manifest.RESULTS_VERSION + 1)
+    assert _run(tmp_path, monkeypatch) == folders
+
+
+def test_save_keeps_entries_saved_by_another_process(tmp_path):
+    results_dir = str(tmp_path / 'results')
+    cli, server = manifest.ResultsManifest(results_dir), manifest.ResultsManifest(results_dir)
+    cli.store('data/a.example', 'fingerprint-a', {'domain': 'a'}, {})
+    server.store('data/b.example', 'fingerprint-b', {'domain': 'b'}, {})
+    cli.save()
+    server.save()
+
+    merged = manifest.ResultsManifest(results_dir)
+    assert merged.lookup('data/a.example', 'fingerprint-a') == ({'domain': 'a'}, {})
+    assert merged.lookup('data/b.example', 'fingerprint-b') == ({'domain': 'b'}, {})
+
+    # Pruning a folder removes it for good, whatever the other process still has in memory
+    cli.prune(['data/b.example'])
+    cli.save()
+    server.save()
+    assert set(manifest.ResultsManifest(results_dir).entries) == {'b.example'}
+
+
+def test_lookup_rejects_a_result_computed_for_another_fingerprint(tmp_path):
+    results_dir = str(tmp_path / 'results')
+    first, second = manifest.ResultsManifest(results_dir), manifest.ResultsManifest(results_dir)
+    first.store('data/a.example', 'old', {'version': 'old'}, {})
+    first.save()
+    second_view = manifest.ResultsManifest(results_dir)
+    # Another process replaces the result after this one read the manifest
+    second.store('data/a.example', 'new', {'version': 'new'}, {})
+    assert second_view.lookup('data/a.example', 'old') is None
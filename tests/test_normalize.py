@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+
+import normalize
+
+
+def test_integer_columns_read_any_separator_as_thousands():
+    df = pd.DataFrame({'Clicks': ["1,234", "1.234", "1.234.567", "12"],
+                       'Impressions': ["12,345", "12.345", "1,234,567", "7"]})
+    normalize.normalize_metrics(df)
+    np.testing.assert_array_equal(df['Clicks'], [1234, 1234, 1234567, 12])
+    np.testing.assert_array_equal(df['Impressions'], [12345, 12345, 1234567, 7])
+
+
+def test_parse_numbers_integer():
+    np.testing.assert_array_equal(normalize.parse_numbers(["1,234", "1.234", "1.234.567"], integer=True),
+                                  [1234, 1234, 1234567])
+
+
+def test_ctr_and_position_keep_decimal_separators():
+    df = pd.DataFrame({'CTR': ["3.45%", "3,45 %", "<1%", "1.234,5%"], 'Position': ["12,5", "12.5", "1", "2,25"]})
+    normalize.normalize_metrics(df)
+    np.testing.assert_allclose(df['CTR'], [3.45, 3.45, 1, 1234.5])
+    np.testing.assert_allclose(df['Position'], [12.5, 12.5, 1, 2.25])
+
+
+def test_missing_and_unparseable_values_become_nan():
+    parsed = normalize.parse_numbers(pd.Series(["1,234", None, "n/a"], dtype=object), integer=True)
+    assert parsed[0] == 1234
+    assert np.isnan(parsed[1:]).all()
@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+import cache
+import main
+import prefetch
+from benchmarks.synthetic import generate_tree
+
+
+@pytest.fixture
+def folders(tmp_path):
+    cache.configure(enabled=False)
+    folders = generate_tree(str(tmp_path / 'data'), domains=3, days=20, queries=30, pages=10)
+    with open(os.path.join(folders[1], "Dates.csv"), 'w', encoding='utf-8') as f:
+        f.write('Date,Clicks\n"unterminated\n')
+    yield folders
+    cache.configure()
+
+
+def test_prefetch_returns_load_errors_without_printing(folders, capsys):
+    results = list(prefetch.prefetch_domains(folders, depth=2))
+    assert capsys.readouterr().out == ''
+    assert [folder for folder, _, _ in results] == folders
+    _, frames, errors = results[1]
+    assert list(errors) == ["Dates.csv"] and "Dates.csv" not in frames
+    assert "Queries.csv" in frames and not results[0][2]
+
+
+def test_load_errors_are_reported_in_the_failing_domains_output(folders, capsys):
+    results = list(main.analyze_domains(folders, prefetch_depth=2))
+    assert [error for _, _, _, error in results] == [None, None, None]
+    assert results[1][1]['total_clicks'] == 0
+
+    out = capsys.readouterr().out
+    headers = [out.index(f"Analyzing domain: {os.path.basename(folder)}") for folder in folders]
+    error = out.index("Error loading Dates.csv: ")
+    assert out.count("Error loading") == 1
+    assert headers[1] < error < headers[2]
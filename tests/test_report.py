@@ -0,0 +1,61 @@
+import json
+import os
+
+import pandas as pd
+
+import report
+
+
+def _domain(clicks):
+    summary = {'domain': f"d{clicks}.example", 'total_clicks': clicks, 'total_impressions': clicks * 20,
+               'avg_ctr': 5.0, 'avg_position': 12.5}
+    details = {'devices': pd.DataFrame({'Device': ['Mobile'], 'Clicks': [clicks], 'Click %': [100.0],
+                                        'Impressions': [clicks * 20], 'Impression %': [100.0]}),
+               'queries': None, 'pages': None}
+    return summary, details
+
+
+def _write(report_dir, page_keys):
+    domains = [_domain(clicks) for clicks in (10, 20, 30)]
+    summaries = [summary for summary, _ in domains]
+    details = {summary['domain']: domain_details for summary, domain_details in domains}
+    return report.write_split_report(str(report_dir), summaries, details, page_keys=page_keys)
+
+
+def _page_mtimes(report_dir):
+    pages_dir = report_dir / report.SPLIT_PAGES_DIR
+    return {name: os.stat(pages_dir / name).st_mtime_ns for name in os.listdir(pages_dir)}
+
+
+def test_only_changed_domain_pages_are_rewritten(tmp_path):
+    keys = {'d10.example': 'a', 'd20.example': 'a', 'd30.example': 'a'}
+    index_path, written = _write(tmp_path, keys)
+    assert written == 3
+    assert os.path.exists(index_path)
+    before = _page_mtimes(tmp_path)
+
+    assert _write(tmp_path, keys)[1] == 0
+    assert _page_mtimes(tmp_path) == before
+
+    assert _write(tmp_path, dict(keys, **{'d20.example': 'b'}))[1] == 1
+    after = _page_mtimes(tmp_path)
+    changed = {name for name in after if after[name] != before[name]}
+    assert changed == {report.page_filename('d20.example')}
+
+
+def test_comparison_data_is_written_as_a_script(tmp_path):
+    _write(tmp_path, {})
+    assert not os.path.exists(tmp_path / "domains.json")
+    script = (tmp_path / "domains.js").read_text(encoding='utf-8')
+    prefix = "window.SEARCH_CONSOLE_DOMAINS = "
+    assert script.startswith(prefix)
+    data = json.loads(script[len(prefix):].rstrip().rstrip(';'))
+    assert [row[0] for row in data['rows']] == ['d10.example', 'd20.example', 'd30.example']
+    assert data['rows'][0][-1] == f"{report.SPLIT_PAGES_DIR}/{report.page_filename('d10.example')}"
+
+
+def test_domains_without_a_page_have_no_link():
+    summary_df = pd.DataFrame([_domain(10)[0], _domain(20)[0]])
+    data = report.comparison_data(summary_df, {'d10.example': 'd10.example.html'})
+    assert data['rows'][1][-1] is None
+    assert "row[column.page] === null" in report.COMPARISON_SCRIPT
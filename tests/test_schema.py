@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+import schema
+
+
+def test_whole_counts_are_downcast():
+    df = schema.apply_metric_dtypes(pd.DataFrame({'Clicks': ["1,234", "5"], 'Impressions': [10, 20]}))
+    assert df['Clicks'].dtype == np.int32
+    np.testing.assert_array_equal(df['Clicks'], [1234, 5])
+
+
+def test_missing_counts_stay_float32():
+    df = schema.apply_metric_dtypes(pd.DataFrame({'Clicks': [1.0, np.nan]}))
+    assert df['Clicks'].dtype == np.float32
+
+
+def test_fractional_or_out_of_range_counts_are_not_truncated():
+    df = schema.apply_metric_dtypes(pd.DataFrame({'Clicks': [1.5, 2.0], 'Impressions': [2.0 ** 40, 1.0]}))
+    assert df['Clicks'].dtype == np.float64
+    assert df['Impressions'].dtype == np.float64
+    np.testing.assert_array_equal(df['Clicks'], [1.5, 2.0])
+    assert df['Impressions'].iloc[0] == 2.0 ** 40
+
+
+def test_unquoted_thousands_separators_are_read_as_counts(tmp_path):
+    path = tmp_path / "Dates.csv"
+    path.write_text('Date,Clicks,Impressions,CTR,Position\n'
+                    '2025-03-02,98,1.730,"5,66 %","45,72"\n'
+                    '2025-03-01,5,862,"0,58 %","16,28"\n', encoding='utf-8')
+    df = schema.read_export(str(path))
+    assert df['Impressions'].dtype == np.int32
+    np.testing.assert_array_equal(df['Impressions'], [1730, 862])
+    np.testing.assert_allclose(df['Position'], [45.72, 16.28], rtol=1e-6)
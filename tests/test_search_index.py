@@ -0,0 +1,87 @@
+import os
+
+import pytest
+
+import cache
+import search_index
+
+
+@pytest.fixture
+def uncached():
+    cache.configure(enabled=False)
+    yield
+    cache.configure()
+
+
+def _write_folder(root, domain, queries, pages):
+    folder = root / f"{domain}-Performance-on-Search-2025-03-02"
+    folder.mkdir()
+    for filename, label_column, rows in (("Queries.csv", 'Top queries', queries),
+                                         ("Pages.csv", 'Top pages', pages)):
+        with open(folder / filename, 'w', encoding='utf-8') as f:
+            f.write(f"{label_column},Clicks,Impressions,CTR,Position\n")
+            for label, clicks in rows:
+                f.write(f"{label},{clicks},1000,{clicks / 10:.2f}%,4.5\n")
+    return str(folder)
+
+
+@pytest.fixture
+def folders(tmp_path, uncached):
+    return [
+        _write_folder(tmp_path, 'a.at',
+                      [("glas reinigung wien", 40), ("fensterreinigung wien", 30), ("glas", 5)],
+                      [("https://a.at/blog/glas-reinigung", 25), ("https://a.at/kontakt", 3)]),
+        _write_folder(tmp_path, 'b.de',
+                      [("glasreinigung berlin", 50), ("reinigung preis", 10)],
+                      [("https://b.de/service/reinigung", 12)]),
+    ]
+
+
+def _labels(index, rows):
+    return index.results(rows)['label'].tolist()
+
+
+def test_search_modes(tmp_path, folders):
+    index_dir = str(tmp_path / 'index')
+    assert search_index.build_index(folders, index_dir) == 2
+    index = search_index.SearchIndex(index_dir)
+
+    # Every word, in queries and page URLs alike, sorted by clicks
+    assert _labels(index, index.search("glas reinigung")) == [
+        "glas reinigung wien", "https://a.at/blog/glas-reinigung"]
+    assert _labels(index, index.search("reinigung", kind='queries')) == [
+        "glas reinigung wien", "reinigung preis"]
+    assert _labels(index, index.search("glas rei", mode='prefix')) == [
+        "glas reinigung wien", "https://a.at/blog/glas-reinigung"]
+    assert _labels(index, index.search("rein", mode='substring', kind='queries')) == [
+        "glasreinigung berlin", "glas reinigung wien", "fensterreinigung wien", "reinigung preis"]
+    assert _labels(index, index.search("Glas", mode='exact')) == ["glas"]
+    assert len(index.search("glas wien", mode='exact')) == 0
+    assert len(index.search("unbekannt")) == 0
+
+    result = index.results(index.search("berlin"))
+    assert result[['domain', 'kind', 'Clicks']].values.tolist() == [
+        [os.path.basename(folders[1]), 'queries', 50]]
+
+
+def test_rebuild_rereads_changed_domains_and_swaps_generations(tmp_path, folders):
+    index_dir = str(tmp_path / 'index')
+    search_index.build_index(folders, index_dir)
+    assert search_index.build_index(folders, index_dir) == 0
+    before = search_index.SearchIndex(index_dir)
+
+    with open(os.path.join(folders[1], "Queries.csv"), 'a', encoding='utf-8') as f:
+        f.write("glas berlin,7,100,7.00%,2.0\n")
+    assert search_index.build_index(folders, index_dir) == 1
+    index = search_index.SearchIndex(index_dir)
+    assert _labels(index, index.search("berlin")) == ["glasreinigung berlin", "glas berlin"]
+    # A reader opened before the rebuild keeps a consistent view of the previous generation
+    assert _labels(before, before.search("berlin")) == ["glasreinigung berlin"]
+
+    assert search_index.build_index(folders[:1], index_dir) == 0
+    index = search_index.SearchIndex(index_dir)
+    assert index.domains == [os.path.basename(folders[0])]
+    assert len(index.search("berlin")) == 0
+    generations = {name for name in os.listdir(index_dir) if name.startswith('gen-')}
+    assert len(generations) == 2 and index.meta['generation'] in generations
+    assert before.meta['generation'] not in generations
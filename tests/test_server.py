@@ -0,0 +1,88 @@
+import gzip
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+
+import pandas as pd
+import pytest
+
+import server
+
+
+def _analyze(folder):
+    daily = pd.DataFrame({'Date': pd.date_range('2025-01-01', periods=60, freq='D'), 'Clicks': 10, 'Impressions': 200})
+    queries = pd.DataFrame({'Top queries': [f"query {i}" for i in range(100)], 'Clicks': range(100, 0, -1)})
+    details = {'daily': daily, 'queries': queries, 'pages': None,
+               'devices': pd.DataFrame({'Device': ['Mobile', 'Desktop'], 'Clicks': [7, 3]})}
+    return folder, {'Clicks': 600, 'CTR': 5.0}, details, "", None, []
+
+
+@pytest.fixture
+def api(tmp_path):
+    for name in ("a.example-Performance-on-Search-2025-03-02", "b.example-Performance-on-Search-2025-03-02",
+                 "a.example-Performance-on-Search-2025-02-02"):
+        os.makedirs(tmp_path / 'data' / name)
+        (tmp_path / 'data' / name / "Dates.csv").write_text("Date,Clicks\n", encoding='utf-8')
+    domain_results = server.DomainResults(str(tmp_path / 'data'), _analyze, results_dir=str(tmp_path / 'results'))
+    return server.API(domain_results)
+
+
+def _json(response):
+    status, _, body, _ = response
+    return status, json.loads(body)
+
+
+def test_routes(api):
+    status, domains = _json(api.respond('/api/domains'))
+    assert status == 200
+    assert [(d['domain'], d['export_date']) for d in domains] == [('a.example', '2025-03-02'),
+                                                                  ('b.example', '2025-03-02')]
+    assert _json(api.respond('/api/domains/a.example'))[1]['Clicks'] == 600
+    assert _json(api.respond('/api/domains/a.example/devices'))[1] == [{'Device': 'Mobile', 'Clicks': 7},
+                                                                       {'Device': 'Desktop', 'Clicks': 3}]
+    assert len(_json(api.respond('/api/domains/a.example/top-queries'))[1]) == 100
+    assert _json(api.respond('/api/domains/a.example/top-pages'))[1] == []
+    assert [row['Month'] for row in _json(api.respond('/api/domains/a.example/monthly'))[1]] == ['2025-01', '2025-02',
+                                                                                                '2025-03']
+
+
+def test_unknown_paths_are_404(api):
+    assert _json(api.respond('/api/domains/c.example'))[0] == 404
+    assert _json(api.respond('/api/domains/a.example/nope'))[0] == 404
+    assert _json(api.respond('/nope'))[0] == 404
+
+
+def test_index_etag_follows_the_cache_statistics(api):
+    _, first_etag, _, _ = api.respond('/api')
+    api.respond('/api/domains/a.example')
+    _, second_etag, _, _ = api.respond('/api')
+    assert first_etag != second_etag
+
+
+def test_domain_request_fingerprints_only_that_domain(api, monkeypatch):
+    fingerprinted = []
+    fingerprint = server.manifest.folder_fingerprint
+    monkeypatch.setattr(server.manifest, 'folder_fingerprint',
+                        lambda folder: fingerprinted.append(os.path.basename(folder)) or fingerprint(folder))
+    api.respond('/api/domains/b.example/devices')
+    assert fingerprinted == ["b.example-Performance-on-Search-2025-03-02"]
+
+
+def test_http_gzip_and_not_modified(api):
+    httpd = server.make_server(api, port=0)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{httpd.server_port}/api/domains/a.example/top-queries"
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers={'Accept-Encoding': 'gzip'})) as response:
+            assert response.headers['Content-Encoding'] == 'gzip'
+            etag = response.headers['ETag']
+            assert len(json.loads(gzip.decompress(response.read()))) == 100
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(urllib.request.Request(url, headers={'If-None-Match': etag}))
+        assert error.value.code == 304
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
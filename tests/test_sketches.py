@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+import sketches
+
+
+def _queries(clicks):
+    return pd.DataFrame({'Top queries': [f"query {i}" for i in range(len(clicks))], 'Clicks': clicks,
+                         'Impressions': np.asarray(clicks) * 10, 'CTR': 10.0, 'Position': 5.0})
+
+
+def _merged(domain_clicks, labels):
+    """Merged sketches of one Queries.csv per row of ``domain_clicks``, and the true totals per query."""
+    totals = pd.Series(0, index=labels)
+    domains = []
+    for seed, clicks in enumerate(domain_clicks):
+        df = _queries(clicks)
+        df['Top queries'] = labels
+        totals += df['Clicks'].to_numpy()
+        domain_sketches = sketches.QuerySketches(seed=seed)
+        domain_sketches.update(df)
+        domains.append(domain_sketches)
+    return sketches.QuerySketches.merge_all(domains), totals
+
+
+def test_top_queries_are_ranked_by_guaranteed_clicks():
+    # Twenty leaders above the heavy hitter threshold among near-uniform
+    # queries in ten domains
+    rng = np.random.default_rng(0)
+    labels = [f"query {i}" for i in range(1020)]
+    domain_clicks = [np.concatenate([3000 + 50 * np.arange(20)[::-1], rng.integers(95, 106, size=1000)])
+                     for _ in range(10)]
+    merged, totals = _merged(domain_clicks, labels)
+
+    top = merged.top_queries(top_n=10)
+    assert list(top['query']) == labels[:10]
+    assert top['clicks_min'].is_monotonic_decreasing
+    assert (top['clicks_min'] > merged.heavy_hitters.threshold).all()
+    true_clicks = totals[top['query']].to_numpy()
+    assert (top['clicks_min'].to_numpy() <= true_clicks).all()
+    assert (top['clicks_max'].to_numpy() >= true_clicks).all()
+
+
+def test_top_queries_are_left_out_below_the_guarantee_threshold():
+    # A flat distribution: the few slightly larger queries are far below
+    # N / (capacity + 1), so the summary cannot tell them from the rest
+    rng = np.random.default_rng(0)
+    labels = [f"query {i}" for i in range(1000)]
+    domain_clicks = [rng.integers(95, 106, size=len(labels)) for _ in range(10)]
+    for clicks in domain_clicks:
+        clicks[:3] = [130, 128, 126]
+    merged, totals = _merged(domain_clicks, labels)
+
+    assert totals.max() < merged.heavy_hitters.threshold
+    assert merged.top_queries(top_n=10).empty
+
+
+def test_top_query_bounds_hold_for_a_skewed_distribution():
+    clicks = (10000 / np.arange(1, 2001)).astype(np.int64)
+    query_sketches = sketches.QuerySketches()
+    query_sketches.update(_queries(clicks))
+
+    top = query_sketches.top_queries(top_n=10)
+    assert list(top['query']) == [f"query {i}" for i in range(10)]
+    assert (top['clicks_min'].to_numpy() <= clicks[:10]).all()
+    assert (top['clicks_max'].to_numpy() >= clicks[:10]).all()
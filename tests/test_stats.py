@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import stats
+
+
+@pytest.mark.parametrize('rows', [1, 2, 5, 200])
+def test_describe_metrics_matches_pandas(rows):
+    rng = np.random.default_rng(rows)
+    df = pd.DataFrame({column: rng.normal(100, 30, rows) for column in stats.SUMMARY_METRICS})
+    df['domain'] = [f"d{i}.at" for i in range(rows)]
+    # Ties and skipped NaNs
+    df['avg_position'] = df['avg_position'].round(-1)
+    df.loc[::3, 'avg_ctr'] = np.nan
+
+    result = stats.describe_metrics(df)
+    for column in stats.SUMMARY_METRICS:
+        values = df[column]
+        metric = result[column]
+        if values.notna().sum() == 0:
+            assert metric.count == 0 and np.isnan(metric.median)
+            continue
+        expected = values.quantile(list(stats.PERCENTILES)).to_numpy()
+        np.testing.assert_allclose([metric.p25, metric.median, metric.p75, metric.p90], expected)
+        assert metric.count == values.notna().sum()
+        assert metric.mean == pytest.approx(values.mean())
+        assert metric.min == values.min() and metric.max == values.max()
+        assert metric.min_label == df.loc[values.idxmin(), 'domain']
+        assert metric.max_label == df.loc[values.idxmax(), 'domain']
+        if metric.count > 1:
+            assert metric.std == pytest.approx(values.std())
+
+
+def test_all_missing_column():
+    df = pd.DataFrame({'domain': ['a.at', 'b.de'], 'avg_ctr': [np.nan, np.nan]})
+    metric = stats.describe_metrics(df, columns=['avg_ctr'])['avg_ctr']
+    assert metric.count == 0 and metric.min_label is None and np.isnan(metric.p90)
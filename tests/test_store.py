@@ -0,0 +1,103 @@
+import os
+import sqlite3
+
+import pytest
+
+import cache
+import discovery
+import store
+import streaming
+from benchmarks.synthetic import generate_tree
+from loader import load_csv_data
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    cache.configure(enabled=False)
+    generate_tree(str(tmp_path / 'data'), domains=3, days=30, queries=80, pages=20, locale='de')
+    yield str(tmp_path / 'data')
+    cache.configure()
+    streaming.configure()
+
+
+def _ingest(data_dir, path, **kwargs):
+    return store.ingest(discovery.select(discovery.scan(data_dir)), path, **kwargs)
+
+
+def test_ingest_and_query_round_trip(data_dir, tmp_path):
+    path = str(tmp_path / 'store.sqlite3')
+    ingested, rows = _ingest(data_dir, path)
+    assert ingested == 3
+
+    total = 0
+    for export in discovery.scan(data_dir):
+        for filename, (table, label_column, _) in store.EXPORT_TABLES.items():
+            df = load_csv_data(export.path, filename)
+            if df is None:
+                continue
+            total += len(df)
+            stored = store.query(f"SELECT clicks, impressions FROM {table} WHERE domain = ?", path,
+                                 params=(export.domain,))
+            assert len(stored) == len(df)
+            assert stored['clicks'].sum() == df['Clicks'].sum()
+            assert stored['impressions'].sum() == df['Impressions'].sum()
+    assert rows == total
+
+    domain = discovery.scan(data_dir)[0].domain
+    queries = load_csv_data(discovery.scan(data_dir)[0].path, "Queries.csv")
+    top = queries.sort_values(['Clicks', 'Top queries'], ascending=[False, True]).iloc[0]
+    result = store.query("SELECT query, clicks, ctr, position FROM queries WHERE domain = ? "
+                         "ORDER BY clicks DESC, query LIMIT 1", path, params=(domain,))
+    assert result.loc[0, 'query'] == top['Top queries']
+    assert result.loc[0, 'clicks'] == top['Clicks']
+    assert result.loc[0, 'ctr'] == pytest.approx(top['CTR'], abs=1e-4)
+    assert result.loc[0, 'position'] == pytest.approx(top['Position'], abs=1e-4)
+
+    dates = store.query("SELECT MAX(date) AS last FROM dates", path)
+    assert dates.loc[0, 'last'] == '2025-03-02'
+
+
+def test_streamed_ingest_stores_the_same_rows(data_dir, tmp_path):
+    full_path, streamed_path = str(tmp_path / 'full.sqlite3'), str(tmp_path / 'streamed.sqlite3')
+    _ingest(data_dir, full_path)
+    streaming.configure(threshold_mb=0, chunksize=7)
+    _ingest(data_dir, streamed_path)
+
+    sql = "SELECT domain, query, clicks, impressions, ctr, position FROM queries ORDER BY domain, query"
+    assert store.query(sql, streamed_path).equals(store.query(sql, full_path))
+
+
+def test_ingest_is_incremental(data_dir, tmp_path):
+    path = str(tmp_path / 'store.sqlite3')
+    _ingest(data_dir, path)
+    assert _ingest(data_dir, path) == (0, 0)
+
+    first, second, _ = discovery.scan(data_dir)
+    with open(os.path.join(first.path, "Queries.csv"), 'a', encoding='utf-8') as f:
+        f.write("neue anfrage,5,50,\"10 %\",\"3,5\"\n")
+    ingested, _ = _ingest(data_dir, path)
+    assert ingested == 1
+    added = store.query("SELECT clicks, impressions, ctr, position FROM queries WHERE query = 'neue anfrage'", path)
+    assert added.values.tolist() == [[5, 50, 10.0, 3.5]]
+
+    # Exports no longer found are removed
+    store.ingest([export for export in discovery.scan(data_dir) if export.path != second.path], path)
+    domains = store.query("SELECT DISTINCT domain FROM queries ORDER BY domain", path)['domain'].tolist()
+    assert second.domain not in domains and len(domains) == 2
+    assert store.query("SELECT COUNT(*) AS n FROM exports", path).loc[0, 'n'] == 2
+
+
+def test_store_of_another_version_is_rebuilt(data_dir, tmp_path):
+    path = str(tmp_path / 'store.sqlite3')
+    _ingest(data_dir, path)
+    conn = sqlite3.connect(path)
+    conn.execute(f"PRAGMA user_version = {store.STORE_VERSION + 1}")
+    conn.close()
+    with pytest.raises(FileNotFoundError):
+        store.connect(path)
+
+    assert _ingest(data_dir, path)[0] == 3
+    assert store.query("SELECT COUNT(*) AS n FROM exports", path).loc[0, 'n'] == 3
+
+    with pytest.raises(FileNotFoundError):
+        store.connect(str(tmp_path / 'missing.sqlite3'))
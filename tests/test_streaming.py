@@ -0,0 +1,43 @@
+import random
+
+import pandas as pd
+import pytest
+
+import cache
+import loader
+import streaming
+
+
+@pytest.fixture
+def uncached():
+    cache.configure(enabled=False)
+    yield
+    cache.configure()
+    streaming.configure()
+
+
+def _write_export(path, label_column, rows, seed=0):
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"{label_column},Clicks,Impressions,CTR,Position\n")
+        for i in range(rows):
+            impressions = rng.randint(1, 3000)
+            # Few distinct click counts, so the top rows have ties to break
+            clicks = rng.randint(0, 30) * 5
+            f.write(f"label {i},{clicks},{impressions},\"{clicks / impressions * 100:.2f}%\",{rng.uniform(1, 80):.1f}\n")
+
+
+@pytest.mark.parametrize('filename,label_column', [("Queries.csv", 'Top queries'), ("Pages.csv", 'Top pages')])
+def test_streamed_and_full_loads_give_the_same_tables(tmp_path, uncached, filename, label_column):
+    _write_export(tmp_path / filename, label_column, 5000)
+
+    streaming.configure(threshold_mb=float('inf'))
+    full_rows, full_totals = loader.load_ranked_data(str(tmp_path), filename, top_n=10)
+    streaming.configure(threshold_mb=0, chunksize=317)
+    assert streaming.should_stream(str(tmp_path / filename))
+    streamed_rows, streamed_totals = loader.load_ranked_data(str(tmp_path), filename, top_n=10)
+
+    pd.testing.assert_frame_equal(streamed_rows, full_rows.head(10))
+    assert streamed_totals.keys() == full_totals.keys()
+    for key, value in full_totals.items():
+        assert streamed_totals[key] == pytest.approx(value, rel=1e-9)
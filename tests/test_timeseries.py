@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+import timeseries
+
+
+def _daily(start, days, seed, gaps=()):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, periods=days, freq='D')
+    daily = pd.DataFrame({'Date': dates,
+                          'Clicks': rng.integers(50, 150, days).astype(float),
+                          'Impressions': rng.integers(2000, 4000, days).astype(float)})
+    return daily.drop(index=list(gaps)).reset_index(drop=True)
+
+
+def _reference(daily, dates):
+    """The same statistics for one domain with pandas, on the aligned calendar."""
+    series = daily.set_index('Date').reindex(pd.DatetimeIndex(dates))
+    clicks = series['Clicks']
+    sums = {window: clicks.rolling(window, min_periods=window).sum() for window in timeseries.WINDOWS}
+    wow = (sums[7] / sums[7].shift(timeseries.WEEK) - 1) * 100
+    yoy = (sums[28] / sums[28].shift(timeseries.YEAR) - 1) * 100
+    previous = clicks.shift(1).rolling(timeseries.ANOMALY_WINDOW, min_periods=timeseries.ANOMALY_MIN_DAYS)
+    z = (clicks - previous.mean()) / previous.std()
+    return sums, wow, yoy, z
+
+
+def test_statistics_match_pandas_for_every_domain():
+    daily_by_domain = {
+        'a.at': _daily('2024-01-01', 420, seed=1, gaps=(10, 200, 201, 410)),
+        'b.de': _daily('2024-03-15', 300, seed=2),
+        'empty.com': None,
+    }
+    aligned = timeseries.align(daily_by_domain)
+    assert aligned.domains == ['a.at', 'b.de']
+    result = timeseries.analyze(aligned)
+
+    for column, domain in enumerate(aligned.domains):
+        sums, wow, yoy, z = _reference(daily_by_domain[domain], aligned.dates)
+        np.testing.assert_allclose(result['clicks_7d'][:, column], sums[7])
+        np.testing.assert_allclose(result['clicks_28d'][:, column], sums[28])
+        np.testing.assert_allclose(result['clicks_wow'][:, column], wow)
+        np.testing.assert_allclose(result['clicks_yoy'][:, column], yoy)
+        np.testing.assert_allclose(result['clicks_z'][:, column], z)
+    # Only a.at spans more than a year plus a window
+    assert np.isfinite(result['clicks_yoy'][:, 0]).any()
+    assert np.isnan(result['clicks_yoy'][:, 1]).all()
+    # A missing day leaves every window that covers it undefined
+    assert np.isnan(result['clicks_7d'][200:208, 0]).all()
+
+
+def test_ctr_is_taken_from_summed_clicks_and_impressions():
+    daily = pd.DataFrame({'Date': pd.date_range('2025-01-01', periods=28, freq='D'),
+                          'Clicks': [1.0, 99.0] * 14, 'Impressions': [100.0, 900.0] * 14})
+    table = timeseries.trends({'a.at': daily})
+    assert table.loc[0, 'ctr_28d'] == 10.0
+
+
+def test_spikes_are_flagged_as_anomalies():
+    daily = _daily('2025-01-01', 90, seed=3)
+    daily.loc[40, 'Clicks'] = 1000.0
+    daily.loc[80, 'Clicks'] = 0.0
+    # Too few earlier days to judge
+    daily.loc[5, 'Clicks'] = 1000.0
+    aligned = timeseries.align({'a.at': daily})
+    result = timeseries.analyze(aligned)
+
+    assert np.flatnonzero(result['clicks_anomaly'][:, 0]).tolist() == [40, 80]
+    assert np.isnan(result['clicks_z'][:timeseries.ANOMALY_MIN_DAYS, 0]).all()
+    table = timeseries.latest(aligned, result)
+    # Only the drop falls within the last ANOMALY_WINDOW days of the series
+    assert table.loc[0, 'clicks_anomalies'] == 1
+    assert table.loc[0, 'last_date'] == pd.Timestamp('2025-03-31')
+
+
+def test_latest_uses_each_domains_last_observed_day():
+    table = timeseries.trends({'a.at': _daily('2025-01-01', 40, seed=4),
+                               'b.de': _daily('2025-01-01', 30, seed=5)})
+    assert table['last_date'].tolist() == [pd.Timestamp('2025-02-09'), pd.Timestamp('2025-01-30')]
+    assert table['clicks_7d'].notna().all()
+    assert timeseries.trends({}).empty
@@ -0,0 +1,160 @@
+"""Rolling windows, period-over-period deltas and anomaly flags for all domains at once.
+
+Each domain's daily series (the ``daily`` frame of its report fragment) is
+placed into one 2-D array per metric with a row per calendar day and a
+column per domain, NaN where a domain has no data. Every statistic is then
+computed for all domains together with cumulative sums along the date
+axis, so the cost does not depend on a Python loop over domains:
+
+- rolling 7- and 28-day sums (NaN until a full window of days is present);
+- week over week: the last 7 days against the 7 days before, in percent;
+- year over year: the last 28 days against the same 28 days 52 weeks
+  earlier (364 days, so weekdays line up), in percent;
+- anomalies: days more than ``ANOMALY_Z`` standard deviations away from
+  the mean of the previous 28 days.
+
+CTR over a window is derived from the summed clicks and impressions, never
+by averaging daily CTRs.
+"""
+import numpy as np
+import pandas as pd
+
+WINDOWS = (7, 28)
+WEEK = 7
+YEAR = 364
+ANOMALY_WINDOW = 28
+# Fewest days in the trailing window needed to judge a day an anomaly
+ANOMALY_MIN_DAYS = 14
+ANOMALY_Z = 3.0
+METRICS = ('Clicks', 'Impressions')
+
+
+class AlignedSeries:
+    """Daily metrics of many domains on one calendar: ``values[metric]`` is dates x domains."""
+
+    def __init__(self, dates, domains, values):
+        self.dates = dates
+        self.domains = domains
+        self.values = values
+
+    @property
+    def observed(self):
+        return ~np.isnan(self.values[METRICS[0]])
+
+
+def align(daily_by_domain):
+    """Align ``{domain: daily frame}`` (Date, Clicks, Impressions) into an AlignedSeries."""
+    domains = [domain for domain, daily in daily_by_domain.items() if daily is not None and len(daily)]
+    if not domains:
+        return AlignedSeries(np.empty(0, dtype='datetime64[D]'), [], {
+            metric: np.empty((0, 0)) for metric in METRICS})
+
+    frames = [daily_by_domain[domain] for domain in domains]
+    lengths = np.array([len(daily) for daily in frames])
+    days = np.concatenate([daily['Date'].to_numpy(dtype='datetime64[D]') for daily in frames])
+    columns = np.repeat(np.arange(len(domains)), lengths)
+
+    start, end = days.min(), days.max()
+    dates = np.arange(start, end + np.timedelta64(1, 'D'), dtype='datetime64[D]')
+    rows = (days - start).astype(np.int64)
+
+    values = {}
+    for metric in METRICS:
+        grid = np.full((len(dates), len(domains)), np.nan)
+        grid[rows, columns] = np.concatenate([daily[metric].to_numpy(dtype=np.float64) for daily in frames])
+        values[metric] = grid
+    return AlignedSeries(dates, domains, values)
+
+
+def _window_sums(values, window):
+    """Sums and observed-day counts over the ``window`` days ending at each row.
+
+    The first ``window - 1`` rows cover the shorter window since the first date.
+    """
+    filled = np.nan_to_num(values)
+    padding = np.zeros((1, values.shape[1]))
+    sums = np.cumsum(np.vstack([padding, filled]), axis=0)
+    counts = np.cumsum(np.vstack([padding, ~np.isnan(values)]), axis=0)
+    start = np.maximum(np.arange(1, len(values) + 1) - window, 0)
+    return sums[1:] - sums[start], counts[1:] - counts[start]
+
+
+def rolling_sum(values, window):
+    """Rolling sum over ``window`` days; NaN unless every day in the window was observed."""
+    sums, counts = _window_sums(values, window)
+    sums[counts < window] = np.nan
+    return sums
+
+
+def shift(values, periods):
+    """Shift rows down by ``periods`` days, filling the start with NaN."""
+    shifted = np.full(values.shape, np.nan)
+    if periods < len(values):
+        shifted[periods:] = values[:len(values) - periods]
+    return shifted
+
+
+def pct_change(current, previous):
+    """Percentage change from ``previous`` to ``current``; NaN where ``previous`` is not positive."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(previous > 0, (current - previous) / previous * 100, np.nan)
+
+
+def anomaly_scores(values, window=ANOMALY_WINDOW, min_days=ANOMALY_MIN_DAYS):
+    """Z-score of each day against the mean and standard deviation of the ``window`` days before it."""
+    previous = shift(values, 1)
+    sums, counts = _window_sums(previous, window)
+    squares, _ = _window_sums(previous ** 2, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = sums / counts
+        variance = (squares - counts * mean ** 2) / (counts - 1)
+        std = np.sqrt(np.clip(variance, 0, None))
+        scores = (values - mean) / std
+    scores[(counts < min_days) | ~(std > 0)] = np.nan
+    return scores
+
+
+def analyze(aligned):
+    """Compute every statistic for all domains; returns a dict of dates x domains arrays."""
+    result = {}
+    for metric in METRICS:
+        values = aligned.values[metric]
+        name = metric.lower()
+        for window in WINDOWS:
+            result[f'{name}_{window}d'] = rolling_sum(values, window)
+        result[f'{name}_wow'] = pct_change(result[f'{name}_7d'], shift(result[f'{name}_7d'], WEEK))
+        result[f'{name}_yoy'] = pct_change(result[f'{name}_28d'], shift(result[f'{name}_28d'], YEAR))
+        result[f'{name}_z'] = anomaly_scores(values)
+        result[f'{name}_anomaly'] = np.abs(np.nan_to_num(result[f'{name}_z'])) >= ANOMALY_Z
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result['ctr_28d'] = result['clicks_28d'] / result['impressions_28d'] * 100
+    return result
+
+
+def latest(aligned, result):
+    """One row per domain with the statistics as of that domain's last observed day."""
+    observed = aligned.observed
+    if not observed.size:
+        return pd.DataFrame(columns=['domain', 'last_date'])
+    # Row of each domain's last observed day
+    last = len(aligned.dates) - 1 - np.argmax(observed[::-1], axis=0)
+    columns = np.arange(len(aligned.domains))
+
+    # Anomalies among each domain's last ANOMALY_WINDOW days
+    rows = np.arange(len(aligned.dates))[:, None]
+    recent = (rows > last - ANOMALY_WINDOW) & (rows <= last)
+
+    table = {'domain': aligned.domains, 'last_date': aligned.dates[last]}
+    for name in ('clicks_7d', 'clicks_wow', 'clicks_28d', 'clicks_yoy', 'impressions_28d',
+                 'impressions_wow', 'impressions_yoy', 'ctr_28d'):
+        table[name] = result[name][last, columns]
+    for metric in METRICS:
+        name = metric.lower()
+        table[f'{name}_anomalies'] = (result[f'{name}_anomaly'] & recent).sum(axis=0)
+    return pd.DataFrame(table)
+
+
+def trends(daily_by_domain):
+    """Align the daily series, compute every statistic and return the per-domain latest table."""
+    aligned = align(daily_by_domain)
+    return latest(aligned, analyze(aligned))
@@ -0,0 +1,102 @@
+"""Waiting for export folders in the data directory to appear or change.
+
+The data directory is summarised as a snapshot mapping every export folder
+to its ``manifest.folder_fingerprint`` (names, sizes and mtimes of its
+files, so taking one costs a few ``stat`` calls per folder). The watch loop
+compares snapshots every ``interval`` seconds. When the optional
+``watchdog`` package is installed, file system events (inotify on Linux)
+wake the loop up early, so changes are picked up without waiting for the
+next poll; polling remains the fallback and the safety net.
+
+Exports are usually copied in file by file, so a change is only reported
+once the snapshot has stayed the same for ``settle`` seconds.
+"""
+import functools
+import os
+import threading
+import time
+
+import manifest
+
+DEFAULT_INTERVAL = 2.0
+DEFAULT_SETTLE = 1.0
+
+
+@functools.lru_cache(maxsize=None)
+def _observer_class():
+    """Return ``watchdog.observers.Observer``, or None without watchdog."""
+    try:
+        from watchdog.observers import Observer
+    except ImportError:  # watchdog is optional
+        return None
+    return Observer
+
+
+def snapshot(data_dir):
+    """Return ``{folder path: fingerprint}`` for every subdirectory of ``data_dir``."""
+    folders = {}
+    with os.scandir(data_dir) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                try:
+                    folders[entry.path] = manifest.folder_fingerprint(entry.path)
+                except OSError:
+                    # Removed while scanning; the next snapshot settles it
+                    continue
+    return folders
+
+
+def changed_folders(before, after):
+    """Folders added, changed or removed between two snapshots, sorted."""
+    return sorted(folder for folder in before.keys() | after.keys() if before.get(folder) != after.get(folder))
+
+
+class Watcher:
+    """Polls ``data_dir`` for changes, woken early by file system events when watchdog is installed."""
+
+    def __init__(self, data_dir, interval=DEFAULT_INTERVAL, settle=DEFAULT_SETTLE):
+        self.data_dir = data_dir
+        self.interval = interval
+        self.settle = settle
+        self._event = threading.Event()
+        self._observer = None
+        observer_class = _observer_class()
+        if observer_class is not None:
+            from watchdog.events import FileSystemEventHandler
+
+            watcher = self
+
+            class Handler(FileSystemEventHandler):
+                def on_any_event(self, event):
+                    watcher._event.set()
+
+            self._observer = observer_class()
+            self._observer.schedule(Handler(), data_dir, recursive=True)
+            self._observer.daemon = True
+            self._observer.start()
+
+    @property
+    def mode(self):
+        return "file system events" if self._observer is not None else f"polling every {self.interval:g}s"
+
+    def wait(self, previous):
+        """Block until the snapshot differs from ``previous`` and has settled; returns the new snapshot."""
+        while True:
+            self._event.wait(self.interval)
+            self._event.clear()
+            current = snapshot(self.data_dir)
+            if current == previous:
+                continue
+            # Wait for the copy to finish: the snapshot must stay the same for a full settle period
+            while True:
+                time.sleep(self.settle)
+                self._event.clear()
+                settled = snapshot(self.data_dir)
+                if settled == current:
+                    return current
+                current = settled
+
+    def close(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()